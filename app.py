@@ -21,13 +21,19 @@ project_root = os.path.abspath(os.path.dirname(__file__))
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.services.database.pg_utils import get_connection, execute_query
+from src.services.database.pg_utils import get_connection, execute_query, get_pool_stats, publish_workflow_control_change
+from src.services.database.event_bus import publish, ORDERS_IMPORTED
+from src.services.database.run_lock import run_exclusive, get_run_leases
 
 # Initialize logger
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__, static_folder='static', static_url_path='/static')
 
+# ShipStation calls from the dashboard are interactive - highest rate-governor priority
+from utils.rate_governor import set_api_workflow
+set_api_workflow('dashboard')
+
 # Session and auth configuration
 app.secret_key = os.environ.get("SESSION_SECRET")
 if not app.secret_key:
@@ -239,10 +245,32 @@ def record_shipstation_order_deletion(shipstation_order_id, order_number=None, d
 # List of allowed HTML files to serve (security: prevent directory traversal)
 ALLOWED_PAGES = ['index.html', 'shipped_orders.html', 'shipped_items.html', 'charge_report.html', 'inventory_transactions.html', 'weekly_shipped_history.html', 'xml_import.html', 'settings.html', 'bundle_skus.html', 'sku_lot.html', 'lot_inventory.html', 'order_audit.html', 'workflow_controls.html', 'incidents.html', 'help.html', 'landing.html', 'email_contacts.html', 'order-management.html']
 
-# Concurrency locks for report endpoints (prevents duplicate processing)
-# NOTE: In-memory locks only protect a single Flask process. If multiple workers are deployed,
-# upgrade to database advisory locks (pg_advisory_lock) for system-wide concurrency protection.
-_report_locks = {'EOD': False, 'EOW': False, 'EOM': False}
+# Report endpoints (EOD/EOW/EOM) are guarded with run_exclusive() - PostgreSQL advisory
+# locks, so duplicate runs are blocked across gunicorn workers and hosts
+def exclusive_report(name):
+    """
+    Run a report endpoint under run_exclusive(name)
+    
+    Returns 409 if the report is already running elsewhere. An error response
+    (status >= 400) from the endpoint records the lease as 'failed'.
+    """
+    from functools import wraps
+    from flask import make_response
+    
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            with run_exclusive(name) as lease:
+                if lease is None:
+                    return jsonify({
+                        'success': False,
+                        'error': f'{name} report is already running. Please wait for it to complete.'
+                    }), 409
+                response = make_response(view(*args, **kwargs))
+                lease['failed'] = response.status_code >= 400
+                return response
+        return wrapper
+    return decorator
 
 @app.route('/')
 @login_required
@@ -299,6 +327,11 @@ def serve_page(filename):
 def health_check():
     """Production health check - shows environment and workflow status"""
     try:
+        from utils.api_utils import get_http_session_stats
+        from utils.rate_governor import get_governor_state
+        from src.services.shipstation.order_mirror import get_mirror_status
+        from src.services.shipstation.order_cache import get_order_cache_stats
+        
         is_production = os.getenv('REPLIT_DEPLOYMENT') == '1'
         repl_slug = os.getenv('REPL_SLUG', 'unknown')
         
@@ -440,6 +473,11 @@ def health_check():
             'sync_health': sync_health,
             'workflows': workflow_status,
             'database_connected': True,
+            'database_pool': get_pool_stats(),
+            'http_session': get_http_session_stats(),
+            'shipstation_rate_governor': get_governor_state(),
+            'shipstation_order_mirror': get_mirror_status(),
+            'shipstation_order_cache': get_order_cache_stats(),
             'deployment': {
                 'configured': deployment_configured,
                 'command': 'bash start_all.sh',
@@ -1895,6 +1933,7 @@ def api_weekly_inventory_report():
         }), 500
 
 @app.route('/api/reports/eod', methods=['POST'])
+@exclusive_report('EOD')
 def api_run_eod():
     """EOD - End of Day: Sync shipped items and update inventory"""
     import datetime
@@ -1904,14 +1943,6 @@ def api_run_eod():
     
     logger = logging.getLogger(__name__)
     
-    # Concurrency guard: prevent duplicate EOD runs
-    if _report_locks['EOD']:
-        return jsonify({
-            'success': False,
-            'error': 'EOD report is already running. Please wait for it to complete.'
-        }), 409
-    
-    _report_locks['EOD'] = True
     try:
         # Run the daily shipment processor
         result = subprocess.run(
@@ -1986,25 +2017,15 @@ def api_run_eod():
             'success': False,
             'error': str(e)
         }), 500
-    finally:
-        # Always release the lock
-        _report_locks['EOD'] = False
 
 @app.route('/api/reports/eow', methods=['POST'])
+@exclusive_report('EOW')
 def api_run_eow():
     """EOW - End of Week: Generate weekly report with 52-week averages"""
     import datetime
     import subprocess
     from src.services.database.pg_utils import eod_done_today, log_report_run
     
-    # Concurrency guard: prevent duplicate EOW runs
-    if _report_locks['EOW']:
-        return jsonify({
-            'success': False,
-            'error': 'EOW report is already running. Please wait for it to complete.'
-        }), 409
-    
-    _report_locks['EOW'] = True
     try:
         week_start = datetime.date.today() - datetime.timedelta(days=datetime.date.today().weekday())
         
@@ -2067,11 +2088,9 @@ def api_run_eow():
             'success': False,
             'error': str(e)
         }), 500
-    finally:
-        # Always release the lock
-        _report_locks['EOW'] = False
 
 @app.route('/api/reports/eom', methods=['POST'])
+@exclusive_report('EOM')
 def api_run_eom():
     """EOM - End of Month: Pre-calculate/refresh charge report data
     
@@ -2083,14 +2102,6 @@ def api_run_eom():
     import datetime
     from src.services.database.pg_utils import log_report_run, execute_query
     
-    # Concurrency guard: prevent duplicate EOM runs
-    if _report_locks['EOM']:
-        return jsonify({
-            'success': False,
-            'error': 'EOM report is already running. Please wait for it to complete.'
-        }), 409
-    
-    _report_locks['EOM'] = True
     try:
         # Calculate month boundaries (previous month)
         today = datetime.date.today()
@@ -2245,9 +2256,6 @@ def api_run_eom():
             'success': False,
             'error': str(e)
         }), 500
-    finally:
-        # Always release the lock
-        _report_locks['EOM'] = False
 
 @app.route('/api/reports/status', methods=['GET'])
 def api_report_status():
@@ -2461,6 +2469,8 @@ def api_xml_import():
                         
                         orders_imported += 1
             
+            if orders_imported > 0:
+                publish(ORDERS_IMPORTED, str(orders_imported), conn=conn)
             conn.commit()
             conn.close()
             
@@ -2942,6 +2952,8 @@ def api_google_drive_import_file(file_id):
                     
                     orders_imported += 1
         
+        if orders_imported > 0:
+            publish(ORDERS_IMPORTED, str(orders_imported), conn=conn)
         conn.commit()
         conn.close()
         
@@ -2991,6 +3003,8 @@ def api_retry_failed_orders():
             """)
             affected = cursor.rowcount
         
+        if affected:
+            publish(ORDERS_IMPORTED, 'retry', conn=conn)
         conn.commit()
         conn.close()
         
@@ -5829,9 +5843,8 @@ def api_order_audit():
     """
     try:
         from collections import defaultdict
-        
-        conn = get_connection()
-        cursor = conn.cursor()
+        from itertools import groupby
+        from src.services.database.pg_utils import iter_query
         
         def normalize_sku(sku):
             """Extract base SKU from SKU string (strip lot number)"""
@@ -5842,43 +5855,24 @@ def api_order_audit():
                 return sku.split('-', 1)[0].strip()
             return sku
         
-        # Get XML orders from order_items_inbox (consolidated by base SKU)
-        cursor.execute("""
-            SELECT oi.order_number, oii.sku, oii.quantity
+        # Stream both sides ordered by order number and merge-join them, so only one
+        # order's items are held in memory at a time (COLLATE "C" matches Python ordering)
+        # XML orders come from order_items_inbox (consolidated by base SKU)
+        xml_rows = iter_query("""
+            SELECT oi.order_number, oi.status, oii.sku, oii.quantity
             FROM order_items_inbox oii
             JOIN orders_inbox oi ON oii.order_inbox_id = oi.id
-            ORDER BY oi.order_number, oii.sku
+            ORDER BY oi.order_number COLLATE "C"
         """)
-        
-        xml_orders = defaultdict(lambda: defaultdict(int))
-        for row in cursor.fetchall():
-            order_number, sku, quantity = row
-            base_sku = normalize_sku(sku)
-            xml_orders[order_number][base_sku] += quantity
-        
-        # Get shipped orders from shipped_items (consolidated by base SKU)
-        cursor.execute("""
+        # Shipped orders come from shipped_items (consolidated by base SKU)
+        shipped_rows = iter_query("""
             SELECT order_number, base_sku, quantity_shipped
             FROM shipped_items
             WHERE order_number IS NOT NULL
-            ORDER BY order_number, base_sku
-        """)
-        
-        shipped_orders = defaultdict(lambda: defaultdict(int))
-        for row in cursor.fetchall():
-            order_number, base_sku, quantity = row
-            shipped_orders[order_number][base_sku] += quantity
-        
-        # Get active pending orders (to exclude from "missing" count)
-        # These are orders in pending/awaiting_shipment/cancelled status
-        cursor.execute("""
-            SELECT order_number
-            FROM orders_inbox
-            WHERE status IN ('pending', 'awaiting_shipment', 'cancelled')
+            ORDER BY order_number COLLATE "C"
         """)
-        active_pending_orders = {row[0] for row in cursor.fetchall()}
-        
-        conn.close()
+        xml_groups = groupby(xml_rows, key=lambda row: row[0])
+        shipped_groups = groupby(shipped_rows, key=lambda row: row[0])
         
         # Compare orders and find discrepancies
         results = {
@@ -5890,12 +5884,7 @@ def api_order_audit():
             'missing_orders': []
         }
         
-        all_orders = set(xml_orders.keys()) | set(shipped_orders.keys())
-        
-        for order_num in sorted(all_orders):
-            xml_items = xml_orders.get(order_num, {})
-            shipped_items = shipped_orders.get(order_num, {})
-            
+        def compare_order(order_num, xml_items, shipped_items, is_active_pending):
             # Order shipped but not in XML (manual order)
             if not xml_items and shipped_items:
                 for sku, qty in shipped_items.items():
@@ -5904,13 +5893,13 @@ def api_order_audit():
                         'sku': sku,
                         'shipped_qty': qty
                     })
-                continue
+                return
             
             # Order in XML but never shipped
             if xml_items and not shipped_items:
                 # CRITICAL: Only count as "missing" if NOT in active pending states
                 # (pending/awaiting_shipment/cancelled should NOT be flagged as missing)
-                if order_num not in active_pending_orders:
+                if not is_active_pending:
                     results['missing_orders'].append(order_num)
                     for sku, qty in xml_items.items():
                         results['missing_shipments'].append({
@@ -5918,7 +5907,7 @@ def api_order_audit():
                             'sku': sku,
                             'ordered_qty': qty
                         })
-                continue
+                return
             
             # Compare SKUs within the order
             all_skus = set(xml_items.keys()) | set(shipped_items.keys())
@@ -5935,7 +5924,7 @@ def api_order_audit():
                     })
                 elif xml_qty > 0 and shipped_qty == 0:
                     # CRITICAL: Only count as "missing" if NOT in active pending states
-                    if order_num not in active_pending_orders:
+                    if not is_active_pending:
                         results['missing_shipments'].append({
                             'order_number': order_num,
                             'sku': sku,
@@ -5964,6 +5953,45 @@ def api_order_audit():
                         'diff': xml_qty - shipped_qty
                     })
         
+        def next_xml_order():
+            for order_num, rows in xml_groups:
+                items = defaultdict(int)
+                status = None
+                for _, status, sku, quantity in rows:
+                    items[normalize_sku(sku)] += quantity
+                # Active pending orders (pending/awaiting_shipment/cancelled) are excluded from "missing"
+                return order_num, items, status in ('pending', 'awaiting_shipment', 'cancelled')
+            return None, None, False
+        
+        def next_shipped_order():
+            for order_num, rows in shipped_groups:
+                items = defaultdict(int)
+                for _, base_sku, quantity in rows:
+                    items[base_sku] += quantity
+                return order_num, items
+            return None, None
+        
+        total_xml_orders = 0
+        total_shipped_orders = 0
+        xml_num, xml_items, xml_active = next_xml_order()
+        shipped_num, shipped_items = next_shipped_order()
+        
+        while xml_num is not None or shipped_num is not None:
+            if shipped_num is None or (xml_num is not None and xml_num < shipped_num):
+                total_xml_orders += 1
+                compare_order(xml_num, xml_items, {}, xml_active)
+                xml_num, xml_items, xml_active = next_xml_order()
+            elif xml_num is None or shipped_num < xml_num:
+                total_shipped_orders += 1
+                compare_order(shipped_num, {}, shipped_items, False)
+                shipped_num, shipped_items = next_shipped_order()
+            else:
+                total_xml_orders += 1
+                total_shipped_orders += 1
+                compare_order(xml_num, xml_items, shipped_items, xml_active)
+                xml_num, xml_items, xml_active = next_xml_order()
+                shipped_num, shipped_items = next_shipped_order()
+        
         # Add summary counts
         results['summary'] = {
             'perfect_matches': len(results['perfect_matches']),
@@ -5972,8 +6000,8 @@ def api_order_audit():
             'missing_shipments': len(results['missing_shipments']),
             'extra_shipments': len(results['extra_shipments']),
             'missing_orders': len(results['missing_orders']),
-            'total_xml_orders': len(xml_orders),
-            'total_shipped_orders': len(shipped_orders)
+            'total_xml_orders': total_xml_orders,
+            'total_shipped_orders': total_shipped_orders
         }
         
         return jsonify({
@@ -5995,8 +6023,8 @@ def api_order_comparison():
     """
     try:
         from collections import defaultdict
-        import requests
-        from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers
+        from src.services.shipstation.api_client import get_shipstation_credentials, iter_orders
+        from src.services.shipstation.order_mirror import ensure_order_mirror, get_mirror_coverage_start
         
         start_date = request.args.get('start_date')
         end_date = request.args.get('end_date')
@@ -6030,36 +6058,61 @@ def api_order_comparison():
             else:
                 xml_orders[order_number][base_sku] = qty
         
-        # Fetch ShipStation orders via API (batch) - shipped AND cancelled orders
+        # ShipStation side - shipped AND cancelled orders
         api_key, api_secret = get_shipstation_credentials()
-        headers = get_shipstation_headers(api_key, api_secret)
         
-        # ShipStation requires ISO 8601 format with time
-        # Query shipped and cancelled orders separately, then combine
         ss_orders = defaultdict(dict)
         order_statuses = {}  # Track order status from ShipStation
         
-        for status in ['shipped', 'cancelled']:
-            ss_url = f"https://ssapi.shipstation.com/orders?orderDateStart={start_date}T00:00:00&orderDateEnd={end_date}T23:59:59&orderStatus={status}&pageSize=500"
-            response = requests.get(ss_url, headers=headers)
-            response.raise_for_status()
-            
-            ss_data = response.json()
-            
-            # Process ShipStation orders (consolidated by order and SKU)
-            for order in ss_data.get('orders', []):
-                order_number = order.get('orderNumber')
-                order_statuses[order_number] = order.get('orderStatus')
-                
-                for item in order.get('items', []):
-                    sku = item.get('sku', '').strip()
-                    base_sku = sku.split('-')[0].strip() if '-' in sku else sku
-                    qty = item.get('quantity', 0)
+        def add_ss_item(order_number, base_sku, qty):
+            if base_sku in ss_orders[order_number]:
+                ss_orders[order_number][base_sku] += qty
+            else:
+                ss_orders[order_number][base_sku] = qty
+        
+        coverage_start = get_mirror_coverage_start()
+        use_mirror = (
+            coverage_start is not None
+            and datetime.strptime(start_date, '%Y-%m-%d') >= coverage_start
+            and ensure_order_mirror(api_key, api_secret, max_age_seconds=60)
+        )
+        
+        if use_mirror:
+            # Local order mirror - one query instead of paging the API
+            cursor.execute("""
+                SELECT m.order_number, m.order_status, i.sku, COALESCE(i.quantity, 0)
+                FROM shipstation_orders_mirror m
+                LEFT JOIN shipstation_order_items_mirror i ON i.shipstation_order_id = m.shipstation_order_id
+                WHERE m.order_status IN ('shipped', 'cancelled')
+                  AND m.order_date >= %s::date
+                  AND m.order_date < %s::date + 1
+                  AND NOT EXISTS (
+                      SELECT 1 FROM deleted_shipstation_orders d
+                      WHERE d.shipstation_order_id = m.shipstation_order_id
+                  )
+            """, (start_date, end_date))
+            for order_number, order_status, sku, qty in cursor.fetchall():
+                order_statuses[order_number] = order_status
+                if sku is None:
+                    continue
+                sku = sku.strip()
+                add_ss_item(order_number, sku.split('-')[0].strip() if '-' in sku else sku, qty)
+        else:
+            # Outside the mirror window - query the API, every page
+            for status in ['shipped', 'cancelled']:
+                params = {
+                    'orderDateStart': f"{start_date}T00:00:00",
+                    'orderDateEnd': f"{end_date}T23:59:59",
+                    'orderStatus': status,
+                    'pageSize': 500
+                }
+                for order in iter_orders(api_key, api_secret, params, label=f'Comparison ({status})'):
+                    order_number = order.get('orderNumber')
+                    order_statuses[order_number] = order.get('orderStatus')
                     
-                    if base_sku in ss_orders[order_number]:
-                        ss_orders[order_number][base_sku] += qty
-                    else:
-                        ss_orders[order_number][base_sku] = qty
+                    for item in order.get('items', []):
+                        sku = item.get('sku', '').strip()
+                        add_ss_item(order_number, sku.split('-')[0].strip() if '-' in sku else sku, item.get('quantity', 0))
         
         conn.close()
         
@@ -6160,6 +6213,16 @@ def get_workflow_controls():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/api_usage', methods=['GET'])
+def get_api_usage():
+    """ShipStation/API usage per workflow and endpoint (?hours=24)"""
+    try:
+        from utils.api_usage import get_api_usage_summary
+        hours = min(max(request.args.get('hours', 24, type=int), 1), 24 * 14)
+        return jsonify(get_api_usage_summary(hours))
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/workflow_controls/<workflow_name>', methods=['PUT'])
 def update_workflow_control(workflow_name):
     """Toggle workflow control"""
@@ -6186,6 +6249,8 @@ def update_workflow_control(workflow_name):
             SET enabled = %s, last_updated = CURRENT_TIMESTAMP, updated_by = %s
             WHERE workflow_name = %s
         """, (enabled, 'admin', workflow_name))
+        # Push the toggle to every process's is_workflow_enabled() cache on commit
+        publish_workflow_control_change(workflow_name, enabled, conn=conn)
         conn.commit()
         conn.close()
         
@@ -7312,6 +7377,45 @@ def api_admin_lookup_order():
         logger.error(f'Error looking up order {order_number}: {e}', exc_info=True)
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/admin/query_stats', methods=['GET'])
+@login_required
+@admin_required
+def api_admin_query_stats():
+    """Top-N SQL statements by total time for this dashboard process (plus pool stats)"""
+    try:
+        from src.services.database.pg_utils import get_query_stats, get_recent_queries
+        
+        limit = request.args.get('limit', 20, type=int)
+        recent = request.args.get('recent', 0, type=int)
+        order_by = request.args.get('order_by', 'total_ms')
+        if order_by not in ('total_ms', 'calls', 'avg_ms', 'max_ms', 'rows', 'conn_wait_ms'):
+            return jsonify({'success': False, 'error': f'Invalid order_by: {order_by}'}), 400
+        
+        stats = get_query_stats(limit=limit, order_by=order_by)
+        return jsonify({
+            'success': True,
+            'pid': stats['pid'],
+            'since': datetime.utcfromtimestamp(stats['since']).isoformat() + 'Z',
+            'slow_query_ms': stats['slow_query_ms'],
+            'statements': stats['statements'],
+            'recent': get_recent_queries(recent) if recent else [],
+            'pool': get_pool_stats()
+        })
+    except Exception as e:
+        logger.error(f'Error getting query stats: {e}', exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/api/admin/run_leases', methods=['GET'])
+@login_required
+@admin_required
+def api_admin_run_leases():
+    """Who holds (or last held) each run_exclusive() lease - reports and daemons"""
+    try:
+        return jsonify({'success': True, 'leases': get_run_leases()})
+    except Exception as e:
+        logger.error(f'Error getting run leases: {e}', exc_info=True)
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 @app.route('/order-management.html')
 @login_required
 @admin_required
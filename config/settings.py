@@ -96,7 +96,8 @@ YOUR_GCP_PROJECT_ID = "ora-automation-project"
 
 
 # --- ShipStation API Configuration ---
-SHIPSTATION_BASE_URL = "https://ssapi.shipstation.com"
+# Override to point every ShipStation client at a stand-in (e.g. scripts/shipstation_simulator.py)
+SHIPSTATION_BASE_URL = os.getenv('SHIPSTATION_BASE_URL', "https://ssapi.shipstation.com").rstrip('/')
 SHIPSTATION_API_KEY_SECRET_ID = "shipstation-api-key"
 SHIPSTATION_API_SECRET_SECRET_ID = "shipstation-api-secret"
 SHIPSTATION_CREATE_ORDERS_ENDPOINT = f"{SHIPSTATION_BASE_URL}/orders/createorders"
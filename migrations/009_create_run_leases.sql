@@ -0,0 +1,15 @@
+-- Migration: Create run_leases table for run_exclusive() advisory-lock guards
+-- Exclusivity comes from pg_try_advisory_lock(lock_key); this table only records
+-- who holds (or last held) each lease so it can be inspected from the dashboard.
+-- A row whose holder died is detected by joining pg_locks on lock_key.
+
+CREATE TABLE IF NOT EXISTS run_leases (
+    name TEXT PRIMARY KEY,
+    lock_key BIGINT NOT NULL,
+    holder TEXT NOT NULL,
+    hostname TEXT,
+    pid INTEGER,
+    started_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP,
+    status TEXT NOT NULL DEFAULT 'running' CHECK (status IN ('running', 'finished', 'failed'))
+);
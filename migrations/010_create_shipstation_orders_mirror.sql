@@ -0,0 +1,45 @@
+-- Migration: Create local ShipStation order mirror (orders + line items)
+-- Kept current by src/services/shipstation/order_mirror.py from a modifyDate
+-- watermark (sync_watermark row 'shipstation-orders-mirror'); a periodic full
+-- re-list of the seed window prunes orders deleted in ShipStation.
+-- Scanners and duplicate checks read these tables instead of re-downloading
+-- 90/180 days of orders.
+
+CREATE TABLE IF NOT EXISTS shipstation_orders_mirror (
+    shipstation_order_id BIGINT PRIMARY KEY,
+    order_number TEXT NOT NULL,
+    order_key TEXT,
+    order_status TEXT,
+    order_date TIMESTAMP,
+    create_date TIMESTAMP,
+    modify_date TIMESTAMP,
+    ship_name TEXT,
+    ship_company TEXT,
+    order_total NUMERIC(12, 2),
+    order_json JSONB NOT NULL,
+    mirrored_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_ss_orders_mirror_order_number
+    ON shipstation_orders_mirror (UPPER(order_number));
+CREATE INDEX IF NOT EXISTS idx_ss_orders_mirror_create_date
+    ON shipstation_orders_mirror (create_date);
+CREATE INDEX IF NOT EXISTS idx_ss_orders_mirror_order_date
+    ON shipstation_orders_mirror (order_date);
+CREATE INDEX IF NOT EXISTS idx_ss_orders_mirror_status_modify
+    ON shipstation_orders_mirror (order_status, modify_date);
+
+CREATE TABLE IF NOT EXISTS shipstation_order_items_mirror (
+    shipstation_order_id BIGINT NOT NULL REFERENCES shipstation_orders_mirror (shipstation_order_id) ON DELETE CASCADE,
+    line_number INTEGER NOT NULL,
+    order_item_id BIGINT,
+    line_item_key TEXT,
+    sku TEXT,
+    base_sku TEXT,
+    lot TEXT,
+    quantity INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (shipstation_order_id, line_number)
+);
+
+CREATE INDEX IF NOT EXISTS idx_ss_order_items_mirror_base_sku
+    ON shipstation_order_items_mirror (base_sku);
@@ -0,0 +1,26 @@
+-- Migration: Create api_usage_rollup table for per-workflow API accounting
+-- utils/api_usage.py aggregates every make_api_request call in memory and
+-- flushes one row per (hour, workflow, endpoint) about once a minute, adding to
+-- the counters already stored. latency_hist holds request counts per latency
+-- bucket (upper bounds in api_usage.LATENCY_BUCKETS_MS) so percentiles can be
+-- computed across processes and hours. Rows older than the retention window
+-- (API_USAGE_RETENTION_DAYS, default 14) are pruned by the flusher.
+
+CREATE TABLE IF NOT EXISTS api_usage_rollup (
+    bucket_start TIMESTAMP NOT NULL,
+    workflow TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    request_count INTEGER NOT NULL DEFAULT 0,
+    error_count INTEGER NOT NULL DEFAULT 0,
+    rate_limited_count INTEGER NOT NULL DEFAULT 0,
+    retry_count INTEGER NOT NULL DEFAULT 0,
+    bytes_in BIGINT NOT NULL DEFAULT 0,
+    bytes_out BIGINT NOT NULL DEFAULT 0,
+    latency_ms_total DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_ms_max DOUBLE PRECISION NOT NULL DEFAULT 0,
+    latency_hist INTEGER[] NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (bucket_start, workflow, endpoint)
+);
+
+CREATE INDEX IF NOT EXISTS idx_api_usage_rollup_bucket ON api_usage_rollup (bucket_start);
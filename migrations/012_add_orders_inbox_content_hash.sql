@@ -0,0 +1,8 @@
+-- Migration: Add shipstation_content_hash to orders_inbox
+-- Hash of the ShipStation fields the unified sync persists (status, items,
+-- carrier/service, tracking, ship-to), written with every status update.
+-- ShipStation bumps modifyDate for label views, notes and tags; when the hash
+-- of the incoming order still matches, the sync skips the order without writing.
+-- NULL (older rows) simply means "not known yet" - the next update fills it in.
+
+ALTER TABLE orders_inbox ADD COLUMN IF NOT EXISTS shipstation_content_hash TEXT;
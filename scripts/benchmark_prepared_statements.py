@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-order lookup cost: plain parameterised SELECT vs PREPARE/EXECUTE
+Usage: python scripts/benchmark_prepared_statements.py [orders] [rounds]
+
+Runs the unified sync's hot lookups (order_exists_locally and
+is_order_from_local_system) against real order numbers from orders_inbox, once
+with plain cursor.execute() and once through the prepared-statement registry,
+and prints the per-order cost of each. Read-only.
+"""
+
+import os
+import sys
+import time
+import statistics
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from src.services.database.pg_utils import get_connection, prepared_statement
+
+ORDER_LOOKUP_SQL = "SELECT id, shipstation_order_id FROM orders_inbox WHERE order_number = %s"
+LINE_ITEM_SQL = "SELECT 1 FROM shipstation_order_line_items WHERE shipstation_order_id = %s LIMIT 1"
+
+
+def load_sample(limit):
+    """Fetch (order_number, shipstation_order_id) pairs to look up"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT order_number, COALESCE(shipstation_order_id, '')
+            FROM orders_inbox
+            ORDER BY updated_at DESC NULLS LAST
+            LIMIT %s
+        """, (limit,))
+        return cursor.fetchall()
+    finally:
+        conn.close()
+
+
+def run_round(sample, lookup):
+    """Time one pass over the sample; returns seconds per order"""
+    conn = get_connection()
+    try:
+        cursor = conn.cursor()
+        start = time.perf_counter()
+        for order_number, shipstation_order_id in sample:
+            lookup(cursor, order_number, shipstation_order_id)
+        elapsed = time.perf_counter() - start
+        conn.rollback()
+        return elapsed / len(sample)
+    finally:
+        conn.close()
+
+
+def plain_lookup(cursor, order_number, shipstation_order_id):
+    cursor.execute(ORDER_LOOKUP_SQL, (order_number,))
+    cursor.fetchall()
+    cursor.execute(LINE_ITEM_SQL, (shipstation_order_id,))
+    cursor.fetchall()
+
+
+_order_lookup = prepared_statement('bench_order_lookup', ORDER_LOOKUP_SQL)
+_line_item_lookup = prepared_statement('bench_line_item_lookup', LINE_ITEM_SQL)
+
+
+def prepared_lookup(cursor, order_number, shipstation_order_id):
+    _order_lookup.execute(cursor, (order_number,))
+    cursor.fetchall()
+    _line_item_lookup.execute(cursor, (shipstation_order_id,))
+    cursor.fetchall()
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    sample = load_sample(orders)
+    if not sample:
+        print("orders_inbox is empty - nothing to benchmark")
+        return 1
+
+    # Warm-up: establishes the pooled connection and PREPAREs the statements
+    run_round(sample[:10], plain_lookup)
+    run_round(sample[:10], prepared_lookup)
+
+    results = {'plain': [], 'prepared': []}
+    for _ in range(rounds):
+        # Interleave so drift (cache, network) affects both equally
+        results['plain'].append(run_round(sample, plain_lookup))
+        results['prepared'].append(run_round(sample, prepared_lookup))
+
+    print("\n" + "=" * 60)
+    print(f"PER-ORDER LOOKUP COST ({len(sample)} orders x {rounds} rounds, 2 queries/order)")
+    print("=" * 60)
+    for label, timings in results.items():
+        micros = [t * 1_000_000 for t in timings]
+        print(f"{label:10} median {statistics.median(micros):>9.1f} us/order   "
+              f"min {min(micros):>9.1f}   max {max(micros):>9.1f}")
+    plain = statistics.median(results['plain'])
+    prepared = statistics.median(results['prepared'])
+    print("-" * 60)
+    print(f"speedup    {plain / prepared:.2f}x  ({(plain - prepared) * 1_000_000:.1f} us saved per order)")
+    print("=" * 60)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
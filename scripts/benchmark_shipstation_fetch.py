@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Benchmark ShipStation fetch paths against the local simulator
+Usage: python scripts/benchmark_shipstation_fetch.py [orders] [latency_ms]
+
+Starts scripts/shipstation_simulator.py in-process (seeded dataset, fixed
+per-request latency), points the ShipStation client at it and times:
+- streaming a full /orders scan (concurrent paginator)
+- the same scan one page at a time
+- order-number lookups (fan-out vs date scan)
+
+No database and no live API are touched. The rate governor uses a private
+state file, so a running system's budget is unaffected.
+"""
+
+import os
+import sys
+import time
+import socket
+import tempfile
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+PORT = _free_port()
+# Must be set before config.settings / utils.rate_governor are imported
+os.environ['SHIPSTATION_BASE_URL'] = f"http://127.0.0.1:{PORT}"
+os.environ.setdefault('SHIPSTATION_RATE_STATE_FILE', os.path.join(tempfile.mkdtemp(), 'rate_governor.json'))
+os.environ.setdefault('SHIPSTATION_RATE_LIMIT_PER_MINUTE', '600')
+
+from scripts.shipstation_simulator import start_simulator
+from src.services.shipstation.api_client import (
+    iter_orders,
+    get_shipstation_headers,
+    fetch_shipstation_orders_by_order_numbers,
+)
+from src.services.shipstation.paginator import iter_pages
+from config.settings import SHIPSTATION_ORDERS_ENDPOINT
+
+API_KEY, API_SECRET = 'sim', 'sim'
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:45} {elapsed * 1000:>9.1f} ms   {result}")
+    return elapsed
+
+
+def main():
+    orders = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 150
+
+    server, state = start_simulator([
+        '--port', str(PORT), '--orders', str(orders), '--latency-ms', str(latency_ms),
+        '--rate-limit', os.environ['SHIPSTATION_RATE_LIMIT_PER_MINUTE'],
+    ])
+    params = {'pageSize': 500}
+    headers = get_shipstation_headers(API_KEY, API_SECRET)
+    sample = sorted({o['orderNumber'] for o in list(state.dataset.orders.values())[::max(1, orders // 10)]})
+
+    print("\n" + "=" * 80)
+    print(f"SHIPSTATION FETCH PATHS ({len(state.dataset.orders)} simulated orders, {latency_ms:.0f} ms/request)")
+    print("=" * 80)
+    try:
+        timed("full scan, concurrent pages", lambda: f"{sum(1 for _ in iter_orders(API_KEY, API_SECRET, params))} orders")
+        timed("full scan, one page at a time", lambda: f"{sum(len(items) for _, _, items in iter_pages(SHIPSTATION_ORDERS_ENDPOINT, headers, params, 'orders', max_workers=1))} orders")
+        timed(f"lookup {len(sample)} order numbers (fanout)", lambda: f"{len(fetch_shipstation_orders_by_order_numbers(API_KEY, API_SECRET, SHIPSTATION_ORDERS_ENDPOINT, sample, strategy='fanout'))} found")
+        timed(f"lookup {len(sample)} order numbers (scan)", lambda: f"{len(fetch_shipstation_orders_by_order_numbers(API_KEY, API_SECRET, SHIPSTATION_ORDERS_ENDPOINT, sample, strategy='scan'))} found")
+    finally:
+        server.shutdown()
+    print("-" * 80)
+    print(f"simulator requests: {state.stats['requests']}  429s: {state.stats['rate_limited'] + state.stats['injected_429']}")
+    print("=" * 80)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
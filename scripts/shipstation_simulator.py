@@ -0,0 +1,534 @@
+#!/usr/bin/env python3
+"""
+Local ShipStation API simulator for benchmarks and offline testing
+Usage: python scripts/shipstation_simulator.py [--port 8765] [--orders 3000] [--seed 42]
+                                               [--latency-ms 150] [--jitter-ms 50]
+                                               [--rate-limit 40] [--inject-429 0.02]
+
+Point the app at it with:
+    export SHIPSTATION_BASE_URL=http://127.0.0.1:8765
+    export SHIPSTATION_API_KEY=sim SHIPSTATION_API_SECRET=sim
+
+Every ShipStation client (sync, uploader, scanners, refreshers) then talks to
+this process instead of ssapi.shipstation.com. The rate governor treats the
+simulator host as governed, so quota behaviour matches production.
+
+IMPLEMENTS:
+- GET    /orders                 (orderNumber prefix, orderStatus, create/modify/order date
+                                  ranges, sortBy/sortDir, page/pageSize <= 500)
+- GET    /orders/{id}
+- DELETE /orders/{id}
+- POST   /orders/createorders    (upsert by orderKey, like ShipStation)
+- POST   /orders/createorder
+- GET    /shipments              (ship/create date ranges, orderNumber, orderId,
+                                  trackingNumber, includeShipmentItems, paging)
+
+BEHAVIOUR:
+- Seeded synthetic dataset (same --seed => same orders), dates relative to now
+- X-Rate-Limit-Limit / -Remaining / -Reset headers, fixed 60s window per API key,
+  429 + Retry-After once the window is spent
+- Injectable latency (mean + jitter) and random 429s
+
+CONTROL ENDPOINTS (not part of ShipStation):
+- GET  /_sim/stats               request counts, 429s, dataset size
+- POST /_sim/config              {"latency_ms", "jitter_ms", "rate_limit", "inject_429"}
+- POST /_sim/touch               {"count": N} bump modifyDate on N random orders
+- POST /_sim/reset               rebuild the dataset from the seed, clear counters
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import random
+import argparse
+import threading
+import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SS_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S.0000000'
+MAX_PAGE_SIZE = 500
+RATE_WINDOW_SECONDS = 60
+
+KEY_PRODUCT_SKUS = ['17612', '17904', '17914', '18675', '18795']
+OTHER_SKUS = ['18185', '18235', '18415', '18525', '19005']
+CARRIERS = [('fedex', 'fedex_2day'), ('fedex', 'fedex_ground'), ('ups', 'ups_ground'), ('stamps_com', 'usps_priority_mail')]
+STATUSES = [('shipped', 0.70), ('awaiting_shipment', 0.22), ('cancelled', 0.05), ('on_hold', 0.03)]
+FIRST_NAMES = ['Alex', 'Jordan', 'Sam', 'Taylor', 'Morgan', 'Casey', 'Riley', 'Jamie', 'Avery', 'Quinn']
+LAST_NAMES = ['Smith', 'Nguyen', 'Garcia', 'Patel', 'Kim', 'Brown', 'Lopez', 'Chen', 'Davis', 'Wilson']
+COMPANIES = ['', '', '', 'Dental Care Group', 'Bright Smiles', 'Family Dentistry', 'Oral Health Partners']
+
+
+def ss_date(dt: datetime.datetime) -> str:
+    return dt.strftime(SS_DATE_FORMAT)
+
+
+def parse_ss_date(value: str):
+    """Accept the date shapes clients send (Z suffix, space or T, fractional seconds)"""
+    if not value:
+        return None
+    text = value.strip().replace(' ', 'T').rstrip('Z')
+    for fmt, width in (('%Y-%m-%dT%H:%M:%S', 19), ('%Y-%m-%d', 10)):
+        try:
+            return datetime.datetime.strptime(text[:width], fmt)
+        except ValueError:
+            continue
+    return None
+
+
+class Dataset:
+    """Seeded synthetic orders and shipments, mutated by createorders/DELETE/touch"""
+
+    def __init__(self, order_count: int, days: int, seed: int):
+        self.order_count = order_count
+        self.days = days
+        self.seed = seed
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        rng = random.Random(self.seed)
+        now = datetime.datetime.now().replace(microsecond=0)
+        self.orders = {}
+        self.shipments = {}
+        self.next_order_id = 500000000
+        self.next_shipment_id = 700000000
+        self.next_item_id = 900000000
+        self.next_order_number = 600000
+        self.next_manual_number = 100000
+
+        for _ in range(self.order_count):
+            created = now - datetime.timedelta(seconds=rng.randint(0, self.days * 86400))
+            manual = rng.random() < 0.05
+            if manual:
+                order_number = str(self.next_manual_number)
+                self.next_manual_number += 1
+            else:
+                order_number = str(self.next_order_number)
+                self.next_order_number += 1
+            status = self._pick_status(rng)
+            order = self._build_order(rng, order_number, status, created, now)
+            self.orders[order['orderId']] = order
+            if status == 'shipped':
+                self._ship(rng, order, now)
+
+        # A few realistic duplicates (same number uploaded twice)
+        for order in rng.sample(list(self.orders.values()), min(5, len(self.orders))):
+            dup = self._build_order(rng, order['orderNumber'], 'awaiting_shipment',
+                                    parse_ss_date(order['createDate']) + datetime.timedelta(minutes=7), now)
+            self.orders[dup['orderId']] = dup
+
+    @staticmethod
+    def _pick_status(rng):
+        roll = rng.random()
+        for status, weight in STATUSES:
+            if roll < weight:
+                return status
+            roll -= weight
+        return STATUSES[0][0]
+
+    def _build_order(self, rng, order_number, status, created, now):
+        order_id = self.next_order_id
+        self.next_order_id += 1
+        modified = min(now, created + datetime.timedelta(hours=rng.randint(0, 72)))
+        items = []
+        for _ in range(rng.choice([1, 1, 1, 2, 3])):
+            base = rng.choice(KEY_PRODUCT_SKUS if rng.random() < 0.8 else OTHER_SKUS)
+            lot = f"25{rng.randint(100, 999)}"
+            items.append({
+                'orderItemId': self.next_item_id,
+                'lineItemKey': f"{order_number}-{len(items) + 1}",
+                'sku': f"{base} - {lot}",
+                'name': f"Product {base}",
+                'quantity': rng.randint(1, 12),
+                'unitPrice': 0.0,
+            })
+            self.next_item_id += 1
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+        carrier, service = rng.choice(CARRIERS)
+        return {
+            'orderId': order_id,
+            'orderNumber': order_number,
+            'orderKey': f"sim-{order_id}",
+            'orderDate': ss_date(created - datetime.timedelta(hours=rng.randint(0, 24))),
+            'createDate': ss_date(created),
+            'modifyDate': ss_date(modified),
+            'paymentDate': ss_date(created),
+            'shipByDate': None,
+            'orderStatus': status,
+            'customerEmail': None,
+            'billTo': {'name': name},
+            'shipTo': {
+                'name': name, 'company': rng.choice(COMPANIES), 'street1': f"{rng.randint(10, 9999)} Main St",
+                'city': 'Springfield', 'state': 'IL', 'postalCode': f"62{rng.randint(100, 999)}",
+                'country': 'US', 'phone': None, 'residential': True,
+            },
+            'items': items,
+            'orderTotal': round(sum(i['quantity'] for i in items) * 10.0, 2),
+            'carrierCode': carrier,
+            'serviceCode': service,
+            'shipDate': None,
+            'advancedOptions': {},
+        }
+
+    def _ship(self, rng, order, now):
+        created = parse_ss_date(order['createDate'])
+        ship_date = min(now, created + datetime.timedelta(hours=rng.randint(2, 48)))
+        order['shipDate'] = ship_date.strftime('%Y-%m-%d')
+        shipment_id = self.next_shipment_id
+        self.next_shipment_id += 1
+        self.shipments[shipment_id] = {
+            'shipmentId': shipment_id,
+            'orderId': order['orderId'],
+            'orderKey': order['orderKey'],
+            'orderNumber': order['orderNumber'],
+            'createDate': ss_date(ship_date),
+            'shipDate': ship_date.strftime('%Y-%m-%d'),
+            'trackingNumber': f"1Z{rng.randint(10**15, 10**16 - 1)}",
+            'carrierCode': order['carrierCode'],
+            'serviceCode': order['serviceCode'],
+            'voided': False,
+            'shipTo': order['shipTo'],
+            'shipmentItems': [
+                {'orderItemId': i['orderItemId'], 'lineItemKey': i['lineItemKey'], 'sku': i['sku'],
+                 'name': i['name'], 'quantity': i['quantity']}
+                for i in order['items']
+            ],
+        }
+
+    def touch(self, count: int, seed: int = None) -> list:
+        """Bump modifyDate on count random orders (drives incremental-sync benchmarks)"""
+        rng = random.Random(seed)
+        now = ss_date(datetime.datetime.now())
+        with self.lock:
+            picked = rng.sample(list(self.orders.values()), min(count, len(self.orders)))
+            for order in picked:
+                order['modifyDate'] = now
+        return [o['orderId'] for o in picked]
+
+    def upsert(self, payload: dict) -> dict:
+        """createorder semantics: orderKey match updates, otherwise a new order"""
+        now = datetime.datetime.now()
+        with self.lock:
+            existing = None
+            if payload.get('orderKey'):
+                existing = next((o for o in self.orders.values() if o.get('orderKey') == payload['orderKey']), None)
+            if existing is None:
+                order_id = self.next_order_id
+                self.next_order_id += 1
+                order = {'orderId': order_id, 'createDate': ss_date(now), 'shipDate': None}
+                self.orders[order_id] = order
+            else:
+                order = existing
+            order.update({k: v for k, v in payload.items() if k not in ('orderId', 'createDate')})
+            order.setdefault('orderKey', f"sim-{order['orderId']}")
+            order['orderStatus'] = payload.get('orderStatus', order.get('orderStatus') or 'awaiting_shipment')
+            order['modifyDate'] = ss_date(now)
+            for item in order.get('items') or []:
+                if not item.get('orderItemId'):
+                    item['orderItemId'] = self.next_item_id
+                    self.next_item_id += 1
+            return order
+
+
+class RateLimiter:
+    """ShipStation-style fixed window per API key"""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def take(self, key: str):
+        """Returns (allowed, remaining, reset_seconds)"""
+        now = time.time()
+        with self.lock:
+            start, used = self.windows.get(key, (now, 0))
+            if now - start >= RATE_WINDOW_SECONDS:
+                start, used = now, 0
+            reset = max(1, int(RATE_WINDOW_SECONDS - (now - start)))
+            if used >= self.limit:
+                self.windows[key] = (start, used)
+                return False, 0, reset
+            used += 1
+            self.windows[key] = (start, used)
+            return True, self.limit - used, reset
+
+
+class SimulatorState:
+    def __init__(self, args):
+        self.dataset = Dataset(args.orders, args.days, args.seed)
+        self.config = {
+            'latency_ms': args.latency_ms,
+            'jitter_ms': args.jitter_ms,
+            'rate_limit': args.rate_limit,
+            'inject_429': args.inject_429,
+        }
+        self.limiter = RateLimiter(args.rate_limit)
+        self.rng = random.Random(args.seed)
+        self.stats = {'requests': 0, 'rate_limited': 0, 'injected_429': 0, 'by_endpoint': {}}
+        self.stats_lock = threading.Lock()
+
+    def count(self, key: str, endpoint: str = None):
+        with self.stats_lock:
+            self.stats[key] += 1
+            if endpoint:
+                self.stats['by_endpoint'][endpoint] = self.stats['by_endpoint'].get(endpoint, 0) + 1
+
+
+def _paginate(items: list, query: dict, key: str) -> dict:
+    page_size = max(1, min(MAX_PAGE_SIZE, int(query.get('pageSize', 100))))
+    page = max(1, int(query.get('page', 1)))
+    total = len(items)
+    pages = (total + page_size - 1) // page_size
+    start = (page - 1) * page_size
+    return {key: items[start:start + page_size], 'total': total, 'page': page, 'pages': pages}
+
+
+def _in_range(value: str, start: str, end: str) -> bool:
+    if not start and not end:
+        return True
+    parsed = parse_ss_date(value)
+    if parsed is None:
+        return False
+    if start and parsed < parse_ss_date(start):
+        return False
+    if end and parsed > parse_ss_date(end):
+        return False
+    return True
+
+
+def list_orders(dataset: Dataset, query: dict) -> dict:
+    number = (query.get('orderNumber') or '').strip().upper()
+    status = query.get('orderStatus')
+    with dataset.lock:
+        matches = [
+            o for o in dataset.orders.values()
+            if (not number or o['orderNumber'].upper().startswith(number))
+            and (not status or o['orderStatus'] == status)
+            and _in_range(o['createDate'], query.get('createDateStart'), query.get('createDateEnd'))
+            and _in_range(o['modifyDate'], query.get('modifyDateStart'), query.get('modifyDateEnd'))
+            and _in_range(o['orderDate'], query.get('orderDateStart'), query.get('orderDateEnd'))
+        ]
+    sort_field = {'OrderDate': 'orderDate', 'ModifyDate': 'modifyDate', 'CreateDate': 'createDate'}.get(
+        query.get('sortBy'), 'orderId')
+    matches.sort(key=lambda o: (o.get(sort_field) or '', o['orderId']),
+                 reverse=(query.get('sortDir', 'ASC').upper() == 'DESC'))
+    return _paginate(matches, query, 'orders')
+
+
+def list_shipments(dataset: Dataset, query: dict) -> dict:
+    include_items = str(query.get('includeShipmentItems', 'false')).lower() == 'true'
+    with dataset.lock:
+        matches = [
+            s for s in dataset.shipments.values()
+            if (not query.get('orderNumber') or s['orderNumber'] == query['orderNumber'])
+            and (not query.get('orderId') or str(s['orderId']) == str(query['orderId']))
+            and (not query.get('trackingNumber') or s['trackingNumber'] == query['trackingNumber'])
+            and _in_range(s['createDate'], query.get('createDateStart'), query.get('createDateEnd'))
+            and _in_range(s['shipDate'], query.get('shipDateStart'), query.get('shipDateEnd'))
+        ]
+        matches.sort(key=lambda s: s['shipmentId'])
+        if not include_items:
+            matches = [dict(s, shipmentItems=None) for s in matches]
+    return _paginate(matches, query, 'shipments')
+
+
+def make_handler(state: SimulatorState):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+        def log_message(self, fmt, *args):
+            if os.getenv('SIMULATOR_VERBOSE'):
+                super().log_message(fmt, *args)
+
+        # --- plumbing ---
+        def _send(self, status: int, body, headers: dict = None):
+            payload = json.dumps(body).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(payload)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, str(value))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _body(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return json.loads(self.rfile.read(length) or b'null') if length else None
+
+        def _api_key(self) -> str:
+            auth = self.headers.get('Authorization', '')
+            if auth.startswith('Basic '):
+                try:
+                    return base64.b64decode(auth[6:]).decode('utf-8').split(':', 1)[0]
+                except ValueError:
+                    pass
+            return ''
+
+        def _gate(self, endpoint: str):
+            """Auth, latency, rate limit and injected 429s; returns headers or None if answered"""
+            if not self._api_key():
+                self._send(401, {'Message': 'Authorization has been denied for this request.'})
+                return None
+            config = state.config
+            delay = config['latency_ms'] + state.rng.uniform(-config['jitter_ms'], config['jitter_ms'])
+            if delay > 0:
+                time.sleep(delay / 1000.0)
+            state.count('requests', endpoint)
+            state.limiter.limit = config['rate_limit']
+            allowed, remaining, reset = state.limiter.take(self._api_key())
+            headers = {'X-Rate-Limit-Limit': config['rate_limit'], 'X-Rate-Limit-Remaining': remaining,
+                       'X-Rate-Limit-Reset': reset}
+            if not allowed:
+                state.count('rate_limited')
+                self._send(429, {'message': 'Too Many Requests'}, dict(headers, **{'Retry-After': reset}))
+                return None
+            if config['inject_429'] and state.rng.random() < config['inject_429']:
+                state.count('injected_429')
+                self._send(429, {'message': 'Too Many Requests (injected)'},
+                           dict(headers, **{'X-Rate-Limit-Remaining': 0, 'Retry-After': reset}))
+                return None
+            return headers
+
+        def _route(self):
+            parsed = urlparse(self.path)
+            query = {k: v[-1] for k, v in parse_qs(parsed.query).items()}
+            parts = [p for p in parsed.path.split('/') if p]
+            return parts, query
+
+        # --- verbs ---
+        def do_GET(self):
+            parts, query = self._route()
+            if parts == ['_sim', 'stats']:
+                with state.stats_lock:
+                    stats = json.loads(json.dumps(state.stats))
+                stats.update(orders=len(state.dataset.orders), shipments=len(state.dataset.shipments),
+                             config=state.config)
+                return self._send(200, stats)
+            if parts == ['orders']:
+                headers = self._gate('GET /orders')
+                if headers is not None:
+                    self._send(200, list_orders(state.dataset, query), headers)
+                return
+            if len(parts) == 2 and parts[0] == 'orders' and parts[1].isdigit():
+                headers = self._gate('GET /orders/{id}')
+                if headers is not None:
+                    order = state.dataset.orders.get(int(parts[1]))
+                    if order is None:
+                        return self._send(404, {'Message': 'Order not found'}, headers)
+                    self._send(200, order, headers)
+                return
+            if parts == ['shipments']:
+                headers = self._gate('GET /shipments')
+                if headers is not None:
+                    self._send(200, list_shipments(state.dataset, query), headers)
+                return
+            self._send(404, {'Message': f'No route for GET {self.path}'})
+
+        def do_POST(self):
+            parts, _ = self._route()
+            if parts and parts[0] == '_sim':
+                return self._control(parts[1] if len(parts) > 1 else '')
+            try:
+                body = self._body()
+            except ValueError:
+                return self._send(400, {'Message': 'Invalid JSON'})
+            if parts == ['orders', 'createorders']:
+                headers = self._gate('POST /orders/createorders')
+                if headers is None:
+                    return
+                results = []
+                for payload in body or []:
+                    order = state.dataset.upsert(payload)
+                    results.append({'orderId': order['orderId'], 'orderNumber': order.get('orderNumber'),
+                                    'orderKey': order['orderKey'], 'success': True, 'errorMessage': None})
+                return self._send(200, {'hasErrors': False, 'results': results}, headers)
+            if parts == ['orders', 'createorder']:
+                headers = self._gate('POST /orders/createorder')
+                if headers is None:
+                    return
+                return self._send(200, state.dataset.upsert(body or {}), headers)
+            self._send(404, {'Message': f'No route for POST {self.path}'})
+
+        def do_DELETE(self):
+            parts, _ = self._route()
+            if len(parts) == 2 and parts[0] == 'orders' and parts[1].isdigit():
+                headers = self._gate('DELETE /orders/{id}')
+                if headers is None:
+                    return
+                with state.dataset.lock:
+                    removed = state.dataset.orders.pop(int(parts[1]), None)
+                if removed is None:
+                    return self._send(404, {'Message': 'Order not found'}, headers)
+                return self._send(200, {'success': True, 'message': 'The requested order has been deleted.'}, headers)
+            self._send(404, {'Message': f'No route for DELETE {self.path}'})
+
+        def _control(self, action: str):
+            body = self._body() or {}
+            if action == 'config':
+                for key in ('latency_ms', 'jitter_ms', 'rate_limit', 'inject_429'):
+                    if key in body:
+                        state.config[key] = type(state.config[key])(body[key])
+                return self._send(200, state.config)
+            if action == 'touch':
+                touched = state.dataset.touch(int(body.get('count', 10)), body.get('seed'))
+                return self._send(200, {'touched': len(touched), 'orderIds': touched})
+            if action == 'reset':
+                with state.dataset.lock:
+                    state.dataset.reset()
+                with state.stats_lock:
+                    state.stats.update(requests=0, rate_limited=0, injected_429=0, by_endpoint={})
+                state.limiter.windows.clear()
+                return self._send(200, {'orders': len(state.dataset.orders)})
+            self._send(404, {'Message': f'Unknown control action {action!r}'})
+
+    return Handler
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='Local ShipStation API simulator')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--orders', type=int, default=3000, help='Synthetic orders to generate')
+    parser.add_argument('--days', type=int, default=120, help='Spread orders over this many past days')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='Mean added latency per API call')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='+/- uniform jitter on the latency')
+    parser.add_argument('--rate-limit', type=int, default=40, help='Requests per 60s window per API key')
+    parser.add_argument('--inject-429', type=float, default=0.0, help='Probability of a spurious 429')
+    return parser
+
+
+def start_simulator(argv: list = None):
+    """Start the simulator on a background thread (for benchmarks); returns (server, state)"""
+    args = build_parser().parse_args(argv or [])
+    state = SimulatorState(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='shipstation-simulator', daemon=True).start()
+    return server, state
+
+
+def main():
+    args = build_parser().parse_args()
+    state = SimulatorState(args)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(state))
+    server.daemon_threads = True
+    print(f"ShipStation simulator on http://{args.host}:{args.port} - "
+          f"{len(state.dataset.orders)} orders, {len(state.dataset.shipments)} shipments "
+          f"(seed {args.seed}, {args.rate_limit}/min, latency {args.latency_ms}±{args.jitter_ms}ms, "
+          f"inject-429 {args.inject_429})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -27,7 +27,7 @@ from src.services.data_processing.shipment_processor import (
     aggregate_weekly_shipped_history # Re-added for weekly aggregation
 )
 # Import database utilities for SQLite operations
-from src.services.database.pg_utils import execute_query, transaction
+from src.services.database.pg_utils import execute_query, iter_query, transaction, upsert_many
 from src.services.shipstation.api_client import (
     get_shipstation_credentials,
     fetch_shipstation_shipments
@@ -249,31 +249,27 @@ def save_shipped_orders_to_db(orders_df):
         return 0
     
     logger.info(f"Saving {len(orders_df)} shipped orders to database...")
-    records_saved = 0
+    rows = []
     
-    with transaction() as conn:
-        for _, row in orders_df.iterrows():
-            ship_date = row.get('Ship Date')
-            order_number = row.get('OrderNumber')
-            shipstation_order_id = row.get('ShipStationOrderId', '')
-            
-            if not order_number or not ship_date:
-                logger.warning(f"Skipping row with missing order_number or ship_date: {row}")
-                continue
-            
-            shipstation_order_id = str(shipstation_order_id) if shipstation_order_id and str(shipstation_order_id) != 'nan' else None
-            
-            cursor = conn.cursor()
-
-            
-            cursor.execute("""
-                INSERT INTO shipped_orders (ship_date, order_number, shipstation_order_id)
-                VALUES (%s, %s, %s)
-                ON CONFLICT(order_number) DO UPDATE SET
-                    ship_date = excluded.ship_date,
-                    shipstation_order_id = excluded.shipstation_order_id
-            """, (str(ship_date), str(order_number), shipstation_order_id))
-            records_saved += 1
+    for _, row in orders_df.iterrows():
+        ship_date = row.get('Ship Date')
+        order_number = row.get('OrderNumber')
+        shipstation_order_id = row.get('ShipStationOrderId', '')
+        
+        if not order_number or not ship_date:
+            logger.warning(f"Skipping row with missing order_number or ship_date: {row}")
+            continue
+        
+        shipstation_order_id = str(shipstation_order_id) if shipstation_order_id and str(shipstation_order_id) != 'nan' else None
+        
+        rows.append({
+            'ship_date': str(ship_date),
+            'order_number': str(order_number),
+            'shipstation_order_id': shipstation_order_id
+        })
+    
+    # Single bulk UPSERT instead of one statement per row
+    records_saved = upsert_many('shipped_orders', rows, ['order_number'])
     
     logger.info(f"Successfully saved {records_saved} shipped orders to database")
     return records_saved
@@ -291,38 +287,35 @@ def save_shipped_items_to_db(items_df):
         return 0
     
     logger.info(f"Saving {len(items_df)} shipped items to database...")
-    records_saved = 0
-    
-    with transaction() as conn:
-        for _, row in items_df.iterrows():
-            ship_date = row.get('Ship Date')
-            sku_lot = row.get('SKU - Lot', '')
-            base_sku = row.get('Base SKU')
-            quantity = row.get('Quantity Shipped')
-            order_number = row.get('OrderNumber')
-            tracking_number = row.get('TrackingNumber', '')
-            
-            if not ship_date or not base_sku or not quantity:
-                logger.warning(f"Skipping row with missing required fields: {row}")
-                continue
-            
-            # Ensure sku_lot is never None/NaN - coalesce to empty string
-            sku_lot = str(sku_lot) if sku_lot and str(sku_lot) != 'nan' else ''
-            tracking_number = str(tracking_number) if tracking_number and str(tracking_number) != 'nan' else ''
-            
-            cursor = conn.cursor()
-
-            
-            cursor.execute("""
-                INSERT INTO shipped_items (
-                    ship_date, sku_lot, base_sku, quantity_shipped, order_number, tracking_number
-                ) VALUES (%s, %s, %s, %s, %s, %s)
-                ON CONFLICT(order_number, base_sku, sku_lot) DO UPDATE SET
-                    ship_date = excluded.ship_date,
-                    quantity_shipped = excluded.quantity_shipped,
-                    tracking_number = excluded.tracking_number
-            """, (str(ship_date), sku_lot, str(base_sku), int(quantity), str(order_number) if order_number else None, tracking_number))
-            records_saved += 1
+    rows = []
+    
+    for _, row in items_df.iterrows():
+        ship_date = row.get('Ship Date')
+        sku_lot = row.get('SKU - Lot', '')
+        base_sku = row.get('Base SKU')
+        quantity = row.get('Quantity Shipped')
+        order_number = row.get('OrderNumber')
+        tracking_number = row.get('TrackingNumber', '')
+        
+        if not ship_date or not base_sku or not quantity:
+            logger.warning(f"Skipping row with missing required fields: {row}")
+            continue
+        
+        # Ensure sku_lot is never None/NaN - coalesce to empty string
+        sku_lot = str(sku_lot) if sku_lot and str(sku_lot) != 'nan' else ''
+        tracking_number = str(tracking_number) if tracking_number and str(tracking_number) != 'nan' else ''
+        
+        rows.append({
+            'ship_date': str(ship_date),
+            'sku_lot': sku_lot,
+            'base_sku': str(base_sku),
+            'quantity_shipped': int(quantity),
+            'order_number': str(order_number) if order_number else None,
+            'tracking_number': tracking_number
+        })
+    
+    # Single bulk UPSERT instead of one statement per row
+    records_saved = upsert_many('shipped_items', rows, ['order_number', 'base_sku', 'sku_lot'])
     
     logger.info(f"Successfully saved {records_saved} shipped items to database")
     return records_saved
@@ -335,37 +328,35 @@ def save_weekly_history_to_db(history_df):
         return 0
     
     logger.info(f"Saving {len(history_df)} weeks of history to database...")
-    records_saved = 0
     
     # Get SKU columns (all columns except Start Date, Stop Date, Ship Date)
     date_columns = ['Start Date', 'Stop Date', 'Ship Date']
     sku_columns = [col for col in history_df.columns if col not in date_columns]
     
-    with transaction() as conn:
-        for _, row in history_df.iterrows():
-            start_date = row.get('Start Date')
-            end_date = row.get('Stop Date')
+    rows = []
+    for _, row in history_df.iterrows():
+        start_date = row.get('Start Date')
+        end_date = row.get('Stop Date')
+        
+        # One row for each SKU in this week
+        for sku in sku_columns:
+            quantity = row.get(sku, 0)
+            # Skip if quantity is not a number or is 0
+            try:
+                quantity = int(float(quantity)) if quantity and str(quantity).strip() else 0
+            except (ValueError, TypeError):
+                quantity = 0
             
-            # Insert/update a row for each SKU in this week
-            for sku in sku_columns:
-                quantity = row.get(sku, 0)
-                # Skip if quantity is not a number or is 0
-                try:
-                    quantity = int(float(quantity)) if quantity and str(quantity).strip() else 0
-                except (ValueError, TypeError):
-                    quantity = 0
-                
-                if quantity > 0:
-                    cursor = conn.cursor()
-
-                    cursor.execute("""
-                        INSERT INTO weekly_shipped_history (
-                            start_date, end_date, sku, quantity_shipped
-                        ) VALUES (%s, %s, %s, %s)
-                        ON CONFLICT(start_date, end_date, sku) DO UPDATE SET
-                            quantity_shipped = excluded.quantity_shipped
-                    """, (str(start_date), str(end_date), sku, quantity))
-                    records_saved += 1
+            if quantity > 0:
+                rows.append({
+                    'start_date': str(start_date),
+                    'end_date': str(end_date),
+                    'sku': sku,
+                    'quantity_shipped': quantity
+                })
+    
+    # Single bulk UPSERT instead of one statement per row
+    records_saved = upsert_many('weekly_shipped_history', rows, ['start_date', 'end_date', 'sku'])
     
     logger.info(f"Successfully saved {records_saved} weekly history records to database")
     return records_saved
@@ -538,13 +529,16 @@ def run_daily_shipment_pull(request=None):
         if not transactions_df.empty:
             transactions_df['Date'] = pd.to_datetime(transactions_df['Date']).dt.date
         
-        # Get all shipped items
-        shipped_items_rows = execute_query("""
-            SELECT ship_date as Date, base_sku as SKU, quantity_shipped as Quantity_Shipped
-            FROM shipped_items
-            ORDER BY ship_date
-        """)
-        shipped_items_df = pd.DataFrame(shipped_items_rows, columns=['Date', 'SKU', 'Quantity_Shipped']) if shipped_items_rows else pd.DataFrame(columns=['Date', 'SKU', 'Quantity_Shipped'])
+        # Get all shipped items, pre-aggregated per day/SKU and streamed (inventory only needs the sums)
+        shipped_items_df = pd.DataFrame.from_records(
+            iter_query("""
+                SELECT ship_date as Date, base_sku as SKU, SUM(quantity_shipped) as Quantity_Shipped
+                FROM shipped_items
+                GROUP BY ship_date, base_sku
+                ORDER BY ship_date
+            """),
+            columns=['Date', 'SKU', 'Quantity_Shipped']
+        )
         if not shipped_items_df.empty:
             shipped_items_df['Date'] = pd.to_datetime(shipped_items_df['Date']).dt.date
         
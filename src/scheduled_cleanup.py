@@ -17,6 +17,8 @@ if project_root not in sys.path:
 
 from src.cleanup_old_orders import cleanup_old_orders
 from src.services.database.pg_utils import is_workflow_enabled, update_workflow_last_run
+from src.services.database.event_bus import sleep_until_event, WORKFLOW_CONTROLS_CHANGED
+from src.services.database.run_lock import run_exclusive
 from utils.logging_config import setup_logging
 from utils.business_hours import is_business_hours, get_sleep_until_business_hours, format_business_hours_status
 
@@ -48,17 +50,21 @@ def main():
             # PRIORITY 2: Check if workflow enabled
             if not is_workflow_enabled('orders-cleanup'):
                 logger.info("Workflow 'orders-cleanup' is DISABLED - sleeping 60s")
-                time.sleep(60)
+                # Re-check as soon as a toggle is pushed
+                sleep_until_event(WORKFLOW_CONTROLS_CHANGED, 60)
                 continue
             
-            update_workflow_last_run('orders-cleanup')
-            logger.info("Running scheduled cleanup...")
-            result = cleanup_old_orders(days=60)
-            
-            if 'error' in result:
-                logger.error(f"Cleanup failed: {result['error']}")
-            else:
-                logger.info(f"Cleanup complete: {result['deleted']} orders deleted")
+            # Daily job - skip if any replica already ran it in the last ~day
+            with run_exclusive('orders-cleanup', min_interval_seconds=CLEANUP_INTERVAL * 0.9) as lease:
+                if lease is not None:
+                    update_workflow_last_run('orders-cleanup')
+                    logger.info("Running scheduled cleanup...")
+                    result = cleanup_old_orders(days=60)
+                    
+                    if 'error' in result:
+                        logger.error(f"Cleanup failed: {result['error']}")
+                    else:
+                        logger.info(f"Cleanup complete: {result['deleted']} orders deleted")
             
             logger.info(f"Next cleanup in {CLEANUP_INTERVAL} seconds (24 hours)")
             time.sleep(CLEANUP_INTERVAL)
@@ -17,9 +17,12 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.services.database.pg_utils import get_connection, is_workflow_enabled, update_workflow_last_run
-from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers
-from config.settings import settings
-from utils.api_utils import make_api_request
+from src.services.database.event_bus import sleep_until_event, WORKFLOW_CONTROLS_CHANGED
+from src.services.database.run_lock import run_exclusive
+from src.services.shipstation.api_client import get_shipstation_credentials, iter_orders
+from src.services.shipstation.paginator import PaginationError
+from src.services.shipstation.order_mirror import ensure_order_mirror, iter_mirror_orders
+from utils.rate_governor import set_api_workflow
 from utils.business_hours import is_business_hours, get_sleep_until_business_hours, format_business_hours_status
 
 logging.basicConfig(
@@ -39,10 +42,27 @@ def normalize_sku(sku):
         return sku.split(' - ')[0].strip()
     return sku
 
+def _slim_order(order):
+    """Keep only the fields the duplicate/collision checks read (full order JSON is ~10x larger)"""
+    ship_to = order.get('shipTo') or {}
+    return {
+        'orderNumber': order.get('orderNumber', ''),
+        'orderId': order.get('orderId'),
+        'orderStatus': order.get('orderStatus'),
+        'createDate': order.get('createDate'),
+        'shipTo': {'name': ship_to.get('name', 'N/A'), 'company': ship_to.get('company', '')},
+        'orderTotal': order.get('orderTotal', 0),
+        'items': [{'sku': item.get('sku', ''), 'quantity': item.get('quantity', 0)}
+                  for item in order.get('items') or []],
+    }
+
 def fetch_recent_shipstation_orders(api_key, api_secret, days_back=90):
     """
     Fetch recent orders from ShipStation for duplicate detection
     
+    Reads the local order mirror after an incremental refresh; falls back to a
+    full API scan only if the mirror cannot be brought up to date.
+    
     Args:
         api_key: ShipStation API key
         api_secret: ShipStation API secret
@@ -57,42 +77,32 @@ def fetch_recent_shipstation_orders(api_key, api_secret, days_back=90):
     
     logger.info(f"🔍 Scanning ShipStation orders from {start_date.date()} to {end_date.date()}")
     
+    if ensure_order_mirror(api_key, api_secret, allow_reconcile=True):
+        all_orders = [_slim_order(order) for order in iter_mirror_orders(
+            create_date_start=start_date.strftime('%Y-%m-%dT00:00:00')
+        )]
+        if all_orders:
+            logger.info(f"✅ Scan successful: Read {len(all_orders)} orders from the local ShipStation mirror")
+            return all_orders, True
+        logger.warning("⚠️  Order mirror returned 0 orders - falling back to a full API scan")
+    else:
+        logger.warning("⚠️  Order mirror unavailable - falling back to a full API scan")
+    
+    params = {
+        'createDateStart': start_date.strftime('%Y-%m-%dT00:00:00Z'),
+        'createDateEnd': end_date.strftime('%Y-%m-%dT23:59:59Z'),
+        'pageSize': 500
+    }
+    
+    # Stream the scan page by page and keep slim projections only
     all_orders = []
-    page = 1
     scan_successful = True
-    
-    while True:
-        params = {
-            'createDateStart': start_date.strftime('%Y-%m-%dT00:00:00Z'),
-            'createDateEnd': end_date.strftime('%Y-%m-%dT23:59:59Z'),
-            'page': page,
-            'pageSize': 500
-        }
-        
-        headers = get_shipstation_headers(api_key, api_secret)
-        response = make_api_request(
-            url=settings.SHIPSTATION_ORDERS_ENDPOINT,
-            method='GET',
-            headers=headers,
-            params=params,
-            timeout=30
-        )
-        
-        if response and response.status_code == 200:
-            data = response.json()
-            orders = data.get('orders', [])
-            all_orders.extend(orders)
-            
-            total_pages = data.get('pages', 1)
-            logger.debug(f"Fetched page {page}/{total_pages}, found {len(orders)} orders")
-            
-            if page >= total_pages:
-                break
-            page += 1
-        else:
-            logger.error(f"❌ Failed to fetch ShipStation orders: {response.status_code if response else 'No response'}")
-            scan_successful = False
-            break
+    try:
+        for order in iter_orders(api_key, api_secret, params, label='Duplicate scan'):
+            all_orders.append(_slim_order(order))
+    except PaginationError as e:
+        logger.error(f"❌ Failed to fetch ShipStation orders (page {e.page}): {e.status_code or 'No response'}")
+        scan_successful = False
     
     if scan_successful and all_orders:
         logger.info(f"✅ Scan successful: Fetched {len(all_orders)} total orders from ShipStation")
@@ -501,6 +511,7 @@ def scan_for_duplicates():
 def run_scheduled_scanner():
     """Main loop - runs every 15 minutes during business hours (Mon-Fri 6 AM - 6 PM CST)"""
     logger.info(f"🚀 Duplicate Scanner started (scanning every {SCAN_INTERVAL_SECONDS // 60} minutes)")
+    set_api_workflow('duplicate-scanner')
     logger.info(f"⏰ Business Hours: Monday-Friday 6 AM - 6 PM CST | Weekends OFF")
     
     while True:
@@ -517,18 +528,21 @@ def run_scheduled_scanner():
             # PRIORITY 2: Check workflow control
             if not is_workflow_enabled('duplicate-scanner'):
                 logger.debug("Workflow disabled - sleeping 60s")
-                time.sleep(60)
+                # Re-check as soon as a toggle is pushed
+                sleep_until_event(WORKFLOW_CONTROLS_CHANGED, 60)
                 continue
             
-            # Run scan
-            scan_succeeded = scan_for_duplicates()
-            
-            # SAFETY: Only update workflow timestamp on successful scans
-            # This allows monitoring systems to detect scan failures
-            if scan_succeeded:
-                update_workflow_last_run('duplicate-scanner')
-            else:
-                logger.error("❌ Scan failed - workflow timestamp NOT updated (monitoring will detect failure)")
+            # Run scan (skipped if another replica scanned within this interval)
+            with run_exclusive('duplicate-scanner', min_interval_seconds=SCAN_INTERVAL_SECONDS * 0.9) as lease:
+                if lease is not None:
+                    scan_succeeded = scan_for_duplicates()
+                    
+                    # SAFETY: Only update workflow timestamp on successful scans
+                    # This allows monitoring systems to detect scan failures
+                    if scan_succeeded:
+                        update_workflow_last_run('duplicate-scanner')
+                    else:
+                        logger.error("❌ Scan failed - workflow timestamp NOT updated (monitoring will detect failure)")
             
             # Sleep until next scan
             logger.info(f"😴 Next scan in {SCAN_INTERVAL_SECONDS // 60} minutes")
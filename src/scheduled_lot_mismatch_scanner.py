@@ -21,12 +21,13 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from src.services.database.pg_utils import transaction_with_retry, is_workflow_enabled, update_workflow_last_run
-from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers
-from utils.api_utils import make_api_request
+from src.services.database.run_lock import run_exclusive
+from src.services.shipstation.api_client import get_shipstation_credentials, iter_orders
+from src.services.shipstation.order_mirror import ensure_order_mirror, iter_mirror_orders
+from utils.rate_governor import set_api_workflow
+from config.settings import SHIPSTATION_ORDERS_ENDPOINT
 from utils.business_hours import is_business_hours, get_sleep_until_business_hours, format_business_hours_status
 
-SHIPSTATION_ORDERS_ENDPOINT = 'https://ssapi.shipstation.com/orders'
-
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -83,47 +84,18 @@ def scan_for_lot_mismatches(api_key: str, api_secret: str):
             # We only care about orders that haven't shipped yet
             lookback_date = (datetime.datetime.now() - datetime.timedelta(days=30)).strftime('%Y-%m-%dT%H:%M:%SZ')
             
-            params = {
-                'orderStatus': 'awaiting_shipment',
-                'modifyDateStart': lookback_date,
-                'pageSize': 500
-            }
-            
-            logger.info(f"🔄 Fetching orders modified since {lookback_date}")
-            
-            all_orders = []
-            page = 1
-            
-            # Get authentication headers
-            headers = get_shipstation_headers(api_key, api_secret)
-            
-            while True:
-                params['page'] = page
-                response = make_api_request(
-                    url=SHIPSTATION_ORDERS_ENDPOINT,
-                    method='GET',
-                    headers=headers,
-                    params=params,
-                    timeout=30
-                )
-                
-                # Parse JSON response
-                data = response.json()
-                
-                if not data or 'orders' not in data:
-                    break
-                
-                orders = data['orders']
-                all_orders.extend(orders)
-                
-                total_pages = data.get('pages', 1)
-                logger.info(f"📄 Page {page}/{total_pages}: {len(orders)} orders")
-                
-                if page >= total_pages:
-                    break
-                
-                page += 1
-                time.sleep(0.5)  # Rate limiting
+            if ensure_order_mirror(api_key, api_secret, max_age_seconds=60):
+                # Local mirror (refreshed incrementally above) - no 30-day re-download
+                all_orders = list(iter_mirror_orders(order_status='awaiting_shipment', modify_date_start=lookback_date))
+            else:
+                logger.warning("⚠️ Order mirror unavailable - fetching from the ShipStation API")
+                params = {
+                    'orderStatus': 'awaiting_shipment',
+                    'modifyDateStart': lookback_date,
+                    'pageSize': 500
+                }
+                logger.info(f"🔄 Fetching orders modified since {lookback_date}")
+                all_orders = list(iter_orders(api_key, api_secret, params, SHIPSTATION_ORDERS_ENDPOINT, label='Lot scan'))
             
             logger.info(f"✅ Retrieved {len(all_orders)} total orders from ShipStation")
             
@@ -239,6 +211,7 @@ def scan_for_lot_mismatches(api_key: str, api_secret: str):
 def main():
     """Main loop for lot mismatch scanner - runs during business hours (Mon-Fri 6 AM - 6 PM CST)"""
     logger.info(f"🚀 Starting Lot Mismatch Scanner (every 900s)")
+    set_api_workflow(WORKFLOW_NAME)
     logger.info(f"⏰ Business Hours: Monday-Friday 6 AM - 6 PM CST | Weekends OFF")
     
     # Get ShipStation credentials
@@ -262,7 +235,9 @@ def main():
             if not is_workflow_enabled(WORKFLOW_NAME):
                 logger.info(f"⏸️ Workflow '{WORKFLOW_NAME}' is DISABLED - skipping execution")
             else:
-                scan_for_lot_mismatches(api_key, api_secret)
+                with run_exclusive(WORKFLOW_NAME, min_interval_seconds=900 * 0.9) as lease:
+                    if lease is not None:
+                        scan_for_lot_mismatches(api_key, api_secret)
             
             logger.info("😴 Next scan in 900 seconds (15 minutes)")
             time.sleep(900)
@@ -14,13 +14,16 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from src.services.database.pg_utils import get_connection, transaction_with_retry, is_workflow_enabled, update_workflow_last_run
+from src.services.database.pg_utils import get_connection, transaction_with_retry, is_workflow_enabled, update_workflow_last_run, prepared_statement
+from src.services.database.event_bus import publish, sleep_until_event, ORDERS_IMPORTED, ORDERS_UPLOADED, WORKFLOW_CONTROLS_CHANGED
+from src.services.database.run_lock import run_exclusive
 from src.services.shipstation.api_client import (
     get_shipstation_credentials,
     send_all_orders_to_shipstation,
     fetch_shipstation_orders_by_order_numbers
 )
 from config.settings import settings
+from utils.rate_governor import set_api_workflow
 from utils.business_hours import is_business_hours, get_sleep_until_business_hours, format_business_hours_status
 
 logging.basicConfig(
@@ -31,6 +34,18 @@ logger = logging.getLogger(__name__)
 
 UPLOAD_INTERVAL_SECONDS = 300  # 5 minutes (used when fast polling disabled)
 
+# Per-order statements in the upload loop (plans reused across orders and cycles)
+_ORDER_ITEMS = prepared_statement('upload_order_items', """
+    SELECT sku, quantity, unit_price_cents
+    FROM order_items_inbox
+    WHERE order_inbox_id = %s
+""")
+_INSERT_LINE_ITEM = prepared_statement('upload_insert_line_item', """
+    INSERT INTO shipstation_order_line_items (order_inbox_id, sku, shipstation_order_id)
+    VALUES (%s, %s, %s)
+    ON CONFLICT (order_inbox_id, sku) DO NOTHING
+""")
+
 # ============================================
 # OPTIMIZED POLLING - Phase 1 Implementation
 # ============================================
@@ -283,11 +298,7 @@ def upload_pending_orders():
              bill_name, bill_company, bill_street1, bill_city, bill_state, bill_postal_code, bill_country, bill_phone) = order_row
             
             # Get order items
-            cursor.execute("""
-                SELECT sku, quantity, unit_price_cents
-                FROM order_items_inbox
-                WHERE order_inbox_id = %s
-            """, (order_id,))
+            _ORDER_ITEMS.execute(cursor, (order_id,))
             items = cursor.fetchall()
             
             # CONSOLIDATE items by FULL SKU (with lot) to preserve lot-level granularity
@@ -523,11 +534,7 @@ def upload_pending_orders():
                     # Track all SKUs for this order
                     all_skus = order_sku_info['sku'].split('|')
                     for sku in all_skus:
-                        cursor.execute("""
-                            INSERT INTO shipstation_order_line_items (order_inbox_id, sku, shipstation_order_id)
-                            VALUES (%s, %s, %s)
-                            ON CONFLICT (order_inbox_id, sku) DO NOTHING
-                        """, (order_sku_info['order_inbox_id'], sku, shipstation_id))
+                        _INSERT_LINE_ITEM.execute(cursor, (order_sku_info['order_inbox_id'], sku, shipstation_id))
                     
                     # Update from 'processing' to 'awaiting_shipment' (clear run_id)
                     cursor.execute("""
@@ -583,11 +590,7 @@ def upload_pending_orders():
                     # Track all SKUs for this order
                     all_skus = order_sku_info['sku'].split('|')
                     for sku in all_skus:
-                        cursor.execute("""
-                            INSERT INTO shipstation_order_line_items (order_inbox_id, sku, shipstation_order_id)
-                            VALUES (%s, %s, %s)
-                            ON CONFLICT (order_inbox_id, sku) DO NOTHING
-                        """, (order_sku_info['order_inbox_id'], sku, shipstation_id))
+                        _INSERT_LINE_ITEM.execute(cursor, (order_sku_info['order_inbox_id'], sku, shipstation_id))
                     
                     cursor.execute("""
                         UPDATE orders_inbox
@@ -720,6 +723,7 @@ def run_scheduled_upload():
     interval = int(get_feature_flag('fast_polling_interval', '300'))
     
     logger.info(f"🚀 Upload workflow started in PRODUCTION (fast_polling={enabled}, interval={interval}s)")
+    set_api_workflow('shipstation-upload')
     logger.info(f"⏰ Business Hours: Monday-Friday 6 AM - 6 PM CST | Weekends OFF")
     
     last_count = 0
@@ -739,7 +743,8 @@ def run_scheduled_upload():
             # PRIORITY 2: Check workflow control
             if not is_workflow_enabled('shipstation-upload'):
                 logger.debug("Workflow disabled - sleeping 60s")
-                time.sleep(60)
+                # Re-check as soon as a toggle is pushed
+                sleep_until_event(WORKFLOW_CONTROLS_CHANGED, 60)
                 continue
             
             # Preflight check (if fast polling enabled)
@@ -752,7 +757,8 @@ def run_scheduled_upload():
                         logger.info("✅ Upload queue empty")
                         update_polling_state(0)
                     last_count = 0
-                    time.sleep(interval)
+                    # Wake immediately when the XML import publishes new orders
+                    sleep_until_event(ORDERS_IMPORTED, interval)
                     continue
                 
                 # Log only if count changed
@@ -763,15 +769,23 @@ def run_scheduled_upload():
                 last_count = count
             
             # Run existing upload logic (all safeguards preserved)
-            uploaded_count = upload_pending_orders()
+            # Advisory lease: a second uploader replica must never upload the same batch
+            with run_exclusive('shipstation-upload') as lease:
+                if lease is None:
+                    sleep_until_event(ORDERS_IMPORTED, interval)
+                    continue
+                uploaded_count = upload_pending_orders()
             
             # Update timestamp on every successful run (not just when uploading)
             # This prevents "stale" status in health check when queue is empty
             update_workflow_last_run('shipstation-upload')
             
+            if uploaded_count:
+                publish(ORDERS_UPLOADED, str(uploaded_count))
+            
             error_count = 0
             
-            time.sleep(interval if enabled else UPLOAD_INTERVAL_SECONDS)
+            sleep_until_event(ORDERS_IMPORTED, interval if enabled else UPLOAD_INTERVAL_SECONDS)
             
         except KeyboardInterrupt:
             logger.info("Scheduled upload stopped by user")
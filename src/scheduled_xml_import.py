@@ -16,6 +16,8 @@ sys.path.insert(0, str(project_root))
 
 from src.services.google_drive.api_client import list_xml_files_from_folder, fetch_xml_from_drive_by_file_id
 from src.services.database import get_connection, transaction_with_retry, is_workflow_enabled, update_workflow_last_run
+from src.services.database.event_bus import publish, sleep_until_event, ORDERS_IMPORTED, WORKFLOW_CONTROLS_CHANGED
+from src.services.database.run_lock import run_exclusive
 from utils.business_hours import is_business_hours, get_sleep_until_business_hours, format_business_hours_status
 import defusedxml.ElementTree as ET
 
@@ -416,7 +418,8 @@ def run_scheduled_import():
             # PRIORITY 2: Check if workflow is enabled
             if not is_workflow_enabled('xml-import'):
                 logger.info("⏸️ Workflow 'xml-import' is DISABLED - sleeping 60s")
-                time.sleep(60)
+                # Re-check as soon as a toggle is pushed
+                sleep_until_event(WORKFLOW_CONTROLS_CHANGED, 60)
                 continue
             
             # PREFLIGHT CHECK: Do we have new files?
@@ -427,25 +430,33 @@ def run_scheduled_import():
                 time.sleep(interval)
                 continue
             
-            # Changes detected - process files
-            logger.info(f"📥 Processing XML files from Drive (signature changed)")
+            # Only one replica imports at a time
+            with run_exclusive('xml-import') as lease:
+                if lease is None:
+                    time.sleep(interval)
+                    continue
+                
+                # Changes detected - process files
+                logger.info(f"📥 Processing XML files from Drive (signature changed)")
             
-            imported = import_orders_from_drive()
+                imported = import_orders_from_drive()
             
-            if imported > 0:
-                logger.info(f"✅ Import complete: {imported} orders imported")
-                # ONLY update timestamp when we actually imported something
-                update_workflow_last_run('xml-import')
-            else:
-                logger.info(f"ℹ️ Import complete: No new orders")
+                if imported > 0:
+                    logger.info(f"✅ Import complete: {imported} orders imported")
+                    # ONLY update timestamp when we actually imported something
+                    update_workflow_last_run('xml-import')
+                    # Wake the upload workflow instead of waiting for its next poll
+                    publish(ORDERS_IMPORTED, str(imported))
+                else:
+                    logger.info(f"ℹ️ Import complete: No new orders")
             
-            # Update polling state on success with file signature (for change detection)
-            update_xml_polling_state(file_signature)
+                # Update polling state on success with file signature (for change detection)
+                update_xml_polling_state(file_signature)
             
-            # Cleanup old orders
-            deleted = cleanup_old_orders()
-            if deleted > 0:
-                logger.info(f"🗑️ Cleanup complete: {deleted} old orders deleted")
+                # Cleanup old orders
+                deleted = cleanup_old_orders()
+                if deleted > 0:
+                    logger.info(f"🗑️ Cleanup complete: {deleted} old orders deleted")
             
             # Reset error count on success
             error_count = 0
@@ -5,9 +5,18 @@ from .db_adapter import (
     transaction,
     transaction_with_retry,
     execute_query,
+    iter_query,
     upsert,
+    upsert_many,
+    prepared_statement,
+    execute_prepared,
     is_workflow_enabled,
+    publish_workflow_control_change,
     update_workflow_last_run,
+    get_pool_stats,
+    close_pool,
+    get_query_stats,
+    reset_query_stats,
     DB_TYPE,
     USE_POSTGRES
 )
@@ -17,9 +26,18 @@ __all__ = [
     'transaction',
     'transaction_with_retry',
     'execute_query',
+    'iter_query',
     'upsert',
+    'upsert_many',
+    'prepared_statement',
+    'execute_prepared',
     'is_workflow_enabled',
+    'publish_workflow_control_change',
     'update_workflow_last_run',
+    'get_pool_stats',
+    'close_pool',
+    'get_query_stats',
+    'reset_query_stats',
     'DB_TYPE',
     'USE_POSTGRES'
 ]
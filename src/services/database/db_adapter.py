@@ -20,9 +20,18 @@ from .pg_utils import (
     transaction,
     transaction_with_retry,
     execute_query,
+    iter_query,
     upsert,
+    upsert_many,
+    prepared_statement,
+    execute_prepared,
     is_workflow_enabled,
-    update_workflow_last_run
+    publish_workflow_control_change,
+    update_workflow_last_run,
+    get_pool_stats,
+    close_pool,
+    get_query_stats,
+    reset_query_stats
 )
 
 DB_TYPE = "PostgreSQL"
@@ -34,9 +43,18 @@ __all__ = [
     'transaction',
     'transaction_with_retry',
     'execute_query',
+    'iter_query',
     'upsert',
+    'upsert_many',
+    'prepared_statement',
+    'execute_prepared',
     'is_workflow_enabled',
+    'publish_workflow_control_change',
     'update_workflow_last_run',
+    'get_pool_stats',
+    'close_pool',
+    'get_query_stats',
+    'reset_query_stats',
     'DB_TYPE',
     'USE_POSTGRES'
 ]
@@ -0,0 +1,311 @@
+"""
+PostgreSQL LISTEN/NOTIFY event bus
+
+Lets the background workflows wake each other up instead of waiting out a fixed
+polling interval. Publishers call publish(); subscribers block in
+sleep_until_event(), which returns early when a notification arrives and falls
+back to a plain timed sleep when the listener is unavailable, so timed polling
+always remains the safety net.
+
+Channels:
+- orders_imported: new orders landed in orders_inbox (XML import, manual imports, retries)
+- orders_uploaded: orders were created in ShipStation by the upload workflow
+- workflow_controls_changed: a workflow was toggled (payload: JSON {"workflow", "enabled"})
+- shipstation_orders_changed: the sync saw these ShipStation orders change (payload: comma-separated orderId@modifyDate)
+
+Each process owns one dedicated (non-pooled, autocommit) LISTEN connection served
+by a daemon thread. Notifications are counted per channel; a wait returns
+immediately if the channel fired since this process last consumed it, so events
+that arrive while a workflow is busy are not lost.
+
+Set DB_EVENT_BUS=0 to disable LISTEN/NOTIFY entirely (pure timed polling).
+"""
+
+import os
+import select
+import time
+import logging
+import threading
+import psycopg2
+import psycopg2.extensions
+from typing import Callable, Iterable, Optional, Tuple, Union
+
+from .pg_utils import DATABASE_URL, get_connection
+
+logger = logging.getLogger(__name__)
+
+EVENT_BUS_ENABLED = os.getenv('DB_EVENT_BUS', '1') == '1'
+LISTENER_RECONNECT_SECONDS = int(os.getenv('DB_EVENT_BUS_RECONNECT', '30'))
+
+# Channel names
+ORDERS_IMPORTED = 'orders_imported'
+ORDERS_UPLOADED = 'orders_uploaded'
+WORKFLOW_CONTROLS_CHANGED = 'workflow_controls_changed'
+SHIPSTATION_ORDERS_CHANGED = 'shipstation_orders_changed'
+
+
+def publish(channel: str, payload: str = '', conn=None) -> bool:
+    """
+    Publish a notification on a channel
+
+    When conn is given the NOTIFY joins the caller's transaction and is only
+    delivered if that transaction commits. Otherwise a pooled connection is
+    used and committed immediately.
+
+    Args:
+        channel: Channel name (e.g. ORDERS_IMPORTED)
+        payload: Optional short text payload (PostgreSQL limit ~8000 bytes)
+        conn: Optional open connection to publish within
+
+    Returns:
+        bool: True if the notification was issued. Failures are logged and
+              swallowed - subscribers still poll on their timers.
+    """
+    if not EVENT_BUS_ENABLED:
+        return False
+
+    own_conn = conn is None
+    try:
+        if own_conn:
+            conn = get_connection()
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_notify(%s, %s)", (channel, str(payload)))
+        if own_conn:
+            conn.commit()
+        logger.debug(f"📣 NOTIFY {channel} ({payload})")
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to publish '{channel}' event: {e}")
+        return False
+    finally:
+        if own_conn and conn is not None:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+class EventListener:
+    """
+    Background LISTEN connection for one process
+
+    Tracks a sequence number per channel and wakes waiters through a shared
+    condition. Callbacks registered with subscribe() run on the listener thread
+    and must be quick and non-blocking.
+    """
+
+    def __init__(self, dsn: str):
+        self._dsn = dsn
+        self._cond = threading.Condition()
+        self._channels = set()
+        self._listening = set()
+        self._seq = {}
+        self._consumed = {}
+        self._last_payload = {}
+        self._callbacks = {}
+        self._conn = None
+        self._thread = None
+        self._stopped = False
+        self._wake_r, self._wake_w = os.pipe()
+        self.connected = False
+        self.connection_generation = 0
+        self.notifications_received = 0
+
+    def listen(self, channels: Iterable[str]):
+        """Ensure the listener is running and subscribed to the given channels"""
+        with self._cond:
+            new = [c for c in channels if c not in self._channels]
+            for channel in new:
+                self._channels.add(channel)
+                self._seq.setdefault(channel, 0)
+                self._consumed.setdefault(channel, 0)
+            if self._thread is None or not self._thread.is_alive():
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name='pg-event-listener', daemon=True)
+                self._thread.start()
+            elif new:
+                self._wakeup()
+
+    def subscribe(self, channel: str, callback: Callable[[str, str], None]):
+        """Invoke callback(channel, payload) on the listener thread for each notification"""
+        with self._cond:
+            self._callbacks.setdefault(channel, []).append(callback)
+        self.listen([channel])
+
+    def is_listening(self, channel: str) -> bool:
+        """True while notifications for channel are actually being received"""
+        return self.connected and channel in self._listening
+
+    def wait(self, channels: Iterable[str], timeout: float) -> Optional[Tuple[str, str]]:
+        """
+        Block until one of the channels fires or timeout elapses
+
+        Returns:
+            (channel, payload) of the event that ended the wait, or None on timeout
+        """
+        channels = list(channels)
+        self.listen(channels)
+        deadline = time.monotonic() + max(timeout, 0)
+        with self._cond:
+            while True:
+                for channel in channels:
+                    if self._seq[channel] > self._consumed[channel]:
+                        self._consumed[channel] = self._seq[channel]
+                        return channel, self._last_payload.get(channel, '')
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def stop(self):
+        """Stop the listener thread and close its connection"""
+        self._stopped = True
+        self._wakeup()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _wakeup(self):
+        try:
+            os.write(self._wake_w, b'x')
+        except OSError:
+            pass
+
+    def _connect(self):
+        conn = psycopg2.connect(self._dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        self._conn = conn
+        self._listening = set()
+        self.connection_generation += 1
+        logger.info("👂 Event listener connected")
+
+    def _sync_channels(self):
+        with self._cond:
+            pending = self._channels - self._listening
+        if pending:
+            cursor = self._conn.cursor()
+            for channel in pending:
+                cursor.execute(f'LISTEN "{channel}"')
+                self._listening.add(channel)
+            cursor.close()
+        self.connected = True
+
+    def _dispatch(self, notify):
+        self.notifications_received += 1
+        # Callbacks run before waiters wake so state they maintain (e.g. the
+        # workflow_controls cache) is already current when a loop re-checks it
+        with self._cond:
+            callbacks = list(self._callbacks.get(notify.channel, ()))
+        for callback in callbacks:
+            try:
+                callback(notify.channel, notify.payload)
+            except Exception as e:
+                logger.error(f"❌ Event callback failed for '{notify.channel}': {e}")
+        with self._cond:
+            self._seq[notify.channel] = self._seq.get(notify.channel, 0) + 1
+            self._last_payload[notify.channel] = notify.payload
+            self._cond.notify_all()
+
+    def _close_conn(self):
+        self.connected = False
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _run(self):
+        while not self._stopped:
+            try:
+                if self._conn is None or self._conn.closed:
+                    self._connect()
+                self._sync_channels()
+                readable, _, _ = select.select([self._conn, self._wake_r], [], [], 60)
+                if self._wake_r in readable:
+                    os.read(self._wake_r, 1024)
+                if self._conn in readable:
+                    self._conn.poll()
+                    while self._conn.notifies:
+                        self._dispatch(self._conn.notifies.pop(0))
+            except Exception as e:
+                logger.warning(f"⚠️ Event listener error, falling back to timed polling: {e}")
+                self._close_conn()
+                if not self._stopped:
+                    time.sleep(LISTENER_RECONNECT_SECONDS)
+        self._close_conn()
+
+
+_listener = None
+_listener_pid = None
+_listener_lock = threading.Lock()
+
+
+def get_listener() -> Optional[EventListener]:
+    """Return this process's listener, creating it lazily (None when disabled)"""
+    global _listener, _listener_pid
+    if not EVENT_BUS_ENABLED or not DATABASE_URL:
+        return None
+    with _listener_lock:
+        # A forked child must not share the parent's LISTEN socket
+        if _listener is None or _listener_pid != os.getpid():
+            _listener = EventListener(DATABASE_URL)
+            _listener_pid = os.getpid()
+        return _listener
+
+
+def subscribe(channel: str, callback: Callable[[str, str], None]) -> bool:
+    """
+    Register a callback for a channel on this process's listener
+
+    Returns:
+        bool: False when the event bus is disabled or unavailable
+    """
+    listener = get_listener()
+    if listener is None:
+        return False
+    try:
+        listener.subscribe(channel, callback)
+        return True
+    except Exception as e:
+        logger.warning(f"⚠️ Could not subscribe to '{channel}': {e}")
+        return False
+
+
+def sleep_until_event(channels: Union[str, Iterable[str]], timeout: float,
+                      min_sleep: float = 0) -> Optional[Tuple[str, str]]:
+    """
+    Sleep up to timeout seconds, waking early when a channel is notified
+
+    Drop-in replacement for time.sleep(timeout) in workflow loops. If the event
+    bus is disabled or the listener cannot start, this simply sleeps.
+
+    Args:
+        channels: Channel name or list of channel names
+        timeout: Maximum seconds to sleep (the polling fallback interval)
+        min_sleep: Seconds to always sleep first, to coalesce bursts of events
+
+    Returns:
+        (channel, payload) if woken by an event, None on timeout
+    """
+    if isinstance(channels, str):
+        channels = [channels]
+
+    if min_sleep > 0:
+        time.sleep(min(min_sleep, timeout))
+        timeout -= min_sleep
+
+    listener = get_listener()
+    if listener is None:
+        time.sleep(max(timeout, 0))
+        return None
+
+    try:
+        event = listener.wait(channels, timeout)
+    except Exception as e:
+        logger.warning(f"⚠️ Event wait failed, sleeping instead: {e}")
+        time.sleep(max(timeout, 0))
+        return None
+
+    if event:
+        logger.info(f"⚡ Woken by '{event[0]}' event")
+    return event
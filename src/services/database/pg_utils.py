@@ -7,14 +7,35 @@ Uses psycopg2 for PostgreSQL connections.
 Environment-aware database connection:
 - Production (REPLIT_DEPLOYMENT=1): Uses PRODUCTION_DATABASE_URL or DATABASE_URL
 - Development (workspace): Uses DATABASE_URL
+
+Connections are served from a per-process pool (see ConnectionPool). Callers keep
+using get_connection()/conn.close(); close() returns the connection to the pool.
+Pool sizing: DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_IDLE_TIMEOUT, DB_POOL_CHECKOUT_TIMEOUT
+
+Hot statements can be registered with prepared_statement() so pooled
+connections PREPARE them once and EXECUTE the cached plan afterwards.
+
+Cursors from pooled connections are instrumented (see QueryStats): per-statement
+latency, rows, caller and connection wait are kept in memory, and statements slower
+than DB_SLOW_QUERY_MS are written to logs/slow_queries.log.
 """
 
 import os
 import psycopg2
 import psycopg2.extras
+import psycopg2.extensions
+import psycopg2.pool
+import psycopg2.errors
 import time
 import random
 import logging
+import threading
+import weakref
+import re
+import sys
+import hashlib
+import json
+from collections import deque
 from contextlib import contextmanager
 from typing import Optional, List, Tuple, Any
 
@@ -29,15 +50,620 @@ logger = logging.getLogger(__name__)
 
 _workflow_cache = {}
 _cache_ttl = {}
+_cache_generation = {}
+_cache_sequence = {}  # workflow_name (or '*' for all) -> pushes received; guards in-flight reads
+_workflow_listener = None
+_workflow_listener_pid = None
+
+# While the workflow_controls_changed listener is live, cached entries are kept
+# fresh by NOTIFY and only re-read after this safety-net interval
+WORKFLOW_CACHE_PUSH_TTL_SECONDS = int(os.getenv('WORKFLOW_CACHE_PUSH_TTL', '3600'))
+
+# Connection pool sizing (per process)
+POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', '1'))
+POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', '10'))
+POOL_IDLE_TIMEOUT_SECONDS = int(os.getenv('DB_POOL_IDLE_TIMEOUT', '300'))
+POOL_CHECKOUT_TIMEOUT_SECONDS = int(os.getenv('DB_POOL_CHECKOUT_TIMEOUT', '30'))
+POOL_HEALTH_CHECK_AFTER_SECONDS = int(os.getenv('DB_POOL_HEALTH_CHECK_AFTER', '30'))
+
+
+# Query instrumentation (per process)
+QUERY_INSTRUMENTATION_ENABLED = os.getenv('DB_QUERY_INSTRUMENTATION', '1') == '1'
+QUERY_LOG_SIZE = int(os.getenv('DB_QUERY_LOG_SIZE', '2000'))
+SLOW_QUERY_MS = float(os.getenv('DB_SLOW_QUERY_MS', '500'))
+SLOW_QUERY_LOG_FILE = os.getenv(
+    'DB_SLOW_QUERY_LOG',
+    os.path.join(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..')), 'logs', 'slow_queries.log')
+)
+
+_slow_query_logger = logging.getLogger('pg_utils.slow_queries')
+
+_FINGERPRINT_RULES = [
+    (re.compile(r"'(?:[^']|'')*'"), '?'),                  # string literals
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),                # numeric literals
+    (re.compile(r'%s|%\(\w+\)s'), '?'),                     # driver placeholders
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)(?:\s*,\s*\(\s*\?(?:\s*,\s*\?)*\s*\))*'), '(...)'),  # IN lists / VALUES rows
+    (re.compile(r'\s+'), ' '),
+]
+
+
+def _fingerprint(sql) -> str:
+    """Normalize a statement so calls differing only by literals group together"""
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', errors='replace')
+    elif not isinstance(sql, str):
+        sql = str(sql)
+    for pattern, replacement in _FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql.strip()[:500]
+
+
+def _calling_function() -> str:
+    """Find the first stack frame outside the database layer and psycopg2"""
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename != __file__ and 'psycopg2' not in filename and 'contextlib' not in filename:
+            module = os.path.splitext(os.path.basename(filename))[0]
+            return f"{module}.{frame.f_code.co_name}:{frame.f_lineno}"
+        frame = frame.f_back
+    return 'unknown'
+
+
+class QueryStats:
+    """
+    In-memory query statistics for this process
+    
+    - Ring buffer of the most recent statements (QUERY_LOG_SIZE entries)
+    - Aggregates per statement fingerprint: calls, total/max latency, rows, callers
+    """
+    
+    def __init__(self, maxlen: int = QUERY_LOG_SIZE):
+        self._lock = threading.Lock()
+        self._recent = deque(maxlen=maxlen)
+        self._by_fingerprint = {}
+        self.started_at = time.time()
+    
+    def record(self, sql, elapsed_ms: float, rows: int, caller: str, conn_wait_ms: float):
+        fingerprint = _fingerprint(sql)
+        entry = {
+            'at': time.time(),
+            'fingerprint': fingerprint,
+            'caller': caller,
+            'elapsed_ms': round(elapsed_ms, 2),
+            'rows': rows,
+            'conn_wait_ms': round(conn_wait_ms, 2)
+        }
+        with self._lock:
+            self._recent.append(entry)
+            agg = self._by_fingerprint.get(fingerprint)
+            if agg is None:
+                agg = self._by_fingerprint[fingerprint] = {
+                    'id': hashlib.md5(fingerprint.encode()).hexdigest()[:12],
+                    'fingerprint': fingerprint,
+                    'calls': 0,
+                    'total_ms': 0.0,
+                    'max_ms': 0.0,
+                    'rows': 0,
+                    'conn_wait_ms': 0.0,
+                    'callers': {}
+                }
+            agg['calls'] += 1
+            agg['total_ms'] += elapsed_ms
+            agg['max_ms'] = max(agg['max_ms'], elapsed_ms)
+            agg['rows'] += max(rows, 0)
+            agg['conn_wait_ms'] += conn_wait_ms
+            agg['callers'][caller] = agg['callers'].get(caller, 0) + 1
+        
+        if elapsed_ms >= SLOW_QUERY_MS:
+            _log_slow_query(entry)
+    
+    def top(self, limit: int = 20, order_by: str = 'total_ms') -> list:
+        with self._lock:
+            rows = [dict(agg, callers=dict(agg['callers'])) for agg in self._by_fingerprint.values()]
+        for row in rows:
+            row['avg_ms'] = round(row['total_ms'] / row['calls'], 2) if row['calls'] else 0.0
+            row['total_ms'] = round(row['total_ms'], 2)
+            row['max_ms'] = round(row['max_ms'], 2)
+            row['conn_wait_ms'] = round(row['conn_wait_ms'], 2)
+        rows.sort(key=lambda r: r.get(order_by, 0), reverse=True)
+        return rows[:limit]
+    
+    def recent(self, limit: int = 100) -> list:
+        with self._lock:
+            return list(self._recent)[-limit:]
+    
+    def reset(self):
+        with self._lock:
+            self._recent.clear()
+            self._by_fingerprint.clear()
+            self.started_at = time.time()
+
+
+_query_stats = QueryStats()
+
+
+def _log_slow_query(entry: dict):
+    """Write a statement over SLOW_QUERY_MS to the slow-query log"""
+    if not _slow_query_logger.handlers:
+        try:
+            os.makedirs(os.path.dirname(SLOW_QUERY_LOG_FILE), exist_ok=True)
+            handler = logging.FileHandler(SLOW_QUERY_LOG_FILE)
+            handler.setFormatter(logging.Formatter('%(asctime)s - pid %(process)d - %(message)s'))
+            _slow_query_logger.addHandler(handler)
+            _slow_query_logger.propagate = False
+        except OSError as e:
+            logger.warning(f"Could not open slow query log {SLOW_QUERY_LOG_FILE}: {e}")
+    _slow_query_logger.warning(
+        f"SLOW QUERY {entry['elapsed_ms']:.1f}ms rows={entry['rows']} "
+        f"conn_wait={entry['conn_wait_ms']:.1f}ms caller={entry['caller']} :: {entry['fingerprint']}"
+    )
+
+
+def get_query_stats(limit: int = 20, order_by: str = 'total_ms') -> dict:
+    """
+    Get the top-N statements for this process
+    
+    Args:
+        limit: Number of statements to return
+        order_by: 'total_ms', 'calls', 'avg_ms', 'max_ms', 'rows' or 'conn_wait_ms'
+    
+    Returns:
+        dict: pid, window start, slow threshold and top statements
+    """
+    return {
+        'pid': os.getpid(),
+        'since': _query_stats.started_at,
+        'slow_query_ms': SLOW_QUERY_MS,
+        'statements': _query_stats.top(limit, order_by)
+    }
+
+
+def get_recent_queries(limit: int = 100) -> list:
+    """Get the most recent statements from this process's ring buffer"""
+    return _query_stats.recent(limit)
+
+
+def reset_query_stats():
+    """Clear the ring buffer and per-statement aggregates"""
+    _query_stats.reset()
+
+
+class InstrumentedCursor:
+    """
+    Cursor wrapper that times execute()/executemany()/copy_expert() and
+    records each statement in QueryStats. Everything else is delegated.
+    """
+    
+    def __init__(self, cursor, pooled_conn):
+        self._cursor = cursor
+        self._pooled_conn = pooled_conn
+    
+    def _timed(self, method, sql, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return method(sql, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            try:
+                _query_stats.record(
+                    sql, elapsed_ms, self._cursor.rowcount,
+                    _calling_function(), self._pooled_conn._take_wait_ms()
+                )
+            except Exception:
+                pass  # Instrumentation must never break a query
+    
+    def execute(self, sql, *args, **kwargs):
+        return self._timed(self._cursor.execute, sql, *args, **kwargs)
+    
+    def executemany(self, sql, *args, **kwargs):
+        return self._timed(self._cursor.executemany, sql, *args, **kwargs)
+    
+    def copy_expert(self, sql, *args, **kwargs):
+        return self._timed(self._cursor.copy_expert, sql, *args, **kwargs)
+    
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+    
+    def __iter__(self):
+        return iter(self._cursor)
+    
+    def __enter__(self):
+        self._cursor.__enter__()
+        return self
+    
+    def __exit__(self, *exc_info):
+        return self._cursor.__exit__(*exc_info)
+
+
+PREPARED_STATEMENTS_ENABLED = os.getenv('DB_PREPARED_STATEMENTS', '1') == '1'
+
+_PREPARED_NAME_RE = re.compile(r'^[a-z_][a-z0-9_]*$')
+_prepared_registry = {}
+_prepared_registry_lock = threading.Lock()
+
+
+class PreparingConnection(psycopg2.extensions.connection):
+    """psycopg2 connection that remembers which registry statements it has PREPAREd"""
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()
+
+
+class PreparedStatement:
+    """
+    A named, server-side prepared statement (PREPARE/EXECUTE).
+    
+    Each pooled connection PREPAREs the statement the first time it is used and
+    keeps the plan for its lifetime, so hot per-order lookups skip parse/plan on
+    every later call. On connections that are not from the pool (or with
+    DB_PREPARED_STATEMENTS=0) the original SQL is executed directly.
+    """
+    
+    def __init__(self, name: str, sql: str):
+        if not _PREPARED_NAME_RE.match(name):
+            raise ValueError(f"Invalid prepared statement name: {name}")
+        self.name = name
+        self.sql = sql
+        self.param_count = len(re.findall(r'%s', sql))
+        counter = iter(range(1, self.param_count + 1))
+        self._prepare_sql = f"PREPARE {name} AS " + re.sub(r'%s', lambda _: f"${next(counter)}", sql)
+        if self.param_count:
+            self._execute_sql = f"EXECUTE {name} ({', '.join(['%s'] * self.param_count)})"
+        else:
+            self._execute_sql = f"EXECUTE {name}"
+    
+    def execute(self, cursor, params: tuple = ()):
+        """
+        Execute on the given cursor (results are read from the cursor as usual)
+        
+        Args:
+            cursor: Cursor from get_connection() / transaction()
+            params: Positional parameters matching the %s placeholders
+        """
+        raw_conn = getattr(cursor, 'connection', None)
+        prepared = getattr(raw_conn, 'prepared_statements', None)
+        if prepared is None or not PREPARED_STATEMENTS_ENABLED:
+            return cursor.execute(self.sql, params)
+        
+        if self.name not in prepared:
+            cursor.execute(self._prepare_sql)
+            prepared.add(self.name)
+        try:
+            return cursor.execute(self._execute_sql, params)
+        except psycopg2.errors.InvalidSqlStatementName:
+            # Server lost the statement (e.g. DISCARD ALL) - re-PREPARE on next use
+            prepared.discard(self.name)
+            raise
+
+
+def prepared_statement(name: str, sql: str) -> PreparedStatement:
+    """
+    Register (or fetch) a named prepared statement
+    
+    Call at module level for SQL that runs many times per cycle, e.g.
+    _ORDER_LOOKUP = prepared_statement('order_lookup', "SELECT ... WHERE order_number = %s")
+    
+    Raises:
+        ValueError: If the name is already registered with different SQL
+    """
+    with _prepared_registry_lock:
+        existing = _prepared_registry.get(name)
+        if existing is not None:
+            if existing.sql != sql:
+                raise ValueError(f"Prepared statement '{name}' already registered with different SQL")
+            return existing
+        statement = PreparedStatement(name, sql)
+        _prepared_registry[name] = statement
+        return statement
+
+
+def execute_prepared(statement: PreparedStatement, params: tuple = ()) -> List[Tuple[Any, ...]]:
+    """Run a registered prepared statement in its own transaction and return all rows"""
+    with transaction() as conn:
+        cursor = conn.cursor()
+        statement.execute(cursor, params)
+        return cursor.fetchall()
+
+
+class PooledConnection:
+    """
+    Thin proxy around a pooled psycopg2 connection.
+    
+    Behaves like a regular connection, except close() hands the underlying
+    connection back to the pool instead of tearing down the TCP/TLS session.
+    Connections that are dropped without close() are returned when the proxy
+    is garbage collected.
+    """
+    
+    def __init__(self, pool, raw_conn, wait_ms: float = 0.0):
+        object.__setattr__(self, '_pool', pool)
+        object.__setattr__(self, '_conn', raw_conn)
+        object.__setattr__(self, '_wait_ms', wait_ms)
+        finalizer = weakref.finalize(self, pool._release, raw_conn)
+        finalizer.atexit = False
+        object.__setattr__(self, '_finalizer', finalizer)
+    
+    def close(self):
+        """Return the connection to the pool (idempotent)"""
+        if self._conn is not None:
+            self._finalizer()
+            object.__setattr__(self, '_conn', None)
+    
+    @property
+    def closed(self):
+        return 1 if self._conn is None else self._conn.closed
+    
+    def cursor(self, *args, **kwargs):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        cursor = self._conn.cursor(*args, **kwargs)
+        if not QUERY_INSTRUMENTATION_ENABLED:
+            return cursor
+        return InstrumentedCursor(cursor, self)
+    
+    def _take_wait_ms(self) -> float:
+        """Checkout wait time, attributed to the first statement on this checkout only"""
+        wait_ms = self._wait_ms
+        object.__setattr__(self, '_wait_ms', 0.0)
+        return wait_ms
+    
+    def __getattr__(self, name):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        return getattr(self._conn, name)
+    
+    def __setattr__(self, name, value):
+        if self._conn is None:
+            raise psycopg2.InterfaceError("connection already returned to pool")
+        setattr(self._conn, name, value)
+
+
+class ConnectionPool:
+    """
+    Thread-safe, per-process PostgreSQL connection pool.
+    
+    - Keeps between min_size and max_size connections open
+    - Blocks (up to checkout_timeout) when all connections are in use
+    - Health-checks connections that sat idle before handing them out
+    - Reaps idle connections above min_size after idle_timeout
+    - Rebuilds itself after fork() so gunicorn workers never share sockets
+    """
+    
+    def __init__(self, dsn: str, min_size: int = POOL_MIN_SIZE, max_size: int = POOL_MAX_SIZE,
+                 idle_timeout: int = POOL_IDLE_TIMEOUT_SECONDS,
+                 checkout_timeout: int = POOL_CHECKOUT_TIMEOUT_SECONDS):
+        self.dsn = dsn
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size, self.min_size)
+        self.idle_timeout = idle_timeout
+        self.checkout_timeout = checkout_timeout
+        self.pid = os.getpid()
+        # RLock: a proxy finalizer may fire from GC while this thread holds the lock
+        self._cond = threading.Condition(threading.RLock())
+        self._idle = []  # list of (raw_conn, returned_at)
+        self._in_use = 0
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'reaped': 0,
+            'waits': 0,
+            'wait_ms_total': 0.0,
+            'wait_ms_max': 0.0,
+            'timeouts': 0
+        }
+    
+    def _connect(self):
+        conn = psycopg2.connect(self.dsn, connection_factory=PreparingConnection)
+        with self._cond:
+            self._stats['created'] += 1
+        return conn
+    
+    def _discard(self, conn):
+        with self._cond:
+            self._stats['discarded'] += 1
+        try:
+            conn.close()
+        except Exception:
+            pass
+    
+    def _is_healthy(self, conn, idle_for: float) -> bool:
+        if conn.closed:
+            return False
+        if idle_for < POOL_HEALTH_CHECK_AFTER_SECONDS:
+            return True
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            cursor.close()
+            conn.rollback()
+            return True
+        except Exception:
+            return False
+    
+    def _reap_idle(self, now: float):
+        """Close idle connections beyond min_size that exceeded idle_timeout"""
+        total = len(self._idle) + self._in_use
+        keep = []
+        # Oldest entries sit at the front of the idle list
+        for conn, returned_at in self._idle:
+            if total > self.min_size and now - returned_at > self.idle_timeout:
+                total -= 1
+                self._stats['reaped'] += 1
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            else:
+                keep.append((conn, returned_at))
+        self._idle = keep
+    
+    def getconn(self) -> PooledConnection:
+        """Check out a connection, waiting if the pool is exhausted"""
+        start = time.monotonic()
+        waited = False
+        while True:
+            idle_conn = None
+            with self._cond:
+                while True:
+                    now = time.time()
+                    self._reap_idle(now)
+                    
+                    if self._idle:
+                        # Reserve the slot; the health check runs outside the lock
+                        idle_conn, returned_at = self._idle.pop()
+                        self._in_use += 1
+                        break
+                    
+                    if self._in_use < self.max_size:
+                        self._in_use += 1
+                        break
+                    
+                    waited = True
+                    remaining = self.checkout_timeout - (time.monotonic() - start)
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise psycopg2.pool.PoolError(
+                            f"Connection pool exhausted ({self.max_size} in use) after {self.checkout_timeout}s"
+                        )
+                    self._cond.wait(remaining)
+            
+            if idle_conn is None:
+                break
+            
+            # Validate outside the lock (SELECT 1 is a network round trip)
+            if self._is_healthy(idle_conn, now - returned_at):
+                with self._cond:
+                    self._stats['reused'] += 1
+                    wait_ms = self._record_checkout(start, waited)
+                return PooledConnection(self, idle_conn, wait_ms)
+            self._discard(idle_conn)
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+        
+        # Open new connection outside the lock (network handshake)
+        try:
+            conn = self._connect()
+        except Exception:
+            with self._cond:
+                self._in_use -= 1
+                self._cond.notify()
+            raise
+        with self._cond:
+            wait_ms = self._record_checkout(start, waited)
+        return PooledConnection(self, conn, wait_ms)
+    
+    def _record_checkout(self, start: float, waited: bool) -> float:
+        """Update checkout stats; returns time spent acquiring the connection (ms)"""
+        wait_ms = (time.monotonic() - start) * 1000
+        self._stats['checkouts'] += 1
+        if waited:
+            self._stats['waits'] += 1
+            self._stats['wait_ms_total'] += wait_ms
+            self._stats['wait_ms_max'] = max(self._stats['wait_ms_max'], wait_ms)
+        return wait_ms
+    
+    def _release(self, conn):
+        """Return a raw connection to the idle list (called via PooledConnection.close)"""
+        if os.getpid() != self.pid:
+            # Proxy inherited across fork - never reuse the parent's socket
+            return
+        reusable = not conn.closed
+        if reusable:
+            try:
+                if conn.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+                if conn.autocommit:
+                    conn.autocommit = False
+            except Exception:
+                reusable = False
+        with self._cond:
+            self._in_use = max(0, self._in_use - 1)
+            if reusable:
+                self._idle.append((conn, time.time()))
+            else:
+                self._discard(conn)
+            self._cond.notify()
+    
+    def closeall(self):
+        """Close every idle connection (checked-out connections close on return)"""
+        with self._cond:
+            for conn, _ in self._idle:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            self._idle = []
+    
+    def stats(self) -> dict:
+        with self._cond:
+            stats = dict(self._stats)
+            stats.update({
+                'pid': self.pid,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'wait_ms_total': round(stats['wait_ms_total'], 1),
+                'wait_ms_max': round(stats['wait_ms_max'], 1)
+            })
+            return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    """Get (or lazily create) this process's connection pool"""
+    global _pool
+    pool = _pool
+    if pool is not None and pool.pid == os.getpid():
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.pid != os.getpid():
+            _pool = ConnectionPool(DATABASE_URL)
+            logger.info(f"Initialized PostgreSQL connection pool (min={_pool.min_size}, max={_pool.max_size}, pid={_pool.pid})")
+        return _pool
+
+
+def get_pool_stats() -> dict:
+    """
+    Get connection pool statistics for this process
+    
+    Returns:
+        dict: checkouts, created, reused, discarded, reaped, waits, wait times, in_use, idle
+    """
+    if _pool is None or _pool.pid != os.getpid():
+        return {'pid': os.getpid(), 'initialized': False}
+    stats = _pool.stats()
+    stats['initialized'] = True
+    return stats
+
+
+def close_pool():
+    """Close all idle pooled connections (e.g. at process shutdown)"""
+    if _pool is not None:
+        _pool.closeall()
+
 
 def get_connection():
-    """Get PostgreSQL connection"""
+    """
+    Get PostgreSQL connection from the process-wide pool
+    
+    The returned connection behaves like a psycopg2 connection; calling
+    close() returns it to the pool instead of disconnecting.
+    """
     if not DATABASE_URL:
         raise ValueError("DATABASE_URL environment variable not set")
     
-    conn = psycopg2.connect(DATABASE_URL)
     # PostgreSQL enforces foreign keys by default (unlike SQLite)
-    return conn
+    return _get_pool().getconn()
 
 @contextmanager
 def transaction():
@@ -105,6 +731,43 @@ def execute_query(sql: str, params: tuple = ()) -> List[Tuple[Any, ...]]:
         cursor.execute(sql, params)
         return cursor.fetchall()
 
+ITER_QUERY_BATCH_SIZE = 2000
+
+
+def iter_query(sql: str, params: tuple = (), batch_size: int = ITER_QUERY_BATCH_SIZE):
+    """
+    Stream query results using a named (server-side) cursor
+    
+    Rows are pulled from PostgreSQL batch_size at a time, so memory stays flat
+    regardless of result size. The connection is held until the generator is
+    exhausted or closed.
+    
+    Note: Uses %s placeholders (PostgreSQL) instead of ? (SQLite)
+    
+    Args:
+        sql: SELECT statement
+        params: Query parameters
+        batch_size: Rows fetched per round trip
+    
+    Yields:
+        tuple: One row at a time
+    """
+    conn = get_connection()
+    try:
+        cursor = conn.cursor(name=f"iter_query_{os.getpid()}_{threading.get_ident()}_{id(conn)}")
+        cursor.execute(sql, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            for row in rows:
+                yield row
+        cursor.close()
+        conn.commit()
+    finally:
+        # Early exit (break/GeneratorExit) rolls back via the pool on return
+        conn.close()
+
 def upsert(table: str, data: dict, conflict_columns: list):
     """
     UPSERT implementation using PostgreSQL ON CONFLICT
@@ -124,10 +787,162 @@ def upsert(table: str, data: dict, conflict_columns: list):
         cursor = conn.cursor()
         cursor.execute(sql, tuple(data.values()))
 
+UPSERT_PAGE_SIZE = 500
+UPSERT_COPY_THRESHOLD = int(os.getenv('DB_UPSERT_COPY_THRESHOLD', '5000'))
+
+
+def _copy_literal(value) -> str:
+    """
+    Format a value for COPY ... CSV (unquoted empty field = NULL)
+    
+    Matches what execute_values would send: dicts/lists become JSON, NaN/NaT
+    (pandas missing values) become NULL.
+    """
+    if value is None:
+        return ''
+    if isinstance(value, float) and value != value:
+        return ''
+    if type(value).__name__ in ('NaTType', 'NAType'):
+        return ''
+    if isinstance(value, (dict, list)):
+        text = json.dumps(value, default=str)
+    else:
+        text = str(value)
+    return '"' + text.replace('"', '""') + '"'
+
+
+def upsert_many(table: str, rows: List[dict], conflict_columns: list,
+                update_columns: Optional[list] = None, conn=None,
+                page_size: int = UPSERT_PAGE_SIZE,
+                copy_threshold: int = UPSERT_COPY_THRESHOLD) -> int:
+    """
+    Bulk UPSERT using PostgreSQL ON CONFLICT
+    
+    Small batches are sent with psycopg2.extras.execute_values (one statement
+    per page_size rows). Batches of copy_threshold rows or more are streamed
+    with COPY into a temp staging table, then merged with a single
+    INSERT ... SELECT ... ON CONFLICT.
+    
+    Rows sharing the same conflict key are collapsed (last one wins), matching
+    the result of upserting them one at a time.
+    
+    Args:
+        table: Target table name
+        rows: List of dicts, all with the same keys
+        conflict_columns: Columns of the unique constraint to conflict on
+        update_columns: Columns to overwrite on conflict (default: all non-conflict columns)
+        conn: Optional connection; if given, the caller owns the transaction
+        page_size: Rows per execute_values statement
+        copy_threshold: Row count at which the COPY staging path is used
+    
+    Returns:
+        int: Number of rows written
+    """
+    if not rows:
+        return 0
+    
+    columns = list(rows[0].keys())
+    if update_columns is None:
+        update_columns = [c for c in columns if c not in conflict_columns]
+    
+    # Collapse duplicate conflict keys - ON CONFLICT cannot touch a row twice per statement
+    deduped = {}
+    for row in rows:
+        key = tuple(row[c] for c in conflict_columns)
+        # NULLs never conflict in a unique index, so those rows are kept as-is
+        deduped[key if None not in key else object()] = row
+    values = [tuple(row[c] for c in columns) for row in deduped.values()]
+    
+    column_list = ', '.join(columns)
+    conflict = ', '.join(conflict_columns)
+    if update_columns:
+        on_conflict = f"DO UPDATE SET {', '.join(f'{c}=EXCLUDED.{c}' for c in update_columns)}"
+    else:
+        on_conflict = "DO NOTHING"
+    
+    def _write(conn):
+        cursor = conn.cursor()
+        if len(values) >= copy_threshold:
+            import io
+            staging = f"_upsert_staging_{table}"
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            cursor.execute(f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {column_list} FROM {table} WITH NO DATA")
+            buffer = io.StringIO()
+            for value_row in values:
+                buffer.write(','.join(_copy_literal(v) for v in value_row))
+                buffer.write('\n')
+            buffer.seek(0)
+            cursor.copy_expert(f"COPY {staging} ({column_list}) FROM STDIN WITH (FORMAT csv)", buffer)
+            cursor.execute(f"""
+                INSERT INTO {table} ({column_list})
+                SELECT {column_list} FROM {staging}
+                ON CONFLICT({conflict}) {on_conflict}
+            """)
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+        else:
+            psycopg2.extras.execute_values(
+                cursor,
+                f"INSERT INTO {table} ({column_list}) VALUES %s ON CONFLICT({conflict}) {on_conflict}",
+                values,
+                page_size=page_size
+            )
+        cursor.close()
+    
+    if conn is not None:
+        _write(conn)
+    else:
+        with transaction() as conn:
+            _write(conn)
+    
+    logger.debug(f"upsert_many: wrote {len(values)} rows to {table} ({len(rows) - len(values)} duplicates collapsed)")
+    return len(values)
+
+def _on_workflow_control_changed(channel: str, payload: str):
+    """Listener callback: apply a pushed workflow toggle to the local cache"""
+    try:
+        change = json.loads(payload)
+        workflow_name = change['workflow']
+        enabled = bool(change['enabled'])
+    except (ValueError, KeyError, TypeError):
+        # Unknown payload - drop everything and re-read on next use
+        _cache_sequence['*'] = _cache_sequence.get('*', 0) + 1
+        _cache_ttl.clear()
+        return
+    _cache_sequence[workflow_name] = _cache_sequence.get(workflow_name, 0) + 1
+    _workflow_cache[workflow_name] = enabled
+    _cache_ttl[workflow_name] = time.time() + WORKFLOW_CACHE_PUSH_TTL_SECONDS
+    _cache_generation[workflow_name] = _workflow_listener.connection_generation if _workflow_listener else 0
+    logger.info(f"🔔 Workflow '{workflow_name}' is now {'ENABLED' if enabled else 'DISABLED'} (pushed)")
+
+
+def _get_workflow_listener():
+    """Subscribe this process to workflow_controls_changed once (None if unavailable)"""
+    global _workflow_listener, _workflow_listener_pid
+    if _workflow_listener is not None and _workflow_listener_pid == os.getpid():
+        return _workflow_listener
+    try:
+        from .event_bus import get_listener, WORKFLOW_CONTROLS_CHANGED
+        listener = get_listener()
+        if listener is not None:
+            listener.subscribe(WORKFLOW_CONTROLS_CHANGED, _on_workflow_control_changed)
+        _workflow_listener = listener
+        _workflow_listener_pid = os.getpid()
+    except Exception as e:
+        logger.warning(f"Workflow control listener unavailable, using TTL cache: {e}")
+        _workflow_listener = None
+        _workflow_listener_pid = os.getpid()
+    return _workflow_listener
+
+
 def is_workflow_enabled(workflow_name: str, cache_seconds: int = 45) -> bool:
     """
     Check if workflow is enabled with in-memory caching
     
+    Toggles are pushed over NOTIFY (see publish_workflow_control_change), so while
+    this process's listener is connected cached values stay valid without
+    re-querying workflow_controls. If the listener is down or has reconnected
+    since the value was cached, the jittered TTL applies as before.
+    
     Args:
         workflow_name: Name of the workflow
         cache_seconds: Cache TTL (30-60s recommended, default 45s with jitter)
@@ -135,13 +950,23 @@ def is_workflow_enabled(workflow_name: str, cache_seconds: int = 45) -> bool:
     Returns:
         bool: True if enabled, or if DB fails (fail-open)
     """
+    from .event_bus import WORKFLOW_CONTROLS_CHANGED
+    
     now = time.time()
+    listener = _get_workflow_listener()
+    pushed = listener is not None and listener.is_listening(WORKFLOW_CONTROLS_CHANGED)
     
     # Check cache first
-    if workflow_name in _workflow_cache:
-        if now < _cache_ttl.get(workflow_name, 0):
+    if workflow_name in _workflow_cache and now < _cache_ttl.get(workflow_name, 0):
+        if not pushed:
+            return _workflow_cache[workflow_name]
+        # Notifications may have been missed while the listener was reconnecting
+        if _cache_generation.get(workflow_name) == listener.connection_generation:
             return _workflow_cache[workflow_name]
     
+    # A push landing while the SELECT is in flight is newer than its result
+    sequence = (_cache_sequence.get(workflow_name, 0), _cache_sequence.get('*', 0))
+    
     try:
         conn = get_connection()
         cursor = conn.cursor()
@@ -154,10 +979,21 @@ def is_workflow_enabled(workflow_name: str, cache_seconds: int = 45) -> bool:
         
         enabled = bool(result[0]) if result else True
         
+        if (_cache_sequence.get(workflow_name, 0), _cache_sequence.get('*', 0)) != sequence:
+            # Don't overwrite the pushed value with the stale read
+            if workflow_name in _workflow_cache and now < _cache_ttl.get(workflow_name, 0):
+                return _workflow_cache[workflow_name]
+            return enabled
+        
         # Cache with jitter
         jitter = random.uniform(-10, 10)
         _workflow_cache[workflow_name] = enabled
-        _cache_ttl[workflow_name] = now + cache_seconds + jitter
+        if pushed:
+            _cache_ttl[workflow_name] = now + WORKFLOW_CACHE_PUSH_TTL_SECONDS + jitter
+            _cache_generation[workflow_name] = listener.connection_generation
+        else:
+            _cache_ttl[workflow_name] = now + cache_seconds + jitter
+            _cache_generation.pop(workflow_name, None)
         
         return enabled
         
@@ -172,6 +1008,23 @@ def is_workflow_enabled(workflow_name: str, cache_seconds: int = 45) -> bool:
         
         return True
 
+def publish_workflow_control_change(workflow_name: str, enabled: bool, conn=None) -> bool:
+    """
+    Broadcast a workflow toggle so every process updates its cache immediately
+    
+    Args:
+        workflow_name: Name of the workflow that changed
+        enabled: New enabled state
+        conn: Optional connection whose transaction performed the UPDATE
+              (the notification is then delivered on commit)
+    
+    Returns:
+        bool: True if the notification was issued
+    """
+    from .event_bus import publish, WORKFLOW_CONTROLS_CHANGED
+    payload = json.dumps({'workflow': workflow_name, 'enabled': bool(enabled)})
+    return publish(WORKFLOW_CONTROLS_CHANGED, payload, conn=conn)
+
 def update_workflow_last_run(workflow_name: str):
     """
     Update the last_run_at timestamp for a workflow in both tables
@@ -0,0 +1,228 @@
+"""
+Cluster-wide run guards built on PostgreSQL advisory locks
+
+run_exclusive(name) makes sure only one process - across gunicorn workers,
+daemon replicas and hosts - executes a block at a time:
+
+    with run_exclusive('EOD') as lease:
+        if lease is None:
+            return 'already running'
+        ...
+
+The lock is a session-level pg_try_advisory_lock held on a dedicated connection
+for the duration of the block, so it is released automatically if the holder
+crashes or loses its connection. Holder metadata is recorded in run_leases
+(migration 009) and exposed through get_run_leases().
+"""
+
+import os
+import socket
+import hashlib
+import logging
+import psycopg2
+import psycopg2.extensions
+from contextlib import contextmanager
+from typing import Optional
+
+from .pg_utils import DATABASE_URL
+
+logger = logging.getLogger(__name__)
+
+# The lease connection idles for the whole block (sync runs take minutes): TCP
+# keepalives detect a dead peer so a lost lock shows up as a closed connection
+LEASE_KEEPALIVES = {
+    'keepalives': 1,
+    'keepalives_idle': int(os.getenv('RUN_LEASE_KEEPALIVE_IDLE', '30')),
+    'keepalives_interval': 10,
+    'keepalives_count': 3,
+}
+
+
+def lock_key(name: str) -> int:
+    """Stable non-negative 63-bit advisory lock key for a lease name"""
+    digest = hashlib.sha1(f"run_exclusive:{name}".encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big') & 0x7FFFFFFFFFFFFFFF
+
+
+def _default_holder() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _record_lease(cursor, name: str, key: int, holder: str):
+    cursor.execute("""
+        INSERT INTO run_leases (name, lock_key, holder, hostname, pid, started_at, finished_at, status)
+        VALUES (%s, %s, %s, %s, %s, CURRENT_TIMESTAMP, NULL, 'running')
+        ON CONFLICT (name) DO UPDATE SET
+            lock_key = EXCLUDED.lock_key,
+            holder = EXCLUDED.holder,
+            hostname = EXCLUDED.hostname,
+            pid = EXCLUDED.pid,
+            started_at = EXCLUDED.started_at,
+            finished_at = NULL,
+            status = 'running'
+        RETURNING started_at
+    """, (name, key, holder, socket.gethostname(), os.getpid()))
+    return cursor.fetchone()[0]
+
+
+def _seconds_since_finished(cursor, name: str) -> Optional[float]:
+    cursor.execute("""
+        SELECT EXTRACT(EPOCH FROM (CURRENT_TIMESTAMP - finished_at))
+        FROM run_leases
+        WHERE name = %s AND status = 'finished' AND finished_at IS NOT NULL
+    """, (name,))
+    row = cursor.fetchone()
+    return float(row[0]) if row and row[0] is not None else None
+
+
+@contextmanager
+def run_exclusive(name: str, holder: str = None, min_interval_seconds: float = None):
+    """
+    Run a block only if no other process currently holds the named lease
+
+    Args:
+        name: Lease name (e.g. 'EOD', 'unified-shipstation-sync')
+        holder: Description of the holder (default 'hostname:pid')
+        min_interval_seconds: If set, also skip when another holder finished this
+            lease less than this many seconds ago. Lets redundant daemon replicas
+            share one schedule instead of each running on its own timer.
+
+    Yields:
+        dict with name, holder, started_at when acquired; None if the lease is
+        held elsewhere (or was completed too recently). Callers must check it.
+        A block that handles its own failure (e.g. returns an error response)
+        sets lease['failed'] = True so the lease is recorded as 'failed';
+        an exception escaping the block does the same.
+
+    Raises:
+        ValueError: If DATABASE_URL is not set
+    """
+    if not DATABASE_URL:
+        raise ValueError("DATABASE_URL environment variable not set")
+
+    holder = holder or _default_holder()
+    key = lock_key(name)
+
+    # Dedicated connection: the lock lives and dies with this session and is
+    # never handed back to the pool still held
+    conn = psycopg2.connect(DATABASE_URL, **LEASE_KEEPALIVES)
+    conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+    acquired = False
+    succeeded = False
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT pg_try_advisory_lock(%s)", (key,))
+        acquired = bool(cursor.fetchone()[0])
+
+        if not acquired:
+            current = get_run_lease(name)
+            held_by = current['holder'] if current else 'unknown'
+            logger.info(f"🔒 '{name}' is already running ({held_by}) - skipping")
+            yield None
+            return
+
+        if min_interval_seconds:
+            try:
+                since = _seconds_since_finished(cursor, name)
+            except psycopg2.Error as e:
+                logger.warning(f"Could not read run_leases for '{name}': {e}")
+                since = None
+            if since is not None and since < min_interval_seconds:
+                logger.info(f"🔒 '{name}' finished {since:.0f}s ago on another holder - skipping")
+                yield None
+                return
+
+        try:
+            started_at = _record_lease(cursor, name, key, holder)
+        except psycopg2.Error as e:
+            # Exclusivity comes from the advisory lock; metadata is best-effort
+            logger.warning(f"Could not record lease metadata for '{name}': {e}")
+            started_at = None
+
+        logger.debug(f"🔓 Acquired lease '{name}' ({holder})")
+        lease = {'name': name, 'holder': holder, 'started_at': started_at, 'failed': False}
+        yield lease
+        succeeded = not lease.get('failed')
+    finally:
+        try:
+            # A dropped session already released the advisory lock mid-run
+            lost = acquired and bool(conn.closed)
+            if acquired and not lost:
+                cursor = conn.cursor()
+                try:
+                    cursor.execute("""
+                        UPDATE run_leases
+                        SET finished_at = CURRENT_TIMESTAMP, status = %s
+                        WHERE name = %s AND holder = %s
+                    """, ('finished' if succeeded else 'failed', name, holder))
+                except psycopg2.OperationalError:
+                    lost = True
+                except psycopg2.Error:
+                    pass
+                if not lost:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (key,))
+            if lost:
+                logger.warning(f"⚠️ Lease connection for '{name}' was lost during the run - the lock was released "
+                               f"early and another holder may have started; not recording it as finished")
+        except Exception as e:
+            logger.warning(f"Failed to release lease '{name}' cleanly (closing connection releases it): {e}")
+        finally:
+            conn.close()
+
+
+_LEASES_SQL = """
+    SELECT
+        rl.name,
+        rl.holder,
+        rl.hostname,
+        rl.pid,
+        rl.started_at,
+        rl.finished_at,
+        rl.status,
+        EXISTS (
+            SELECT 1 FROM pg_locks l
+            WHERE l.locktype = 'advisory'
+              AND l.granted
+              AND l.objsubid = 1
+              AND ((l.classid::bigint << 32) | l.objid::bigint) = rl.lock_key
+        ) AS held
+    FROM run_leases rl
+"""
+
+
+def _lease_row_to_dict(row) -> dict:
+    return {
+        'name': row[0],
+        'holder': row[1],
+        'hostname': row[2],
+        'pid': row[3],
+        'started_at': row[4].isoformat() if row[4] else None,
+        'finished_at': row[5].isoformat() if row[5] else None,
+        'status': row[6],
+        'held': bool(row[7]),
+    }
+
+
+def get_run_leases() -> list:
+    """
+    List all leases with their metadata
+
+    Returns:
+        list of dicts (name, holder, hostname, pid, started_at, finished_at,
+        status, held). 'held' reflects pg_locks, so a 'running' row whose
+        holder died shows held=False.
+    """
+    from .pg_utils import execute_query
+    rows = execute_query(_LEASES_SQL + " ORDER BY rl.name")
+    return [_lease_row_to_dict(row) for row in rows]
+
+
+def get_run_lease(name: str) -> Optional[dict]:
+    """Return metadata for a single lease, or None if it has never been taken"""
+    from .pg_utils import execute_query
+    try:
+        rows = execute_query(_LEASES_SQL + " WHERE rl.name = %s", (name,))
+    except Exception as e:
+        logger.warning(f"Could not read lease '{name}': {e}")
+        return None
+    return _lease_row_to_dict(rows[0]) if rows else None
@@ -7,16 +7,22 @@ zero items in order_items_inbox. This occurs when orders are manually created
 in ShipStation and synced to the local database without their line items.
 
 Key Features:
-- Per-order transaction isolation for fault tolerance
-- Rate limit detection and immediate stop behavior
+- Ghost orders are fetched concurrently in batches, inside the shared rate budget
+- One bulk write per batch; per-order transactions only as a fallback
+- Rate limit (429) pauses the run until the quota window resets, then resumes
+- Bounded run time; orders not reached are picked up next cycle
 - Work-in-progress order detection (0 items in ShipStation)
 - Comprehensive error handling and logging
 - Idempotent ON CONFLICT handling
 """
 
+import os
+import time
 import logging
+from collections import Counter, deque
 from typing import Dict, Any, List, Tuple
-from collections import Counter
+
+import requests
 
 from src.services.database.pg_utils import transaction
 from src.services.shipstation.api_client import get_shipstation_credentials
@@ -24,16 +30,25 @@ from utils.api_utils import make_api_request
 
 logger = logging.getLogger(__name__)
 
+GHOST_BACKFILL_BATCH_SIZE = int(os.getenv('GHOST_BACKFILL_BATCH_SIZE', '20'))  # Orders fetched concurrently, written together
+GHOST_BACKFILL_MAX_SECONDS = int(os.getenv('GHOST_BACKFILL_MAX_SECONDS', '180'))  # Per-cycle budget, including 429 pauses
+RATE_LIMIT_PAUSE_SECONDS = 60  # ShipStation quota window, used when the governor has no reset time
+
 
-def backfill_ghost_orders(read_conn, api_key: str = None, api_secret: str = None) -> Dict[str, Any]:
+def backfill_ghost_orders(read_conn=None, api_key: str = None, api_secret: str = None) -> Dict[str, Any]:
     """
     Detect and fix ghost orders by backfilling items from ShipStation.
     
-    Uses per-order transaction isolation for fault tolerance.
-    Stops immediately on rate limit (429) to preserve API quota.
+    Ghost orders are fetched GHOST_BACKFILL_BATCH_SIZE at a time, concurrently
+    (every request still goes through the rate governor), and each batch's
+    recovered items are written in one transaction. A rate limit (429) pauses
+    the run until the quota window resets and the throttled orders are retried;
+    the run stops after GHOST_BACKFILL_MAX_SECONDS and the rest wait for the
+    next cycle.
     
     Args:
-        read_conn: Database connection for read-only detection query
+        read_conn: Database connection for read-only detection query (None: a short
+            transaction of its own - use that when the caller holds no open transaction)
         api_key: ShipStation API key (optional, uses environment if not provided)
         api_secret: ShipStation API secret (optional, uses environment if not provided)
     
@@ -44,12 +59,16 @@ def backfill_ghost_orders(read_conn, api_key: str = None, api_secret: str = None
             - cancelled: Number marked as cancelled (404 errors)
             - work_in_progress: Number with 0 items in ShipStation
             - errors: Number of API/database errors
-            - rate_limited: Boolean, True if 429 encountered
+            - rate_limited: Boolean, True if a 429 ended the run before all orders were fetched
+            - rate_limit_pauses: Number of 429 pauses the run resumed from
+            - deferred: Number of ghost orders left for the next cycle
     
     Transaction Strategy:
-        - Detection query uses read_conn (read-only)
-        - Each order backfill uses new transaction (write isolation)
-        - Failures in one order don't affect others
+        - Detection query uses read_conn (read-only), or its own short transaction
+        - No transaction is held while fetching or pausing on a 429
+        - Each batch is written in a new transaction (write isolation)
+        - If a batch write fails, its orders are retried one transaction each,
+          so failures in one order don't affect others
     """
     # Initialize metrics
     metrics = {
@@ -58,7 +77,9 @@ def backfill_ghost_orders(read_conn, api_key: str = None, api_secret: str = None
         'cancelled': 0,
         'work_in_progress': 0,
         'errors': 0,
-        'rate_limited': False
+        'rate_limited': False,
+        'rate_limit_pauses': 0,
+        'deferred': 0
     }
     
     # Get ShipStation credentials
@@ -67,7 +88,11 @@ def backfill_ghost_orders(read_conn, api_key: str = None, api_secret: str = None
     
     try:
         # Detect ghost orders (read-only query)
-        ghost_orders = _detect_ghost_orders(read_conn)
+        if read_conn is None:
+            with transaction() as conn:
+                ghost_orders = _detect_ghost_orders(conn)
+        else:
+            ghost_orders = _detect_ghost_orders(read_conn)
         metrics['ghost_orders_found'] = len(ghost_orders)
         
         if metrics['ghost_orders_found'] == 0:
@@ -76,83 +101,98 @@ def backfill_ghost_orders(read_conn, api_key: str = None, api_secret: str = None
         
         logger.info(f"👻 Found {metrics['ghost_orders_found']} ghost orders with 0 items")
         
-        # Process each ghost order in isolated transaction
-        for order_id, order_number, shipstation_order_id in ghost_orders:
-            try:
-                # Fetch order details from ShipStation
-                order_data = _fetch_order_from_shipstation(
-                    shipstation_order_id, 
-                    api_key, 
-                    api_secret
-                )
-                
-                # Check for rate limit
-                if order_data.get('rate_limited'):
-                    metrics['rate_limited'] = True
-                    logger.warning(f"⚠️ Hit rate limit (429) - stopping backfill, will retry next cycle")
-                    break
-                
-                # Check for 404 (order not found)
-                if order_data.get('not_found'):
-                    _mark_order_cancelled(order_id, order_number, "Order not found in ShipStation (404)")
-                    metrics['cancelled'] += 1
-                    logger.warning(f"⚠️ Order {order_number} not found in ShipStation (404) - marked as cancelled")
-                    continue
-                
-                # Check for API errors
-                if order_data.get('error'):
-                    metrics['errors'] += 1
-                    logger.error(f"❌ Error fetching order {order_number}: {order_data['error']}")
-                    continue
-                
-                # Extract items
-                items = order_data.get('items', [])
-                status = order_data.get('status', 'awaiting_shipment')
-                
-                # Check for work-in-progress (0 items)
-                if len(items) == 0:
-                    metrics['work_in_progress'] += 1
-                    logger.warning(f"⚠️ Order {order_number} has 0 items in ShipStation - may be work-in-progress")
-                    continue
-                
-                # Check for duplicate SKUs (constraint violation risk)
-                skus = [item.get('sku', '') for item in items if item.get('sku')]
-                sku_counts = Counter(skus)
-                duplicates = {sku: count for sku, count in sku_counts.items() if count > 1}
-                
-                if duplicates:
-                    logger.critical(
-                        f"🚨 CRITICAL: Order {order_number} has duplicate SKUs - constraint violation risk! "
-                        f"Duplicates: {duplicates}"
-                    )
+        deadline = time.monotonic() + GHOST_BACKFILL_MAX_SECONDS
+        pending = deque(ghost_orders)
+        
+        while pending:
+            if time.monotonic() >= deadline:
+                logger.info(f"⏩ Backfill time budget reached - {len(pending)} ghost orders left for next cycle")
+                break
+            
+            batch = [pending.popleft() for _ in range(min(GHOST_BACKFILL_BATCH_SIZE, len(pending)))]
+            fetched = _fetch_orders_from_shipstation([ghost[2] for ghost in batch], api_key, api_secret)
+            
+            recovered = []  # (order_id, order_number, items, status)
+            throttled = []
+            
+            for order_id, order_number, shipstation_order_id in batch:
+                try:
+                    order_data = fetched[shipstation_order_id]
+                    
+                    # Check for rate limit - retried after the pause below
+                    if order_data.get('rate_limited'):
+                        throttled.append((order_id, order_number, shipstation_order_id))
+                        continue
+                    
+                    # Check for 404 (order not found)
+                    if order_data.get('not_found'):
+                        if _mark_order_cancelled(order_id, order_number, "Order not found in ShipStation (404)"):
+                            metrics['cancelled'] += 1
+                            logger.warning(f"⚠️ Order {order_number} not found in ShipStation (404) - marked as cancelled")
+                        else:
+                            metrics['errors'] += 1
+                        continue
+                    
+                    # Check for API errors
+                    if order_data.get('error'):
+                        metrics['errors'] += 1
+                        logger.error(f"❌ Error fetching order {order_number}: {order_data['error']}")
+                        continue
+                    
+                    # Extract items
+                    items = order_data.get('items', [])
+                    status = order_data.get('status', 'awaiting_shipment')
+                    
+                    # Check for work-in-progress (0 items)
+                    if len(items) == 0:
+                        metrics['work_in_progress'] += 1
+                        logger.warning(f"⚠️ Order {order_number} has 0 items in ShipStation - may be work-in-progress")
+                        continue
+                    
+                    # Check for duplicate SKUs (constraint violation risk)
+                    skus = [item.get('sku', '') for item in items if item.get('sku')]
+                    sku_counts = Counter(skus)
+                    duplicates = {sku: count for sku, count in sku_counts.items() if count > 1}
+                    
+                    if duplicates:
+                        logger.critical(
+                            f"🚨 CRITICAL: Order {order_number} has duplicate SKUs - constraint violation risk! "
+                            f"Duplicates: {duplicates}"
+                        )
+                        metrics['errors'] += 1
+                        continue
+                    
+                    recovered.append((order_id, order_number, items, status))
+                    
+                except Exception as e:
                     metrics['errors'] += 1
+                    logger.error(f"❌ Error processing ghost order {order_number}: {e}", exc_info=True)
                     continue
-                
-                # Backfill items in isolated transaction
-                success = _backfill_order_items(
-                    order_id, 
-                    order_number, 
-                    items, 
-                    status
-                )
-                
-                if success:
-                    metrics['backfilled'] += 1
-                    logger.info(
-                        f"✅ Backfilled order {order_number}: {len(items)} items, status: {status}"
-                    )
-                else:
-                    metrics['errors'] += 1
-                    
-            except Exception as e:
-                metrics['errors'] += 1
-                logger.error(f"❌ Error processing ghost order {order_number}: {e}", exc_info=True)
-                continue
+            
+            # Backfill the batch's items together
+            backfilled, failed = _backfill_order_items_batch(recovered)
+            metrics['backfilled'] += backfilled
+            metrics['errors'] += failed
+            
+            if throttled:
+                # Put the throttled orders back at the front and wait out the quota window
+                pending.extendleft(reversed(throttled))
+                pause = _rate_limit_pause_seconds()
+                if time.monotonic() + pause >= deadline:
+                    metrics['rate_limited'] = True
+                    logger.warning(f"⚠️ Hit rate limit (429) - stopping backfill, {len(pending)} orders will retry next cycle")
+                    break
+                metrics['rate_limit_pauses'] += 1
+                logger.warning(f"⏸️ Hit rate limit (429) on {len(throttled)} orders - pausing {pause:.0f}s, then resuming")
+                time.sleep(pause)
+        
+        metrics['deferred'] = len(pending)
         
         # Log summary
         logger.info(
             f"👻 Ghost order backfill complete: {metrics['backfilled']} fixed, "
-            f"{metrics['work_in_progress']} WIP, {metrics['errors']} errors"
+            f"{metrics['work_in_progress']} WIP, {metrics['errors']} errors, "
+            f"{metrics['rate_limit_pauses']} rate-limit pauses, {metrics['deferred']} deferred"
         )
         
         return metrics
@@ -163,6 +203,14 @@ def backfill_ghost_orders(read_conn, api_key: str = None, api_secret: str = None
         return metrics
 
 
+def _rate_limit_pause_seconds() -> float:
+    """Seconds until the shared rate governor reopens after a 429 (one quota window if unknown)"""
+    from utils.rate_governor import get_governor_state
+    
+    blocked_for = get_governor_state().get('blocked_for_seconds') or 0
+    return float(blocked_for) if blocked_for > 0 else RATE_LIMIT_PAUSE_SECONDS
+
+
 def _detect_ghost_orders(conn) -> List[Tuple[int, str, str]]:
     """
     Detect ghost orders (orders with 0 items).
@@ -197,8 +245,14 @@ def _fetch_order_from_shipstation(
     """
     try:
         from src.services.shipstation.api_client import get_shipstation_headers
+        from src.services.shipstation.order_cache import get_cached_order, cache_order
+        from config.settings import SHIPSTATION_ORDERS_ENDPOINT
+        
+        cached = get_cached_order(shipstation_order_id)
+        if cached is not None:
+            return _order_fetch_result(cached)
         
-        url = f"https://ssapi.shipstation.com/orders/{shipstation_order_id}"
+        url = f"{SHIPSTATION_ORDERS_ENDPOINT}/{shipstation_order_id}"
         headers = get_shipstation_headers(api_key, api_secret)
         
         response = make_api_request(
@@ -211,31 +265,148 @@ def _fetch_order_from_shipstation(
         if not response:
             return {'error': 'No response from ShipStation API'}
         
-        # Handle rate limit (429)
-        if response.status_code == 429:
-            return {'rate_limited': True}
-        
-        # Handle not found (404)
-        if response.status_code == 404:
-            return {'not_found': True}
+        data = response.json()
+        cache_order(data)
+        return _order_fetch_result(data)
         
-        # Handle server errors (500)
-        if response.status_code >= 500:
-            return {'error': f'ShipStation server error: {response.status_code}'}
-        
-        # Handle success (200)
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                'items': data.get('items', []),
-                'status': data.get('orderStatus', 'awaiting_shipment')
-            }
+    except Exception as e:
+        return _order_fetch_result(e)
+
+
+def _fetch_orders_from_shipstation(
+    shipstation_order_ids: List[str], 
+    api_key: str, 
+    api_secret: str
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Fetch several orders concurrently (see shipstation.async_client).
+    
+    Returns:
+        dict: {shipstation_order_id: result dict as from _fetch_order_from_shipstation}
+    """
+    from src.services.shipstation.async_client import get_orders
+    
+    try:
+        results = get_orders(shipstation_order_ids, api_key, api_secret)
+    except Exception as e:
+        return {order_id: _order_fetch_result(e) for order_id in shipstation_order_ids}
+    return {order_id: _order_fetch_result(result) for order_id, result in results.items()}
+
+
+def _order_fetch_result(result) -> Dict[str, Any]:
+    """
+    Map a fetched order, None (not found) or the raised exception to a result dict.
+    
+    make_api_request raises HTTPError for non-2xx responses once its retries
+    are spent, so 429/404/5xx arrive here as exceptions.
+    """
+    if isinstance(result, dict):
+        return {
+            'items': result.get('items', []),
+            'status': result.get('orderStatus', 'awaiting_shipment')
+        }
+    if result is None:
+        return {'not_found': True}
+    
+    response = getattr(result, 'response', None)
+    status_code = response.status_code if isinstance(result, requests.exceptions.HTTPError) and response is not None else None
+    
+    # Handle rate limit (429)
+    if status_code == 429:
+        return {'rate_limited': True}
+    
+    # Handle not found (404)
+    if status_code == 404:
+        return {'not_found': True}
+    
+    # Handle server errors (500)
+    if status_code is not None and status_code >= 500:
+        return {'error': f'ShipStation server error: {status_code}'}
+    
+    if status_code is not None:
+        return {'error': f'Unexpected status code: {status_code}'}
+    return {'error': str(result)}
+
+
+def _build_item_rows(order_id: int, items: List[Dict[str, Any]]) -> List[Tuple[int, str, int, int]]:
+    """order_items_inbox rows (order_inbox_id, sku, quantity, unit_price_cents) for a ShipStation order"""
+    rows = []
+    for item in items:
+        sku = item.get('sku', '')
+        quantity = item.get('quantity', 0)
+        unit_price = item.get('unitPrice', 0.0)
+        unit_price_cents = int(float(unit_price) * 100)
+        rows.append((order_id, sku, quantity, unit_price_cents))
+    return rows
+
+
+def _backfill_order_items_batch(recovered: List[Tuple[int, str, list, str]]) -> Tuple[int, int]:
+    """
+    Backfill items for a batch of ghost orders in one transaction.
+    
+    One INSERT writes every item and one UPDATE ... FROM (VALUES ...) sets
+    total_items/status. If the batch fails, each order is retried with
+    _backfill_order_items in its own transaction.
+    
+    Args:
+        recovered: (order_id, order_number, ShipStation items, status) per order
+    
+    Returns:
+        (backfilled, failed) order counts
+    """
+    if not recovered:
+        return 0, 0
+    
+    import psycopg2.extras
+    
+    try:
+        # Collapse repeated (order_inbox_id, sku) rows - last one wins, as in _backfill_order_items;
+        # ON CONFLICT DO UPDATE cannot touch the same row twice in one statement
+        deduped = {}
+        for order_id, _, items, _ in recovered:
+            for row in _build_item_rows(order_id, items):
+                deduped[(row[0], row[1])] = row
+        item_rows = list(deduped.values())
+        with transaction() as conn:
+            cursor = conn.cursor()
+            
+            # Insert items with ON CONFLICT handling
+            psycopg2.extras.execute_values(cursor, """
+                INSERT INTO order_items_inbox 
+                (order_inbox_id, sku, quantity, unit_price_cents)
+                VALUES %s
+                ON CONFLICT (order_inbox_id, sku) 
+                DO UPDATE SET 
+                    quantity = EXCLUDED.quantity,
+                    unit_price_cents = EXCLUDED.unit_price_cents
+            """, item_rows, page_size=len(item_rows))
+            
+            # Update order metadata
+            psycopg2.extras.execute_values(cursor, """
+                UPDATE orders_inbox AS o
+                SET total_items = v.total_items,
+                    status = v.status,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM (VALUES %s) AS v(id, total_items, status)
+                WHERE o.id = v.id
+            """, [(order_id, len(items), status) for order_id, _, items, status in recovered],
+                template="(%s::INTEGER, %s::INTEGER, %s::TEXT)", page_size=len(recovered))
         
-        # Handle other errors
-        return {'error': f'Unexpected status code: {response.status_code}'}
+        for _, order_number, items, status in recovered:
+            logger.info(f"✅ Backfilled order {order_number}: {len(items)} items, status: {status}")
+        return len(recovered), 0
         
     except Exception as e:
-        return {'error': str(e)}
+        logger.warning(f"⚠️ Batch backfill failed ({e}) - retrying {len(recovered)} orders one by one")
+    
+    backfilled = failed = 0
+    for order_id, order_number, items, status in recovered:
+        if _backfill_order_items(order_id, order_number, items, status):
+            backfilled += 1
+            logger.info(f"✅ Backfilled order {order_number}: {len(items)} items, status: {status}")
+        else:
+            failed += 1
+    return backfilled, failed
 
 
 def _backfill_order_items(
@@ -255,12 +426,7 @@ def _backfill_order_items(
             cursor = conn.cursor()
             
             # Insert items with ON CONFLICT handling
-            for item in items:
-                sku = item.get('sku', '')
-                quantity = item.get('quantity', 0)
-                unit_price = item.get('unitPrice', 0.0)
-                unit_price_cents = int(float(unit_price) * 100)
-                
+            for _, sku, quantity, unit_price_cents in _build_item_rows(order_id, items):
                 cursor.execute("""
                     INSERT INTO order_items_inbox 
                     (order_inbox_id, sku, quantity, unit_price_cents)
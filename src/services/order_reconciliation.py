@@ -13,8 +13,8 @@ Usage:
 
 import logging
 from typing import Dict, List, Tuple
-from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers
-from utils.api_utils import make_api_request
+from src.services.shipstation.api_client import get_shipstation_credentials
+from src.services.shipstation.async_client import get_orders, find_orders_by_numbers
 
 logger = logging.getLogger(__name__)
 
@@ -74,55 +74,35 @@ def reconcile_orphaned_orders(conn) -> Dict[str, any]:
         
         # Get ShipStation credentials
         api_key, api_secret = get_shipstation_credentials()
-        headers = get_shipstation_headers(api_key, api_secret)
         
-        # Check each order in ShipStation
+        # Look every order up concurrently, then apply updates in this transaction
+        by_id = get_orders([ss_id for _, _, _, ss_id in orphaned_orders if ss_id],
+                           api_key, api_secret, use_cache=False)
+        by_number = find_orders_by_numbers([num for _, num, _, ss_id in orphaned_orders if not ss_id],
+                                           api_key, api_secret)
+        
         for order_id, order_number, local_status, ss_order_id in orphaned_orders:
             try:
-                # Query ShipStation for this order
                 if ss_order_id:
                     # Use ShipStation order ID if available
-                    response = make_api_request(
-                        url=f"https://ssapi.shipstation.com/orders/{ss_order_id}",
-                        method='GET',
-                        headers=headers,
-                        timeout=10
-                    )
+                    ss_order = by_id.get(ss_order_id)
                 else:
-                    # Fallback: search by order number
-                    response = make_api_request(
-                        url="https://ssapi.shipstation.com/orders",
-                        method='GET',
-                        headers=headers,
-                        params={'orderNumber': order_number},
-                        timeout=10
-                    )
+                    # Fallback: search by order number - take the first match
+                    ss_order = by_number.get(order_number)
+                    if isinstance(ss_order, list):
+                        ss_order = ss_order[0] if ss_order else None
                 
-                if not response or response.status_code == 404:
+                if isinstance(ss_order, Exception):
+                    summary['errors'] += 1
+                    logger.error(f"Failed to fetch order {order_number}: {ss_order}")
+                    continue
+                
+                if not ss_order:
                     summary['not_found_in_shipstation'] += 1
                     summary['details'].append(f"⚠️ Order {order_number}: Not found in ShipStation")
                     logger.warning(f"Order {order_number} not found in ShipStation")
                     continue
                 
-                if response.status_code != 200:
-                    summary['errors'] += 1
-                    logger.error(f"Failed to fetch order {order_number}: Status {response.status_code}")
-                    continue
-                
-                # Parse response
-                if ss_order_id:
-                    # Single order response
-                    ss_order = response.json()
-                else:
-                    # Search response - get first match
-                    data = response.json()
-                    orders = data.get('orders', [])
-                    if not orders:
-                        summary['not_found_in_shipstation'] += 1
-                        summary['details'].append(f"⚠️ Order {order_number}: Not found in ShipStation")
-                        continue
-                    ss_order = orders[0]
-                
                 ss_status = ss_order.get('orderStatus', '').lower()
                 
                 # Update local DB if status changed
@@ -20,6 +20,8 @@ if project_root not in sys.path:
 # FIX: Import the settings object directly from the config package.
 from config import settings
 from utils.api_utils import make_api_request
+from src.services.shipstation.paginator import iter_pages, PaginationError
+from src.services.shipstation.order_cache import get_cached_order, cache_order, publish_orders_changed
 from src.services.secrets import get_secret
 
 
@@ -82,6 +84,47 @@ def get_shipstation_credentials():
         logger.error(f"Error retrieving ShipStation credentials: {e}", exc_info=True)
         return None, None
 
+def iter_orders(api_key: str, api_secret: str, params: dict, orders_endpoint: str = None, label: str = 'Orders'):
+    """
+    Stream orders from the ShipStation /orders endpoint one at a time.
+
+    Pages are fetched concurrently (see paginator.iter_pages) but only the page
+    being consumed is held in memory, so a 90/180-day scan no longer builds a
+    list of every order JSON.
+
+    Args:
+        api_key: ShipStation API Key
+        api_secret: ShipStation API Secret
+        params: Query params (createDateStart, modifyDateStart, orderStatus, pageSize, ...)
+        orders_endpoint: Orders endpoint URL (defaults to settings.SHIPSTATION_ORDERS_ENDPOINT)
+        label: Name used in page log lines
+
+    Yields:
+        dict: One ShipStation order
+
+    Raises:
+        PaginationError: A page failed; orders from earlier pages were already yielded
+    """
+    headers = get_shipstation_headers(api_key, api_secret)
+    url = orders_endpoint or settings.SHIPSTATION_ORDERS_ENDPOINT
+    for _, _, orders in iter_pages(url, headers, params, 'orders', label=label):
+        yield from orders
+
+
+def iter_shipments(api_key: str, api_secret: str, params: dict, shipments_endpoint: str = None,
+                   start_page: int = 1, label: str = 'Shipments'):
+    """
+    Stream shipments from the ShipStation /shipments endpoint one at a time.
+
+    Same contract as iter_orders (raises PaginationError after yielding the
+    shipments from pages that succeeded).
+    """
+    headers = get_shipstation_headers(api_key, api_secret)
+    url = shipments_endpoint or settings.SHIPSTATION_SHIPMENTS_ENDPOINT
+    for _, _, shipments in iter_pages(url, headers, params, 'shipments', start_page=start_page, label=label):
+        yield from shipments
+
+
 def fetch_shipstation_shipments(
     api_key: str,
     api_secret: str,
@@ -111,47 +154,19 @@ def fetch_shipstation_shipments(
     """
     logger.info(f"Starting raw shipment fetch from {start_date} with includeShipmentItems=true and status='{shipment_status}'...")
     all_shipments = []
-    headers = get_shipstation_headers(api_key, api_secret)
-    
     params = {
         'shipDateStart': start_date,
         'shipDateEnd': end_date,
         'includeShipmentItems': 'true',
-        'page': page,
         'pageSize': page_size,
         'shipmentStatus': shipment_status
     }
 
-    while True:
-        try:
-            response = make_api_request(
-                url=shipments_endpoint,
-                method='GET',
-                headers=headers,
-                params=params,
-                timeout=30
-            )
-
-            if response and response.status_code == 200:
-                data = response.json()
-                shipments_on_page = data.get('shipments', [])
-                all_shipments.extend(shipments_on_page)
-                
-                total_pages = data.get('pages', 1)
-                current_page = data.get('page', 1)
-
-                logger.info(f"Fetched page {current_page} of {total_pages}. Total shipments so far: {len(all_shipments)}")
-
-                if current_page >= total_pages:
-                    break
-                else:
-                    params['page'] += 1
-            else:
-                logger.error(f"Failed to fetch shipments. Status: {response.status_code if response else 'N/A'}, Response: {response.text if response else 'N/A'}")
-                break
-        except Exception as e:
-            logger.error(f"An error occurred while fetching shipments: {e}")
-            break
+    try:
+        all_shipments.extend(iter_shipments(api_key, api_secret, params, shipments_endpoint, start_page=page))
+    except Exception as e:
+        # Keep whatever arrived from earlier pages (same as the old page loop)
+        logger.error(f"An error occurred while fetching shipments: {e}")
             
     logger.info(f"Finished fetching ShipStation shipments. Total retrieved: {len(all_shipments)}")
     return all_shipments
@@ -215,43 +230,20 @@ def fetch_shipstation_existing_orders_by_date_range(
     Returns:
         list: List of existing orders from ShipStation
     """
-    headers = get_shipstation_headers(api_key, api_secret)
     all_orders = []
-    
     params = {
         'createDateStart': create_date_start,
         'createDateEnd': create_date_end,
-        'page': 1,
         'pageSize': 500
     }
     
     try:
-        while True:
-            response = make_api_request(
-                url=orders_endpoint,
-                method='GET',
-                headers=headers,
-                params=params,
-                timeout=30
-            )
-            
-            if response and response.status_code == 200:
-                data = response.json()
-                orders_on_page = data.get('orders', [])
-                all_orders.extend(orders_on_page)
-                
-                total_pages = data.get('pages', 1)
-                current_page = data.get('page', 1)
-                
-                logger.info(f"Fetched page {current_page} of {total_pages} for duplicate check")
-                
-                if current_page >= total_pages:
-                    break
-                else:
-                    params['page'] += 1
-            else:
-                logger.error(f"Failed to fetch existing orders. Status: {response.status_code if response else 'N/A'}")
-                break
+        try:
+            all_orders.extend(iter_orders(api_key, api_secret, params, orders_endpoint, label='Duplicate check'))
+        except PaginationError as e:
+            if not all_orders:
+                raise
+            logger.error(f"Failed to fetch all existing order pages ({e}) - duplicate check uses {len(all_orders)} orders")
                 
         logger.info(f"Retrieved {len(all_orders)} existing orders for duplicate checking")
         return all_orders
@@ -260,21 +252,104 @@ def fetch_shipstation_existing_orders_by_date_range(
         logger.error(f"Error fetching existing orders: {e}", exc_info=True)
         return []
 
+# Up to this many order numbers are looked up with one orderNumber= query each;
+# larger sets read the local order mirror (or a bounded date scan)
+ORDER_NUMBER_FANOUT_MAX = int(os.getenv('SHIPSTATION_ORDER_NUMBER_FANOUT_MAX', '25'))
+ORDER_NUMBER_SCAN_DAYS = 180
+
+
+def _fetch_orders_by_number_fanout(api_key: str, api_secret: str, orders_endpoint: str,
+                                   order_numbers_upper: set, days: int = ORDER_NUMBER_SCAN_DAYS):
+    """
+    One orderNumber= query per number, run concurrently (each still takes a
+    rate-governor token). Bounded to orders created in the last `days` days,
+    the same window as the scan strategy. Returns None if any lookup failed, so
+    the caller can try another strategy instead of trusting a partial answer.
+    """
+    from datetime import datetime, timedelta
+    from concurrent.futures import ThreadPoolExecutor
+    from src.services.shipstation.paginator import PAGE_WORKERS
+    from utils.rate_governor import api_workflow, get_api_workflow
+    
+    workflow = get_api_workflow()
+    create_date_start = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%dT00:00:00Z')
+    
+    def lookup(order_number):
+        # ShipStation's orderNumber filter is a prefix match - keep exact matches only
+        with api_workflow(workflow):
+            return [
+                order for order in iter_orders(
+                    api_key, api_secret, {'orderNumber': order_number, 'createDateStart': create_date_start, 'pageSize': 500},
+                    orders_endpoint, label=f'Order {order_number}'
+                )
+                if (order.get('orderNumber') or '').strip().upper() == order_number
+            ]
+    
+    try:
+        with ThreadPoolExecutor(max_workers=min(PAGE_WORKERS, len(order_numbers_upper)),
+                                thread_name_prefix='ss-order-number') as pool:
+            results = list(pool.map(lookup, sorted(order_numbers_upper)))
+    except Exception as e:
+        logger.warning(f"Order-number lookups failed ({e}) - trying another strategy")
+        return None
+    return [order for orders in results for order in orders]
+
+
+def _fetch_orders_by_number_scan(api_key: str, api_secret: str, orders_endpoint: str,
+                                 order_numbers_upper: set, days: int = ORDER_NUMBER_SCAN_DAYS) -> list:
+    """Date-range scan (newest first), stopping once every number has been seen"""
+    from datetime import datetime, timedelta
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=days)
+    
+    params = {
+        'createDateStart': start_date.strftime('%Y-%m-%dT00:00:00Z'),
+        'createDateEnd': end_date.strftime('%Y-%m-%dT23:59:59Z'),
+        'sortBy': 'CreateDate',
+        'sortDir': 'DESC',
+        'pageSize': 500
+    }
+    
+    all_orders = []
+    remaining = set(order_numbers_upper)
+    try:
+        orders = iter_orders(api_key, api_secret, params, orders_endpoint, label='Order-number scan')
+        for order in orders:
+            order_num = (order.get('orderNumber') or '').strip().upper()
+            if order_num in order_numbers_upper:
+                all_orders.append(order)
+                remaining.discard(order_num)
+                if not remaining:
+                    orders.close()  # Stops requesting further pages
+                    break
+    except Exception as e:
+        logger.error(f"Error fetching orders by date range: {e}", exc_info=True)
+    return all_orders
+
+
 def fetch_shipstation_orders_by_order_numbers(
     api_key: str,
     api_secret: str,
     orders_endpoint: str,
-    order_numbers: list
+    order_numbers: list,
+    strategy: str = None
 ) -> list:
     """
     Fetches existing orders from ShipStation by specific order numbers.
-    Uses a single date-range query for efficiency instead of per-order queries.
+    
+    Picks the cheapest lookup for the size of the request:
+    - 'fanout': up to ORDER_NUMBER_FANOUT_MAX numbers - one orderNumber= query
+      each, run concurrently within the rate budget (O(k) requests)
+    - 'mirror': larger sets - the local order mirror after an incremental refresh
+    - 'scan': fallback when neither is available - a date-range scan of the
+      last 180 days that stops as soon as every number has been found
     
     Args:
         api_key: ShipStation API Key
         api_secret: ShipStation API Secret
         orders_endpoint: ShipStation orders API endpoint URL
         order_numbers: List of order numbers to query
+        strategy: Force 'fanout', 'mirror' or 'scan' (default: choose by size)
     
     Returns:
         list: List of existing orders from ShipStation matching the order numbers
@@ -282,78 +357,54 @@ def fetch_shipstation_orders_by_order_numbers(
     if not order_numbers:
         return []
     
-    headers = get_shipstation_headers(api_key, api_secret)
-    
-    # Use a wide date range to capture all orders (last 6 months)
-    # This is more efficient than querying each order individually
-    from datetime import datetime, timedelta
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=180)
-    
-    params = {
-        'createDateStart': start_date.strftime('%Y-%m-%dT00:00:00Z'),
-        'createDateEnd': end_date.strftime('%Y-%m-%dT23:59:59Z'),
-        'page': 1,
-        'pageSize': 500
-    }
+    order_numbers_upper = set(str(num).strip().upper() for num in order_numbers if str(num).strip())
+    if strategy is None:
+        strategy = 'fanout' if len(order_numbers_upper) <= ORDER_NUMBER_FANOUT_MAX else 'mirror'
     
-    all_orders = []
-    order_numbers_upper = set(str(num).strip().upper() for num in order_numbers)
+    if strategy == 'fanout':
+        found = _fetch_orders_by_number_fanout(api_key, api_secret, orders_endpoint, order_numbers_upper)
+        if found is not None:
+            logger.info(f"Retrieved {len(found)} existing orders ({len(order_numbers_upper)} order-number lookups)")
+            return found
+        strategy = 'mirror'
     
-    try:
-        logger.info(f"Fetching orders from ShipStation (date range query for {len(order_numbers)} order numbers)")
-        
-        while True:
-            response = make_api_request(
-                url=orders_endpoint,
-                method='GET',
-                headers=headers,
-                params=params,
-                timeout=30
-            )
-            
-            if response and response.status_code == 200:
-                data = response.json()
-                orders_on_page = data.get('orders', [])
-                
-                # Filter to only orders we care about
-                for order in orders_on_page:
-                    order_num = order.get('orderNumber', '').strip().upper()
-                    if order_num in order_numbers_upper:
-                        all_orders.append(order)
-                
-                total_pages = data.get('pages', 1)
-                current_page = data.get('page', 1)
-                
-                logger.debug(f"Fetched page {current_page}/{total_pages}, found {len([o for o in orders_on_page if o.get('orderNumber', '').strip().upper() in order_numbers_upper])} matching orders")
-                
-                if current_page >= total_pages:
-                    break
-                else:
-                    params['page'] += 1
-            else:
-                logger.error(f"Failed to fetch orders. Status: {response.status_code if response else 'N/A'}")
-                break
-                
-    except Exception as e:
-        logger.error(f"Error fetching orders by date range: {e}", exc_info=True)
+    if strategy == 'mirror':
+        # Imported here - order_mirror builds on this module
+        from src.services.shipstation.order_mirror import ensure_order_mirror, find_mirror_orders_by_numbers
+        if ensure_order_mirror(api_key, api_secret):
+            found = find_mirror_orders_by_numbers(order_numbers_upper)
+            logger.info(f"Retrieved {len(found)} existing orders from the local order mirror ({len(order_numbers_upper)} order numbers)")
+            return found
     
-    logger.info(f"Retrieved {len(all_orders)} existing orders (filtered from bulk query)")
-    return all_orders
+    logger.info(f"Fetching orders from ShipStation (date range query for {len(order_numbers_upper)} order numbers)")
+    found = _fetch_orders_by_number_scan(api_key, api_secret, orders_endpoint, order_numbers_upper)
+    logger.info(f"Retrieved {len(found)} existing orders (filtered from bulk query)")
+    return found
 
-def fetch_order_by_id(order_id: int, api_key: str = None, api_secret: str = None) -> dict:
+def fetch_order_by_id(order_id: int, api_key: str = None, api_secret: str = None, use_cache: bool = True) -> dict:
     """
     Fetch a single order from ShipStation by order ID.
     
+    Repeat fetches within a few minutes are served from the per-process order
+    cache (see order_cache.py); entries are invalidated when the order changes
+    or is deleted.
+    
     Args:
         order_id: The ShipStation order ID to fetch
         api_key: Optional ShipStation API key (will retrieve if not provided)
         api_secret: Optional ShipStation API secret (will retrieve if not provided)
+        use_cache: Set False to force a fresh API read
         
     Returns:
-        dict: {'success': bool, 'order': dict, 'error': str (optional)}
+        dict: {'success': bool, 'order': dict, 'cached': bool, 'error': str (optional)}
     """
     try:
+        if use_cache:
+            cached = get_cached_order(order_id)
+            if cached is not None:
+                logger.debug(f"Order {order_id} served from cache")
+                return {'success': True, 'order': cached, 'cached': True}
+        
         if not api_key or not api_secret:
             api_key, api_secret = get_shipstation_credentials()
             if not api_key or not api_secret:
@@ -374,7 +425,8 @@ def fetch_order_by_id(order_id: int, api_key: str = None, api_secret: str = None
         if response and response.status_code == 200:
             order = response.json()
             logger.info(f"✅ Successfully fetched order {order_id}: Order #{order.get('orderNumber')}, Status: {order.get('orderStatus')}")
-            return {'success': True, 'order': order}
+            cache_order(order)
+            return {'success': True, 'order': order, 'cached': False}
         else:
             error_msg = f"Failed to fetch order {order_id}: HTTP {response.status_code if response else 'No response'}"
             logger.error(error_msg)
@@ -411,6 +463,9 @@ def delete_order_from_shipstation(order_id: int) -> dict:
             timeout=30
         )
         
+        # Deleted orders never reach the sync's modifyDate feed - tell every process's cache
+        publish_orders_changed([(order_id, None)])
+        
         if response and response.status_code == 200:
             logger.info(f"✅ Successfully deleted order {order_id} from ShipStation")
             return {'success': True, 'message': f'Order {order_id} deleted successfully'}
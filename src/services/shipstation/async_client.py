@@ -0,0 +1,184 @@
+# filename: src/services/shipstation/async_client.py
+"""
+Asyncio counterpart of api_client for fan-out paths.
+
+Reconciliation, manual-conflict auto-resolution, tracking refresh and ghost
+backfill each need one ShipStation lookup per order. The coroutines here let
+those N lookups overlap, and the sync wrappers (get_orders,
+find_orders_by_numbers, map_concurrently) let the existing daemons use them
+without becoming async themselves.
+
+No async HTTP library is a dependency of this project, so each request runs
+make_api_request on a bounded thread pool and the event loop multiplexes the
+waits. Every call therefore keeps the shared keep-alive session, the tenacity
+retry rules, the cross-process rate governor and the workflow attribution of
+the caller - concurrency never exceeds the ShipStation budget, it only stops
+one slow response from serialising the rest.
+"""
+import os
+import sys
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional
+
+import requests
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import settings
+from utils.api_utils import make_api_request
+from utils.rate_governor import api_workflow, get_api_workflow
+from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers, iter_orders
+from src.services.shipstation.order_cache import get_cached_order, cache_order
+
+logger = logging.getLogger(__name__)
+
+ASYNC_WORKERS = int(os.getenv('SHIPSTATION_ASYNC_WORKERS', '8'))
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    """One request pool per process (recreated after fork)"""
+    global _executor, _executor_pid
+    with _executor_lock:
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=ASYNC_WORKERS, thread_name_prefix='ss-async')
+            _executor_pid = os.getpid()
+        return _executor
+
+
+async def _in_executor(func: Callable, *args, **kwargs):
+    """Run a blocking ShipStation call on the pool, attributed to the caller's workflow"""
+    workflow = get_api_workflow()
+
+    def call():
+        with api_workflow(workflow):
+            return func(*args, **kwargs)
+
+    return await asyncio.get_running_loop().run_in_executor(_get_executor(), call)
+
+
+async def request_async(url: str, method: str = 'GET', headers: dict = None, params: dict = None,
+                        data: Any = None, timeout: int = 30) -> requests.Response:
+    """Async make_api_request (same retries, rate budget and error behaviour)"""
+    return await _in_executor(make_api_request, url=url, method=method, data=data,
+                              headers=headers, params=params, timeout=timeout)
+
+
+async def get_order_async(order_id, api_key: str, api_secret: str, use_cache: bool = True) -> Optional[Dict[str, Any]]:
+    """
+    Fetch one order by orderId
+
+    Returns:
+        dict: The order, or None if ShipStation has no such order (404)
+
+    Raises:
+        requests.exceptions.RequestException: Any other failure, after retries
+    """
+    if use_cache:
+        cached = get_cached_order(order_id)
+        if cached is not None:
+            return cached
+    try:
+        response = await request_async(f"{settings.SHIPSTATION_ORDERS_ENDPOINT}/{order_id}",
+                                       headers=get_shipstation_headers(api_key, api_secret), timeout=10)
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            return None
+        raise
+    order = response.json()
+    cache_order(order)
+    return order
+
+
+async def find_orders_by_number_async(order_number: str, api_key: str, api_secret: str) -> List[Dict[str, Any]]:
+    """
+    All orders whose orderNumber equals order_number (ShipStation's filter is
+    a prefix match, so results are narrowed to exact matches)
+    """
+    wanted = str(order_number).strip().upper()
+    orders = await _in_executor(
+        lambda: list(iter_orders(api_key, api_secret, {'orderNumber': wanted, 'pageSize': 500},
+                                 label=f'Order {wanted}'))
+    )
+    return [o for o in orders if (o.get('orderNumber') or '').strip().upper() == wanted]
+
+
+async def gather_limited(factories: Iterable[Callable[[], Awaitable]], limit: int = None,
+                         return_exceptions: bool = True) -> list:
+    """Await coroutine factories with at most limit in flight; results keep input order"""
+    semaphore = asyncio.Semaphore(limit or ASYNC_WORKERS)
+
+    async def run(factory):
+        async with semaphore:
+            return await factory()
+
+    return await asyncio.gather(*(run(f) for f in factories), return_exceptions=return_exceptions)
+
+
+def run_async(coro):
+    """
+    Run a coroutine to completion from synchronous code
+
+    Uses a private event loop; if the calling thread already runs a loop, the
+    coroutine runs on a helper thread instead.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        return pool.submit(asyncio.run, coro).result()
+
+
+def map_concurrently(async_fn: Callable[..., Awaitable], items: Iterable, *args,
+                     limit: int = None, **kwargs) -> list:
+    """
+    Sync wrapper: [await async_fn(item, *args, **kwargs) for item in items], run concurrently
+
+    Failures are returned in place as exception objects, so one bad lookup
+    does not discard the others.
+    """
+    items = list(items)
+    if not items:
+        return []
+    return run_async(gather_limited(
+        [(lambda item=item: async_fn(item, *args, **kwargs)) for item in items], limit
+    ))
+
+
+def get_orders(order_ids: Iterable, api_key: str = None, api_secret: str = None,
+               use_cache: bool = True) -> Dict[Any, Any]:
+    """
+    Fetch many orders by orderId concurrently
+
+    Returns:
+        dict: {order_id: order dict | None (not found) | Exception (failed)}
+    """
+    if not api_key or not api_secret:
+        api_key, api_secret = get_shipstation_credentials()
+    order_ids = list(dict.fromkeys(order_ids))
+    results = map_concurrently(get_order_async, order_ids, api_key, api_secret, use_cache=use_cache)
+    return dict(zip(order_ids, results))
+
+
+def find_orders_by_numbers(order_numbers: Iterable[str], api_key: str = None,
+                           api_secret: str = None) -> Dict[str, Any]:
+    """
+    Look up many order numbers concurrently (one orderNumber= query each)
+
+    Returns:
+        dict: {order_number: [orders] | Exception (failed)}
+    """
+    if not api_key or not api_secret:
+        api_key, api_secret = get_shipstation_credentials()
+    order_numbers = list(dict.fromkeys(order_numbers))
+    results = map_concurrently(find_orders_by_number_async, order_numbers, api_key, api_secret)
+    return dict(zip(order_numbers, results))
@@ -3,11 +3,12 @@
 ShipStation Metrics Refresher
 Auto-refreshes ShipStation metrics cache to prevent stale data
 """
-import requests
 from requests.auth import HTTPBasicAuth
 from src.services.shipstation.api_client import get_shipstation_credentials
 from src.services.database.pg_utils import get_connection
 from config.settings import settings
+from utils.api_utils import get_http_session
+from utils import rate_governor
 
 
 def refresh_shipstation_metrics():
@@ -29,12 +30,14 @@ def refresh_shipstation_metrics():
         'pageSize': 500
     }
     
-    response = requests.get(
+    rate_governor.acquire()
+    response = get_http_session().get(
         url,
         auth=HTTPBasicAuth(api_key, api_secret),
         params=params,
         timeout=30
     )
+    rate_governor.record_response(response.headers, response.status_code)
     
     if response.status_code != 200:
         raise Exception(f'ShipStation API error: {response.status_code}')
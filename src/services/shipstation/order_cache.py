@@ -0,0 +1,179 @@
+# filename: src/services/shipstation/order_cache.py
+"""
+Bounded TTL/LRU cache for single-order ShipStation fetches (GET /orders/{id}).
+
+Admin lookup, ghost-order backfill and the relink flows often fetch the same
+order several times within a few minutes. Entries are keyed by orderId and
+remember the order's modifyDate; they are dropped when:
+- the TTL expires (SHIPSTATION_ORDER_CACHE_TTL, default 300s)
+- the order is deleted through delete_order_from_shipstation
+- the unified sync's watermark feed sees the order change. The sync publishes
+  the changed orderIds on the shipstation_orders_changed channel, so caches in
+  other processes (e.g. the dashboard) are invalidated too.
+
+The cache is per process; get_order_cache_stats() exposes hit/miss counters.
+"""
+import os
+import copy
+import time
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ORDER_CACHE_SIZE = int(os.getenv('SHIPSTATION_ORDER_CACHE_SIZE', '256'))
+ORDER_CACHE_TTL_SECONDS = float(os.getenv('SHIPSTATION_ORDER_CACHE_TTL', '300'))
+# pg_notify payloads are capped at 8000 bytes - 'orderId@modifyDate' pairs are ~40 bytes
+NOTIFY_IDS_PER_MESSAGE = 150
+
+
+class OrderCache:
+    """LRU of ShipStation order JSON with a TTL; thread-safe"""
+
+    def __init__(self, maxsize: int = ORDER_CACHE_SIZE, ttl_seconds: float = ORDER_CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # order_id -> (stored_at, modify_date, order)
+        self._lock = threading.Lock()
+        self._stats = {'hits': 0, 'misses': 0, 'expired': 0, 'evictions': 0, 'invalidations': 0}
+
+    def get(self, order_id) -> Optional[Dict[str, Any]]:
+        """Cached order (a copy - callers may mutate it) or None"""
+        try:
+            key = int(order_id)
+        except (TypeError, ValueError):
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return None
+            stored_at, _, order = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                self._stats['expired'] += 1
+                self._stats['misses'] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats['hits'] += 1
+            return copy.deepcopy(order)
+
+    def put(self, order: Dict[str, Any]):
+        if not order or not order.get('orderId') or self.maxsize <= 0:
+            return
+        key = int(order['orderId'])
+        with self._lock:
+            self._entries[key] = (time.monotonic(), order.get('modifyDate'), copy.deepcopy(order))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def invalidate(self, order_id, modify_date: str = None) -> bool:
+        """
+        Drop an entry. With modify_date, keep it if it already reflects that
+        modification (the cached copy is at least as new).
+        """
+        try:
+            key = int(order_id)
+        except (TypeError, ValueError):
+            return False
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            if modify_date and entry[1] and entry[1] >= modify_date:
+                return False
+            del self._entries[key]
+            self._stats['invalidations'] += 1
+            return True
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._stats)
+            stats['size'] = len(self._entries)
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_rate'] = round(stats['hits'] / lookups, 3) if lookups else None
+        stats['maxsize'] = self.maxsize
+        stats['ttl_seconds'] = self.ttl_seconds
+        return stats
+
+
+_order_cache = OrderCache()
+_subscribed_pid = None
+
+
+def _on_orders_changed(channel: str, payload: str):
+    for change in (payload or '').split(','):
+        order_id, _, modify_date = change.strip().partition('@')
+        if order_id:
+            _order_cache.invalidate(order_id, modify_date or None)
+
+
+def _ensure_subscribed():
+    """Listen for cross-process invalidations once per process (no-op without the event bus)"""
+    global _subscribed_pid
+    if _subscribed_pid == os.getpid():
+        return
+    _subscribed_pid = os.getpid()
+    try:
+        from src.services.database.event_bus import subscribe, SHIPSTATION_ORDERS_CHANGED
+        subscribe(SHIPSTATION_ORDERS_CHANGED, _on_orders_changed)
+    except Exception as e:
+        # Cloud entry points run without a database - the TTL still bounds staleness
+        logger.debug(f"Order cache running without cross-process invalidation: {e}")
+
+
+def get_cached_order(order_id) -> Optional[Dict[str, Any]]:
+    _ensure_subscribed()
+    return _order_cache.get(order_id)
+
+
+def cache_order(order: Dict[str, Any]):
+    _order_cache.put(order)
+
+
+def invalidate_cached_order(order_id, modify_date: str = None) -> bool:
+    return _order_cache.invalidate(order_id, modify_date)
+
+
+def publish_orders_changed(changes: Iterable[Tuple[Any, Optional[str]]], conn=None) -> int:
+    """
+    Invalidate changed orders here and in every other process's cache
+
+    Entries already holding that modifyDate (or a newer one) are kept.
+
+    Args:
+        changes: (orderId, modifyDate) pairs seen in the ShipStation feed
+        conn: Optional connection - notifications are delivered when it commits
+
+    Returns:
+        int: Number of orders published
+    """
+    latest = {}
+    for order_id, modify_date in changes:
+        if order_id:
+            latest[str(order_id)] = max(latest.get(str(order_id)) or '', modify_date or '')
+    for order_id, modify_date in latest.items():
+        _order_cache.invalidate(order_id, modify_date or None)
+    if not latest:
+        return 0
+    entries = [f"{order_id}@{modify_date}" if modify_date else order_id for order_id, modify_date in sorted(latest.items())]
+    try:
+        from src.services.database.event_bus import publish, SHIPSTATION_ORDERS_CHANGED
+        for start in range(0, len(entries), NOTIFY_IDS_PER_MESSAGE):
+            publish(SHIPSTATION_ORDERS_CHANGED, ','.join(entries[start:start + NOTIFY_IDS_PER_MESSAGE]), conn=conn)
+    except Exception as e:
+        logger.warning(f"⚠️ Could not publish order cache invalidations: {e}")
+    return len(latest)
+
+
+def get_order_cache_stats() -> dict:
+    """Hit/miss/eviction counters for this process's single-order cache"""
+    return _order_cache.stats()
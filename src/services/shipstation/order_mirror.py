@@ -0,0 +1,390 @@
+# filename: src/services/shipstation/order_mirror.py
+"""
+Local mirror of ShipStation orders (shipstation_orders_mirror + items).
+
+The duplicate scanner, lot-mismatch scanner, order comparison and upload
+duplicate checks used to re-download overlapping 30-180 day slices of
+/orders. They now read these tables instead, and the mirror is kept current
+incrementally:
+
+- refresh_order_mirror(): pulls only orders modified since the mirror's
+  modifyDate watermark (sync_watermark row 'shipstation-orders-mirror') -
+  usually a single page.
+- reconcile_order_mirror(): re-lists the whole seed window (default 180 days
+  by createDate). Seeds an empty mirror, prunes orders that were deleted in
+  ShipStation (deletions never show up in a modifyDate feed) and drops rows
+  that aged out of the window. Runs every few hours, not every scan.
+
+Orders the dashboard deletes are recorded in deleted_shipstation_orders and
+are excluded from every read immediately.
+"""
+import os
+import sys
+import json
+import logging
+import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import psycopg2.extras
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from config import settings
+from src.services.database.pg_utils import execute_query, iter_query, transaction_with_retry
+from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers
+from src.services.shipstation.paginator import iter_pages, PaginationError
+
+logger = logging.getLogger(__name__)
+
+MIRROR_WORKFLOW = 'shipstation-orders-mirror'
+MIRROR_RECONCILE_WORKFLOW = 'shipstation-orders-mirror-reconcile'
+MIRROR_SEED_DAYS = int(os.getenv('SHIPSTATION_MIRROR_SEED_DAYS', '180'))
+MIRROR_RECONCILE_HOURS = float(os.getenv('SHIPSTATION_MIRROR_RECONCILE_HOURS', '6'))
+# Re-read a little before the watermark so orders modified mid-fetch are not missed
+MIRROR_OVERLAP_SECONDS = 120
+
+SS_DATE_FORMAT = '%Y-%m-%dT%H:%M:%S'
+
+_ORDER_COLUMNS = (
+    'shipstation_order_id', 'order_number', 'order_key', 'order_status', 'order_date',
+    'create_date', 'modify_date', 'ship_name', 'ship_company', 'order_total', 'order_json'
+)
+_ITEM_COLUMNS = (
+    'shipstation_order_id', 'line_number', 'order_item_id', 'line_item_key',
+    'sku', 'base_sku', 'lot', 'quantity'
+)
+
+
+def split_sku_lot(sku_raw: str) -> Tuple[str, Optional[str]]:
+    """Split a ShipStation 'SKU - LOT' string into (base_sku, lot)"""
+    sku_raw = (sku_raw or '').strip()
+    if ' - ' in sku_raw:
+        parts = sku_raw.split(' - ')
+        return parts[0].strip(), (parts[1].strip() or None)
+    return sku_raw, None
+
+
+def _order_row(order: Dict[str, Any]) -> tuple:
+    ship_to = order.get('shipTo') or {}
+    return (
+        int(order['orderId']),
+        (order.get('orderNumber') or '').strip(),
+        order.get('orderKey'),
+        order.get('orderStatus'),
+        order.get('orderDate'),
+        order.get('createDate'),
+        order.get('modifyDate'),
+        ship_to.get('name'),
+        ship_to.get('company'),
+        order.get('orderTotal'),
+        json.dumps(order),
+    )
+
+
+def _item_rows(order: Dict[str, Any]) -> List[tuple]:
+    rows = []
+    for line_number, item in enumerate(order.get('items') or [], start=1):
+        base_sku, lot = split_sku_lot(str(item.get('sku') or ''))
+        rows.append((
+            int(order['orderId']),
+            line_number,
+            item.get('orderItemId'),
+            item.get('lineItemKey'),
+            item.get('sku'),
+            base_sku,
+            lot,
+            int(item.get('quantity') or 0),
+        ))
+    return rows
+
+
+def upsert_mirror_orders(orders: Iterable[Dict[str, Any]], conn) -> int:
+    """
+    Write a batch of ShipStation orders (and their items) into the mirror
+
+    Args:
+        orders: ShipStation order dicts (one API page)
+        conn: Database connection (caller owns the transaction)
+
+    Returns:
+        int: Number of orders written
+    """
+    by_id = {}
+    for order in orders:
+        if order.get('orderId'):
+            by_id[int(order['orderId'])] = order  # ON CONFLICT cannot touch a row twice
+    if not by_id:
+        return 0
+
+    cursor = conn.cursor()
+    psycopg2.extras.execute_values(cursor, f"""
+        INSERT INTO shipstation_orders_mirror ({', '.join(_ORDER_COLUMNS)})
+        VALUES %s
+        ON CONFLICT (shipstation_order_id) DO UPDATE SET
+            {', '.join(f'{c} = EXCLUDED.{c}' for c in _ORDER_COLUMNS[1:])},
+            mirrored_at = CURRENT_TIMESTAMP
+    """, [_order_row(o) for o in by_id.values()])
+
+    # Items are replaced wholesale - line items can be added/removed in ShipStation
+    cursor.execute(
+        "DELETE FROM shipstation_order_items_mirror WHERE shipstation_order_id = ANY(%s)",
+        (list(by_id.keys()),)
+    )
+    item_rows = [row for o in by_id.values() for row in _item_rows(o)]
+    if item_rows:
+        psycopg2.extras.execute_values(cursor, f"""
+            INSERT INTO shipstation_order_items_mirror ({', '.join(_ITEM_COLUMNS)})
+            VALUES %s
+        """, item_rows)
+    cursor.close()
+    return len(by_id)
+
+
+def _get_state(name: str) -> Optional[Tuple[str, Optional[float]]]:
+    """Return (value, seconds since last update) for a mirror watermark row, or None"""
+    rows = execute_query("""
+        SELECT last_sync_timestamp,
+               EXTRACT(EPOCH FROM (NOW() - updated_at::timestamptz))
+        FROM sync_watermark
+        WHERE workflow_name = %s
+    """, (name,))
+    if not rows:
+        return None
+    value, age = rows[0]
+    return value, (float(age) if age is not None else None)
+
+
+def _set_state(name: str, value: str, conn, keep_greatest: bool = False):
+    """Write a mirror watermark row (keep_greatest: never move it backwards)"""
+    new_value = "GREATEST(sync_watermark.last_sync_timestamp, EXCLUDED.last_sync_timestamp)" if keep_greatest \
+        else "EXCLUDED.last_sync_timestamp"
+    cursor = conn.cursor()
+    cursor.execute(f"""
+        INSERT INTO sync_watermark (workflow_name, last_sync_timestamp)
+        VALUES (%s, %s)
+        ON CONFLICT(workflow_name) DO UPDATE SET
+            last_sync_timestamp = {new_value},
+            updated_at = CURRENT_TIMESTAMP
+    """, (name, value))
+    cursor.close()
+
+
+def _watermark_floor(watermark: str) -> str:
+    """modifyDateStart for an incremental pull: the watermark minus a small overlap"""
+    try:
+        parsed = datetime.datetime.strptime(watermark[:19], SS_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return watermark
+    return (parsed - datetime.timedelta(seconds=MIRROR_OVERLAP_SECONDS)).strftime(SS_DATE_FORMAT)
+
+
+def _stream_into_mirror(api_key: str, api_secret: str, params: dict, label: str) -> dict:
+    """Fetch every page for params and upsert each page in its own transaction"""
+    headers = get_shipstation_headers(api_key, api_secret)
+    result = {'orders': 0, 'pages': 0, 'max_modify_date': None, 'seen_ids': set(), 'complete': True}
+    try:
+        for _, _, orders in iter_pages(settings.SHIPSTATION_ORDERS_ENDPOINT, headers, params, 'orders', label=label):
+            with transaction_with_retry() as conn:
+                result['orders'] += upsert_mirror_orders(orders, conn)
+            result['pages'] += 1
+            for order in orders:
+                if order.get('orderId'):
+                    result['seen_ids'].add(int(order['orderId']))
+                modify_date = order.get('modifyDate')
+                if modify_date and (result['max_modify_date'] is None or modify_date > result['max_modify_date']):
+                    result['max_modify_date'] = modify_date
+    except PaginationError as e:
+        logger.error(f"❌ Order mirror {label}: {e} - mirror updated with {result['orders']} orders only")
+        result['complete'] = False
+    return result
+
+
+def refresh_order_mirror(api_key: str = None, api_secret: str = None, max_age_seconds: float = 0) -> dict:
+    """
+    Pull orders modified since the mirror watermark into the mirror
+
+    Seeds the mirror with a full reconcile if it has never been filled.
+
+    Args:
+        api_key: ShipStation API key (default: from secrets)
+        api_secret: ShipStation API secret
+        max_age_seconds: Skip the API call if the mirror was refreshed this recently
+
+    Returns:
+        dict: {'refreshed', 'orders', 'pages', 'complete'}
+    """
+    state = _get_state(MIRROR_WORKFLOW)
+    if state is None:
+        logger.info("🪞 Order mirror is empty - seeding from a full reconcile")
+        return reconcile_order_mirror(api_key, api_secret)
+
+    watermark, age = state
+    if age is not None and age < max_age_seconds:
+        return {'refreshed': False, 'orders': 0, 'pages': 0, 'complete': True}
+
+    if not api_key or not api_secret:
+        api_key, api_secret = get_shipstation_credentials()
+
+    params = {'modifyDateStart': _watermark_floor(watermark), 'pageSize': 500}
+    result = _stream_into_mirror(api_key, api_secret, params, 'Order mirror refresh')
+
+    if result['complete']:
+        # Stamp even when nothing changed - updated_at is the freshness marker
+        with transaction_with_retry() as conn:
+            _set_state(MIRROR_WORKFLOW, result['max_modify_date'] or watermark, conn, keep_greatest=True)
+
+    if result['orders']:
+        logger.info(f"🪞 Order mirror refreshed: {result['orders']} orders modified since {watermark}")
+    return {'refreshed': True, 'orders': result['orders'], 'pages': result['pages'], 'complete': result['complete']}
+
+
+def reconcile_order_mirror(api_key: str = None, api_secret: str = None, days: int = MIRROR_SEED_DAYS) -> dict:
+    """
+    Re-list the whole mirror window from ShipStation and prune what is gone
+
+    Rows in the window that ShipStation no longer returns (deleted orders) and
+    rows older than the window are removed. Nothing is pruned unless every
+    page was fetched.
+
+    Returns:
+        dict: {'refreshed', 'orders', 'pages', 'pruned', 'complete'}
+    """
+    if not api_key or not api_secret:
+        api_key, api_secret = get_shipstation_credentials()
+
+    window_start = (datetime.datetime.now() - datetime.timedelta(days=days)).strftime(SS_DATE_FORMAT)
+    reconcile_started = execute_query("SELECT CURRENT_TIMESTAMP")[0][0]
+
+    params = {'createDateStart': window_start, 'pageSize': 500}
+    result = _stream_into_mirror(api_key, api_secret, params, 'Order mirror reconcile')
+
+    pruned = 0
+    if result['complete']:
+        with transaction_with_retry() as conn:
+            cursor = conn.cursor()
+            # Rows touched by a concurrent refresh after we started are kept
+            cursor.execute("""
+                DELETE FROM shipstation_orders_mirror
+                WHERE mirrored_at < %s
+                  AND (create_date < %s OR NOT (shipstation_order_id = ANY(%s)))
+            """, (reconcile_started, window_start, list(result['seen_ids'])))
+            pruned = cursor.rowcount
+            cursor.close()
+            _set_state(MIRROR_RECONCILE_WORKFLOW, window_start, conn)
+            _set_state(MIRROR_WORKFLOW, result['max_modify_date'] or window_start, conn, keep_greatest=True)
+        logger.info(f"🪞 Order mirror reconciled: {result['orders']} orders in window, {pruned} pruned")
+
+    return {'refreshed': True, 'orders': result['orders'], 'pages': result['pages'],
+            'pruned': pruned, 'complete': result['complete']}
+
+
+def ensure_order_mirror(api_key: str = None, api_secret: str = None, max_age_seconds: float = 0,
+                        allow_reconcile: bool = False) -> bool:
+    """
+    Bring the mirror up to date before reading it
+
+    Args:
+        max_age_seconds: Accept a refresh this recent without calling the API
+        allow_reconcile: Also run the periodic full reconcile if it is due
+            (background callers only - it re-lists the whole window)
+
+    Returns:
+        bool: True if the mirror is current and safe to read; False means the
+        caller should fall back to the ShipStation API
+    """
+    try:
+        result = refresh_order_mirror(api_key, api_secret, max_age_seconds)
+        if not result['complete']:
+            return False
+        if allow_reconcile:
+            state = _get_state(MIRROR_RECONCILE_WORKFLOW)
+            if state is None or state[1] is None or state[1] > MIRROR_RECONCILE_HOURS * 3600:
+                result = reconcile_order_mirror(api_key, api_secret)
+        return result['complete']
+    except Exception as e:
+        logger.error(f"❌ Order mirror unavailable: {e}", exc_info=True)
+        return False
+
+
+def get_mirror_coverage_start() -> Optional[datetime.datetime]:
+    """Earliest createDate the mirror is complete from (None if never reconciled)"""
+    state = _get_state(MIRROR_RECONCILE_WORKFLOW)
+    if state is None:
+        return None
+    try:
+        return datetime.datetime.strptime(state[0][:19], SS_DATE_FORMAT)
+    except (TypeError, ValueError):
+        return None
+
+
+_NOT_DELETED = """
+    NOT EXISTS (
+        SELECT 1 FROM deleted_shipstation_orders d
+        WHERE d.shipstation_order_id = m.shipstation_order_id
+    )
+"""
+
+
+def iter_mirror_orders(create_date_start: str = None, create_date_end: str = None,
+                       order_status: str = None, modify_date_start: str = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream mirrored orders (ShipStation JSON) matching the filters
+
+    Orders recorded in deleted_shipstation_orders are excluded.
+    """
+    conditions = [_NOT_DELETED]
+    params = []
+    if create_date_start:
+        conditions.append("m.create_date >= %s")
+        params.append(create_date_start)
+    if create_date_end:
+        conditions.append("m.create_date <= %s")
+        params.append(create_date_end)
+    if order_status:
+        conditions.append("m.order_status = %s")
+        params.append(order_status)
+    if modify_date_start:
+        conditions.append("m.modify_date >= %s")
+        params.append(modify_date_start)
+
+    sql = f"""
+        SELECT m.order_json
+        FROM shipstation_orders_mirror m
+        WHERE {' AND '.join(conditions)}
+        ORDER BY m.create_date, m.shipstation_order_id
+    """
+    for (order_json,) in iter_query(sql, tuple(params)):
+        yield order_json if isinstance(order_json, dict) else json.loads(order_json)
+
+
+def find_mirror_orders_by_numbers(order_numbers: Iterable[str]) -> List[Dict[str, Any]]:
+    """Mirrored orders (ShipStation JSON) whose orderNumber matches, case-insensitively"""
+    numbers = sorted({str(n).strip().upper() for n in order_numbers if n})
+    if not numbers:
+        return []
+    rows = execute_query(f"""
+        SELECT m.order_json
+        FROM shipstation_orders_mirror m
+        WHERE UPPER(m.order_number) = ANY(%s)
+          AND {_NOT_DELETED}
+    """, (numbers,))
+    return [r[0] if isinstance(r[0], dict) else json.loads(r[0]) for r in rows]
+
+
+def get_mirror_status() -> dict:
+    """Mirror size and freshness (for /health and debugging)"""
+    try:
+        count = execute_query("SELECT COUNT(*) FROM shipstation_orders_mirror")[0][0]
+        refresh = _get_state(MIRROR_WORKFLOW)
+        reconcile = _get_state(MIRROR_RECONCILE_WORKFLOW)
+        return {
+            'orders': count,
+            'watermark': refresh[0] if refresh else None,
+            'refreshed_seconds_ago': round(refresh[1]) if refresh and refresh[1] is not None else None,
+            'coverage_start': reconcile[0] if reconcile else None,
+            'reconciled_seconds_ago': round(reconcile[1]) if reconcile and reconcile[1] is not None else None,
+        }
+    except Exception as e:
+        return {'error': str(e)}
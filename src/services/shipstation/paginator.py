@@ -0,0 +1,136 @@
+# filename: src/services/shipstation/paginator.py
+"""
+Concurrent paginator for ShipStation list endpoints (/orders, /shipments).
+
+Page 1 is fetched first to learn `pages`; the remaining pages are fetched by a
+bounded thread pool and handed back strictly in page order. Every request still
+goes through make_api_request, so retries and the shared rate governor apply -
+the pool only overlaps request latency, it never exceeds the quota.
+
+If a page fails, the pages before it are still delivered (the same contiguous
+prefix the old one-page-at-a-time loops returned) and the fetch is reported as
+incomplete.
+"""
+import os
+import sys
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Tuple
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+if project_root not in sys.path:
+    sys.path.insert(0, project_root)
+
+from utils.api_utils import make_api_request
+from utils.rate_governor import api_workflow, get_api_workflow
+
+logger = logging.getLogger(__name__)
+
+PAGE_WORKERS = int(os.getenv('SHIPSTATION_PAGE_WORKERS', '4'))
+
+
+class PaginationError(Exception):
+    """A page could not be fetched; pages before it were already yielded"""
+
+    def __init__(self, message: str, page: int, status_code: int = None):
+        super().__init__(message)
+        self.page = page
+        self.status_code = status_code
+
+
+def _fetch_page(url: str, headers: dict, params: dict, page: int, result_key: str,
+                timeout: int, workflow: str) -> Tuple[List[Dict[str, Any]], int]:
+    """Fetch one page; returns (items, total_pages)"""
+    page_params = dict(params)
+    page_params['page'] = page
+    # Pool threads do not inherit the caller's thread-local workflow attribution
+    with api_workflow(workflow):
+        response = make_api_request(url=url, method='GET', headers=headers, params=page_params, timeout=timeout)
+    if not response or response.status_code != 200:
+        status = response.status_code if response is not None else None
+        raise PaginationError(f"Page {page} failed with status {status or 'N/A'}", page, status)
+    data = response.json()
+    return data.get(result_key, []), int(data.get('pages', 1) or 0)
+
+
+def iter_pages(url: str, headers: dict, params: dict, result_key: str,
+               start_page: int = 1, max_workers: int = None, timeout: int = 30,
+               label: str = '') -> Iterator[Tuple[int, int, List[Dict[str, Any]]]]:
+    """
+    Yield (page, total_pages, items) for every page, in page order
+
+    Args:
+        url: List endpoint (e.g. SHIPSTATION_ORDERS_ENDPOINT)
+        headers: Auth headers
+        params: Query params (page is managed here)
+        result_key: 'orders' or 'shipments'
+        start_page: First page to fetch
+        max_workers: Concurrent page requests after the first (default SHIPSTATION_PAGE_WORKERS)
+        timeout: Per-request timeout in seconds
+        label: Name used in log lines
+
+    Raises:
+        PaginationError: A page returned a non-200 status or raised; earlier pages were yielded
+    """
+    workers = max(1, max_workers or PAGE_WORKERS)
+    workflow = get_api_workflow()
+
+    items, total_pages = _fetch_page(url, headers, params, start_page, result_key, timeout, workflow)
+    logger.info(f"📄 {label or result_key} page {start_page}/{total_pages}: {len(items)} {result_key}")
+    yield start_page, total_pages, items
+
+    remaining = list(range(start_page + 1, total_pages + 1))
+    if not remaining:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(remaining)), thread_name_prefix='ss-page') as pool:
+        # Bounded window of in-flight pages so a huge scan does not buffer everything
+        window = workers * 2
+        futures = {}
+        next_submit = 0
+
+        def submit_more():
+            nonlocal next_submit
+            while next_submit < len(remaining) and len(futures) < window:
+                page = remaining[next_submit]
+                futures[page] = pool.submit(_fetch_page, url, headers, params, page, result_key, timeout, workflow)
+                next_submit += 1
+
+        submit_more()
+        try:
+            for page in remaining:
+                try:
+                    page_items, _ = futures.pop(page).result()
+                except PaginationError:
+                    raise
+                except Exception as e:
+                    raise PaginationError(f"Page {page} failed: {e}", page) from e
+                logger.info(f"📄 {label or result_key} page {page}/{total_pages}: {len(page_items)} {result_key}")
+                yield page, total_pages, page_items
+                submit_more()
+        finally:
+            for future in futures.values():
+                future.cancel()
+
+
+def fetch_all_pages(url: str, headers: dict, params: dict, result_key: str,
+                    start_page: int = 1, max_workers: int = None, timeout: int = 30,
+                    label: str = '') -> Tuple[List[Dict[str, Any]], bool]:
+    """
+    Fetch every page and merge them in order
+
+    Returns:
+        (items, complete): complete is False if a later page failed, in which
+        case items holds the contiguous pages that did succeed. A failure on the
+        first page is raised (PaginationError or the request exception).
+    """
+    all_items = []
+    try:
+        for page, _, items in iter_pages(url, headers, params, result_key, start_page, max_workers, timeout, label):
+            all_items.extend(items)
+    except PaginationError as e:
+        if e.page == start_page:
+            raise
+        logger.error(f"❌ {label or result_key}: {e} - returning {len(all_items)} {result_key} from earlier pages")
+        return all_items, False
+    return all_items, True
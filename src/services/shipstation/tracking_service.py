@@ -13,7 +13,8 @@ Tracking Status Codes:
 import logging
 import os
 import sys
-from datetime import datetime
+from datetime import datetime, date, timedelta
+from typing import Dict, Iterable
 import pytz
 import requests
 
@@ -22,8 +23,10 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..
 if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
-from src.services.shipstation.api_client import get_shipstation_headers
+from src.services.shipstation.api_client import get_shipstation_headers, iter_shipments
+from src.services.shipstation.paginator import PaginationError
 from utils.api_utils import make_api_request
+from config.settings import SHIPSTATION_SHIPMENTS_ENDPOINT
 
 # --- Logging Setup ---
 logger = logging.getLogger('shipstation_tracking')
@@ -36,7 +39,6 @@ logger.addHandler(handler)
 logger.propagate = False
 
 # --- Constants ---
-SHIPSTATION_SHIPMENTS_ENDPOINT = "https://ssapi.shipstation.com/shipments"
 
 # Status codes
 STATUS_UNKNOWN = 'UN'
@@ -51,6 +53,10 @@ FINAL_STATUSES = [STATUS_DELIVERED]
 # Active statuses (keep tracking)
 ACTIVE_STATUSES = [STATUS_UNKNOWN, STATUS_ACCEPTED, STATUS_IN_TRANSIT, STATUS_EXCEPTION]
 
+# Batched refresh: one /shipments ship-date window instead of one request per tracking number
+TRACKING_WINDOW_MAX_DAYS = 30  # Window never reaches further back; older orders fall back to per-number lookups
+TRACKING_BATCH_MIN_ORDERS = 5  # Below this, per-number lookups are cheaper than paging a window
+
 
 def is_business_hours() -> bool:
     """
@@ -176,27 +182,11 @@ def fetch_tracking_status(tracking_number: str, carrier_code: str, api_key: str,
                 }
             
             # Get first shipment (should be only one matching tracking number)
-            shipment = shipments[0]
-            shipstation_status = shipment.get('trackingStatus', '').lower()
-            
-            # Map ShipStation status to our standardized codes
-            status_code, status_description = map_shipstation_status_to_code(shipstation_status)
-            
-            # Check for exception description (if status indicates problem)
-            exception_description = None
-            if status_code == STATUS_EXCEPTION:
-                # ShipStation may provide additional details in void status or notes
-                exception_description = shipment.get('voidStatus') or 'Delivery exception'
+            tracking_data = tracking_data_from_shipment(shipments[0])
             
-            logger.info(f"✅ Tracking {tracking_number}: {status_code} ({status_description}) [ShipStation: {shipstation_status}]")
+            logger.info(f"✅ Tracking {tracking_number}: {tracking_data['status_code']} ({tracking_data['status_description']}) [ShipStation: {shipments[0].get('trackingStatus', '').lower()}]")
             
-            return {
-                'status_code': status_code,
-                'status_description': status_description,
-                'exception_description': exception_description,
-                'success': True,
-                'error': None
-            }
+            return tracking_data
             
         elif response and response.status_code == 429:
             # Rate limit exceeded
@@ -230,6 +220,87 @@ def fetch_tracking_status(tracking_number: str, carrier_code: str, api_key: str,
         }
 
 
+def tracking_data_from_shipment(shipment: dict) -> dict:
+    """
+    Build the tracking result for a ShipStation shipment (same shape as fetch_tracking_status).
+    """
+    shipstation_status = (shipment.get('trackingStatus') or '').lower()
+    
+    # Map ShipStation status to our standardized codes
+    status_code, status_description = map_shipstation_status_to_code(shipstation_status)
+    
+    # Check for exception description (if status indicates problem)
+    exception_description = None
+    if status_code == STATUS_EXCEPTION:
+        # ShipStation may provide additional details in void status or notes
+        exception_description = shipment.get('voidStatus') or 'Delivery exception'
+    
+    return {
+        'status_code': status_code,
+        'status_description': status_description,
+        'exception_description': exception_description,
+        'success': True,
+        'error': None
+    }
+
+
+def tracking_window_start(order_dates: Iterable) -> date:
+    """
+    First ship date to page through for a set of orders.
+    
+    An order cannot ship before it was placed, so the earliest order date covers
+    them all; the window is capped at TRACKING_WINDOW_MAX_DAYS.
+    """
+    floor = date.today() - timedelta(days=TRACKING_WINDOW_MAX_DAYS)
+    dates = [d.date() if isinstance(d, datetime) else d for d in order_dates if d]
+    return max(min(dates), floor) if dates else floor
+
+
+def fetch_tracking_statuses_for_window(tracking_numbers: Iterable[str], ship_date_start: date,
+                                       api_key: str, api_secret: str) -> Dict[str, dict]:
+    """
+    Look up many tracking numbers with one paginated /shipments ship-date window.
+    
+    Args:
+        tracking_numbers: Tracking numbers to resolve
+        ship_date_start: First ship date of the window (see tracking_window_start)
+        api_key: ShipStation API key
+        api_secret: ShipStation API secret
+    
+    Returns:
+        dict: {tracking_number: tracking data} for the numbers found in the window.
+              Numbers that are missing (shipped earlier, not labelled yet, or a page
+              failed) are left for per-number lookups.
+    """
+    wanted = {t for t in tracking_numbers if t}
+    if not wanted:
+        return {}
+    
+    params = {
+        'shipDateStart': ship_date_start.strftime('%Y-%m-%d'),
+        'pageSize': 500
+    }
+    matches = {}
+    scanned = 0
+    try:
+        for shipment in iter_shipments(api_key, api_secret, params, label='Tracking window'):
+            scanned += 1
+            tracking_number = (shipment.get('trackingNumber') or '').strip()
+            if tracking_number not in wanted:
+                continue
+            # Re-labelled shipments can share a number: prefer the live, most recent one
+            rank = (not shipment.get('voided'), shipment.get('createDate') or '')
+            if tracking_number not in matches or rank > matches[tracking_number][0]:
+                matches[tracking_number] = (rank, shipment)
+    except PaginationError as e:
+        logger.warning(f"⚠️ Tracking window fetch failed part-way ({e}) - using {len(matches)} matches from earlier pages")
+    except Exception as e:
+        logger.error(f"❌ Error fetching tracking window from {params['shipDateStart']}: {e}", exc_info=True)
+    
+    logger.info(f"📦 Tracking window since {params['shipDateStart']}: {scanned} shipments scanned, {len(matches)}/{len(wanted)} tracking numbers matched")
+    return {tracking_number: tracking_data_from_shipment(shipment) for tracking_number, (_, shipment) in matches.items()}
+
+
 def map_shipstation_status_to_code(shipstation_status: str) -> tuple:
     """
     Map ShipStation tracking status to our standardized status codes.
@@ -378,6 +449,51 @@ def update_order_tracking_status(order_number: str, tracking_data: dict, conn):
         raise
 
 
+def update_order_tracking_statuses_bulk(updates: Dict[str, dict], conn) -> int:
+    """
+    Apply many tracking results with one UPDATE ... FROM (VALUES ...).
+    
+    Same rules as update_order_tracking_status (only orders with a synced
+    ShipStation ID; tracking_last_updated moves only when the status changes),
+    but runs inside the caller's transaction - nothing is committed here.
+    
+    Args:
+        updates: {order_number: tracking data}
+        conn: Database connection (transaction context)
+    
+    Returns:
+        int: Number of orders updated
+    """
+    if not updates:
+        return 0
+    
+    import psycopg2.extras
+    
+    cursor = conn.cursor()
+    psycopg2.extras.execute_values(cursor, """
+        UPDATE orders_inbox AS o
+        SET tracking_status = v.status_code,
+            tracking_status_description = v.status_description,
+            exception_description = v.exception_description,
+            tracking_last_checked = NOW(),
+            tracking_last_updated = CASE
+                WHEN o.tracking_status IS DISTINCT FROM v.status_code THEN NOW()
+                ELSE o.tracking_last_updated
+            END
+        FROM (VALUES %s) AS v(order_number, status_code, status_description, exception_description)
+        WHERE o.order_number = v.order_number
+          AND o.shipstation_order_id IS NOT NULL
+    """, [
+        (order_number, data.get('status_code'), data.get('status_description'), data.get('exception_description'))
+        for order_number, data in updates.items()
+    ], template="(%s::TEXT, %s::TEXT, %s::TEXT, %s::TEXT)", page_size=len(updates))
+    updated = cursor.rowcount
+    cursor.close()
+    
+    logger.debug(f"Updated tracking status for {updated} orders in one batch")
+    return updated
+
+
 def get_tracking_status_icon(status_code: str) -> str:
     """
     Get emoji icon for tracking status code.
@@ -6,7 +6,6 @@ Automatically refreshes units_to_ship metric every 5 minutes
 import os
 import sys
 import time
-import requests
 from requests.auth import HTTPBasicAuth
 from datetime import datetime
 
@@ -15,6 +14,10 @@ project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 sys.path.insert(0, project_root)
 
 from src.services.database.pg_utils import get_connection
+from src.services.database.run_lock import run_exclusive
+from utils.api_utils import get_http_session
+from utils import rate_governor
+from config.settings import SHIPSTATION_ORDERS_ENDPOINT
 
 def refresh_units_to_ship():
     """Fetch units from ShipStation and update database"""
@@ -28,17 +31,19 @@ def refresh_units_to_ship():
             return
         
         # Fetch orders from ShipStation
-        url = "https://ssapi.shipstation.com/orders"
+        url = SHIPSTATION_ORDERS_ENDPOINT
         params = {
             'orderStatus': 'awaiting_shipment',
             'pageSize': 500
         }
         
-        response = requests.get(
+        rate_governor.acquire()
+        response = get_http_session().get(
             url,
             params=params,
             auth=HTTPBasicAuth(api_key, api_secret)
         )
+        rate_governor.record_response(response.headers, response.status_code)
         
         if response.status_code == 200:
             data = response.json()
@@ -74,9 +79,15 @@ def refresh_units_to_ship():
 def main():
     """Run refresh loop every 5 minutes"""
     print(f"[{datetime.now()}] ShipStation Units Refresher started (5-minute interval)")
+    rate_governor.set_api_workflow('units-refresher')
     
     while True:
-        refresh_units_to_ship()
+        try:
+            with run_exclusive('units-refresher', min_interval_seconds=270) as lease:
+                if lease is not None:
+                    refresh_units_to_ship()
+        except Exception as e:
+            print(f"[{datetime.now()}] ERROR: {str(e)}")
         time.sleep(300)  # 5 minutes = 300 seconds
 
 if __name__ == '__main__':
@@ -19,7 +19,10 @@ import os
 import logging
 import datetime
 import time
-from typing import List, Dict, Any, Tuple
+import json
+import hashlib
+import itertools
+from typing import List, Dict, Any, Optional, Tuple, Iterable, Iterator
 
 # Add project root to path
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -29,17 +32,28 @@ if project_root not in sys.path:
 from config.settings import SHIPSTATION_ORDERS_ENDPOINT
 from utils.logging_config import setup_logging
 from utils.business_hours import is_business_hours as check_business_hours, get_sleep_until_business_hours, format_business_hours_status
-from src.services.database import execute_query, transaction_with_retry, is_workflow_enabled, update_workflow_last_run
-from src.services.shipstation.api_client import get_shipstation_credentials, get_shipstation_headers
+from src.services.database import execute_query, execute_prepared, prepared_statement, transaction_with_retry, is_workflow_enabled, update_workflow_last_run
+from src.services.database.event_bus import sleep_until_event, ORDERS_UPLOADED, WORKFLOW_CONTROLS_CHANGED
+from src.services.database.run_lock import run_exclusive
+from src.services.shipstation.api_client import get_shipstation_credentials, iter_orders, iter_shipments
 from src.services.shipstation.tracking_service import (
     is_business_hours,
     should_track_order,
     fetch_tracking_status,
     update_order_tracking_status,
-    map_carrier_to_code
+    map_carrier_to_code,
+    tracking_window_start,
+    fetch_tracking_statuses_for_window,
+    update_order_tracking_statuses_bulk,
+    TRACKING_BATCH_MIN_ORDERS
 )
 from src.services.ghost_order_backfill import backfill_ghost_orders
 from utils.api_utils import make_api_request
+from src.services.shipstation.paginator import PaginationError
+from src.services.shipstation.order_cache import publish_orders_changed
+from src.services.shipstation.async_client import find_orders_by_numbers
+from utils.rate_governor import set_api_workflow, api_workflow
+from utils.pipeline import Prefetcher
 
 # Logging setup with comprehensive output
 log_dir = os.path.join(project_root, 'logs')
@@ -50,8 +64,15 @@ logger = logging.getLogger(__name__)
 
 # Configuration
 KEY_PRODUCT_SKUS = ['17612', '17904', '17914', '18675', '18795']
-SYNC_INTERVAL_SECONDS = 300  # 5 minutes
+SYNC_INTERVAL_SECONDS = 300  # 5 minutes (fallback when no upload events arrive)
+SYNC_MIN_INTERVAL_SECONDS = 30  # Coalesce bursts of upload events into one sync
 WORKFLOW_NAME = 'unified-shipstation-sync'
+SYNC_PAGE_SIZE = 500  # Orders classified together (one ShipStation page)
+SYNC_PREFETCH_PAGES = int(os.getenv('SYNC_PREFETCH_PAGES', '2'))  # Pages fetched ahead of the page being written
+SYNC_RUN_MAX_SECONDS = int(os.getenv('SYNC_RUN_MAX_SECONDS', '240'))  # Per-run budget; a backlog resumes next run
+SYNC_RUN_MAX_ORDERS = int(os.getenv('SYNC_RUN_MAX_ORDERS', '5000'))
+TRACKING_REFRESH_LIMIT = 500  # Active orders refreshed per cycle via the shipments window
+TRACKING_STRAGGLER_LIMIT = 50  # Per-number lookups per cycle for orders the window missed
 
 
 def get_last_sync_timestamp() -> str:
@@ -106,58 +127,93 @@ def update_sync_watermark(new_timestamp: str, conn):
         raise  # Re-raise to rollback transaction
 
 
-def fetch_shipstation_orders_since_watermark(api_key: str, api_secret: str, modify_date_start: str) -> List[Dict[Any, Any]]:
+def get_feed_high_water_mark(api_key: str, api_secret: str, modify_date_start: str) -> Optional[str]:
     """
-    Fetch orders from ShipStation modified since the watermark timestamp.
-    Uses pagination to retrieve all matching orders.
+    Newest modifyDate in the watermark feed right now (None if the feed is empty).
+    
+    The sync pages the feed only up to this point: an order modified mid-run
+    would otherwise jump to the end of the ascending feed and shift every later
+    page by one, so the order at a page boundary would be missed.
     """
-    headers = get_shipstation_headers(api_key, api_secret)
-    all_orders = []
+    from src.services.shipstation.api_client import get_shipstation_headers
+    
+    response = make_api_request(
+        url=SHIPSTATION_ORDERS_ENDPOINT,
+        method='GET',
+        headers=get_shipstation_headers(api_key, api_secret),
+        params={
+            'modifyDateStart': modify_date_start,
+            'sortBy': 'ModifyDate',
+            'sortDir': 'DESC',
+            'pageSize': 1
+        },
+        timeout=30
+    )
+    orders = response.json().get('orders', [])
+    return orders[0].get('modifyDate') if orders else None
+
+
+def iter_shipstation_orders_since_watermark(api_key: str, api_secret: str, modify_date_start: str,
+                                            modify_date_end: str = None) -> Iterator[Dict[Any, Any]]:
+    """
+    Stream orders from ShipStation modified since the watermark timestamp,
+    oldest modification first - every finished page is a safe checkpoint.
+    Only one page of orders is held in memory at a time.
     
+    Raises:
+        PaginationError: A page failed (orders from earlier pages were already yielded)
+    """
     params = {
         'modifyDateStart': modify_date_start,
-        'page': 1,
-        'pageSize': 500
+        'sortBy': 'ModifyDate',
+        'sortDir': 'ASC',
+        'pageSize': SYNC_PAGE_SIZE
     }
+    if modify_date_end:
+        params['modifyDateEnd'] = modify_date_end
     
+    logger.info(f"🔄 Fetching ShipStation orders modified since {modify_date_start}")
+    return iter_orders(api_key, api_secret, params, SHIPSTATION_ORDERS_ENDPOINT, label='Watermark orders')
+
+
+def fetch_shipstation_orders_since_watermark(api_key: str, api_secret: str, modify_date_start: str) -> List[Dict[Any, Any]]:
+    """
+    Fetch orders from ShipStation modified since the watermark timestamp as a list.
+    Kept for one-off tools (backfills); the sync itself streams via
+    iter_shipstation_orders_since_watermark.
+    """
+    all_orders = []
     try:
-        logger.info(f"🔄 Fetching ShipStation orders modified since {modify_date_start}")
         fetch_start = datetime.datetime.now()
-        
-        while True:
-            response = make_api_request(
-                url=SHIPSTATION_ORDERS_ENDPOINT,
-                method='GET',
-                headers=headers,
-                params=params,
-                timeout=30
-            )
-            
-            if response and response.status_code == 200:
-                data = response.json()
-                orders_on_page = data.get('orders', [])
-                all_orders.extend(orders_on_page)
-                
-                total_pages = data.get('pages', 1)
-                current_page = data.get('page', 1)
-                
-                logger.info(f"📄 Page {current_page}/{total_pages}: {len(orders_on_page)} orders")
-                
-                if current_page >= total_pages:
-                    break
-                else:
-                    params['page'] += 1
-            else:
-                logger.error(f"❌ API fetch failed. Status: {response.status_code if response else 'N/A'}")
-                break
-        
+        all_orders.extend(iter_shipstation_orders_since_watermark(api_key, api_secret, modify_date_start))
         fetch_elapsed = (datetime.datetime.now() - fetch_start).total_seconds()
         logger.info(f"✅ Retrieved {len(all_orders)} total orders from ShipStation in {fetch_elapsed:.1f}s")
-        return all_orders
-                
+    except PaginationError as e:
+        logger.error(f"❌ API fetch failed part-way ({e}) - continuing with {len(all_orders)} orders from earlier pages")
     except Exception as e:
         logger.error(f"❌ Error fetching orders: {e}", exc_info=True)
-        return []
+    return all_orders
+
+
+# Per-order lookups run for every order on every cycle - keep their plans prepared
+_LOCAL_LINE_ITEM_EXISTS = prepared_statement('sync_local_line_item_exists', """
+    SELECT 1 FROM shipstation_order_line_items
+    WHERE shipstation_order_id = %s
+    LIMIT 1
+""")
+_ORDER_BY_NUMBER = prepared_statement('sync_order_by_number', """
+    SELECT id, shipstation_order_id FROM orders_inbox WHERE order_number = %s
+""")
+# Page-at-a-time classification: two lookups per page instead of 2-3 per order
+_PAGE_ORDERS_BY_NUMBER = prepared_statement('sync_page_orders_by_number', """
+    SELECT order_number, id, shipstation_order_id,
+           CASE WHEN shipstation_content_hash IS NOT NULL THEN status || ':' || shipstation_content_hash END
+    FROM orders_inbox WHERE order_number = ANY(%s)
+""")
+_PAGE_LOCAL_LINE_ITEMS = prepared_statement('sync_page_local_line_items', """
+    SELECT DISTINCT shipstation_order_id FROM shipstation_order_line_items
+    WHERE shipstation_order_id = ANY(%s)
+""")
 
 
 def is_order_from_local_system(shipstation_order_id: str) -> bool:
@@ -166,11 +222,7 @@ def is_order_from_local_system(shipstation_order_id: str) -> bool:
     Returns True if order was uploaded by us, False if it's a manual ShipStation order.
     """
     try:
-        rows = execute_query("""
-            SELECT 1 FROM shipstation_order_line_items
-            WHERE shipstation_order_id = %s
-            LIMIT 1
-        """, (str(shipstation_order_id),))
+        rows = execute_prepared(_LOCAL_LINE_ITEM_EXISTS, (str(shipstation_order_id),))
         
         return len(rows) > 0
         
@@ -204,62 +256,23 @@ def fetch_shipments_batch(api_key: str, api_secret: str, start_date: str, end_da
     Returns:
         List of shipment dictionaries
     """
+    params = {
+        'createDateStart': start_date,
+        'createDateEnd': end_date,
+        'pageSize': 500  # Max allowed by API
+    }
+    
+    all_shipments = []
     try:
-        from src.services.shipstation.api_client import get_shipstation_headers
-        
-        headers = get_shipstation_headers(api_key, api_secret)
-        shipments_endpoint = "https://ssapi.shipstation.com/shipments"
-        
-        params = {
-            'createDateStart': start_date,
-            'createDateEnd': end_date,
-            'pageSize': 500  # Max allowed by API
-        }
-        
-        all_shipments = []
-        page = 1
-        
-        while True:
-            params['page'] = page
-            
-            logger.debug(f"🚢 Fetching shipments page {page} (date range: {start_date} to {end_date})")
-            
-            response = make_api_request(
-                url=shipments_endpoint,
-                method='GET',
-                headers=headers,
-                params=params,
-                timeout=30
-            )
-            
-            if not response or response.status_code != 200:
-                logger.warning(f"⚠️ No response from shipments endpoint (page {page})")
-                break
-            
-            # Parse JSON response
-            data = response.json()
-            shipments = data.get('shipments', [])
-            
-            if not shipments:
-                logger.debug(f"📭 No more shipments on page {page}")
-                break
-            
-            all_shipments.extend(shipments)
-            logger.debug(f"📦 Retrieved {len(shipments)} shipments from page {page}")
-            
-            # Check if there are more pages
-            total_pages = data.get('pages', 1)
-            if page >= total_pages:
-                break
-            
-            page += 1
-        
-        logger.info(f"✅ Retrieved {len(all_shipments)} total shipments")
-        return all_shipments
-        
+        all_shipments.extend(iter_shipments(api_key, api_secret, params, label='Tracking shipments'))
+    except PaginationError as e:
+        logger.warning(f"⚠️ Shipments fetch stopped at page {e.page} - using {len(all_shipments)} shipments from earlier pages")
     except Exception as e:
         logger.error(f"❌ Error fetching shipments: {e}", exc_info=True)
         return []
+    
+    logger.info(f"✅ Retrieved {len(all_shipments)} total shipments")
+    return all_shipments
 
 
 def update_tracking_numbers(shipments: List[Dict[Any, Any]], conn) -> int:
@@ -324,9 +337,7 @@ def order_exists_locally(order_number: str, conn) -> Tuple[bool, int, str]:
     """
     try:
         cursor = conn.cursor()
-        cursor.execute("""
-            SELECT id, shipstation_order_id FROM orders_inbox WHERE order_number = %s
-        """, (order_number,))
+        _ORDER_BY_NUMBER.execute(cursor, (order_number,))
         rows = cursor.fetchall()
         
         if rows and rows[0]:
@@ -338,6 +349,166 @@ def order_exists_locally(order_number: str, conn) -> Tuple[bool, int, str]:
         return False, None, None
 
 
+def classify_sync_page(orders: List[Dict[Any, Any]], conn) -> Tuple[Dict[str, Tuple[int, Any, Any]], set]:
+    """
+    Look up a page of ShipStation orders in the local database with two queries.
+    
+    Args:
+        orders: One page of ShipStation orders
+        conn: Database connection (transaction context)
+    
+    Returns:
+        (local_by_number, local_origin_ids):
+        - local_by_number: order_number -> (orders_inbox.id, shipstation_order_id, '<status>:<content hash>')
+        - local_origin_ids: ShipStation IDs of unknown '10' orders that we uploaded ourselves
+    """
+    cursor = conn.cursor()
+    
+    order_numbers = list({(o.get('orderNumber') or '').strip() for o in orders} - {''})
+    local_by_number = {}
+    if order_numbers:
+        _PAGE_ORDERS_BY_NUMBER.execute(cursor, (order_numbers,))
+        for order_number, local_order_id, shipstation_order_id, local_state in cursor.fetchall():
+            local_by_number.setdefault(order_number, (local_order_id, shipstation_order_id, local_state))
+    
+    # Only orders that may be imported as manual need the origin check
+    candidate_ids = list({
+        str(o.get('orderId') or o.get('orderKey')) for o in orders
+        if (o.get('orderNumber') or '').strip().startswith('10')
+        and (o.get('orderNumber') or '').strip() not in local_by_number
+    })
+    local_origin_ids = set()
+    if candidate_ids:
+        _PAGE_LOCAL_LINE_ITEMS.execute(cursor, (candidate_ids,))
+        local_origin_ids = {row[0] for row in cursor.fetchall()}
+    
+    cursor.close()
+    return local_by_number, local_origin_ids
+
+
+def route_sync_order(order: Dict[Any, Any], local_by_number: Dict[str, Tuple[int, Any, Any]],
+                     local_origin_ids: set) -> Tuple[str, Any, Any]:
+    """
+    Decide what the sync does with one order, using its page's lookups (no queries).
+    
+    Returns:
+        (route, local_order_id, local_shipstation_id) where route is one of:
+        'update' (same ShipStation order), 'skip_unchanged' (same order, nothing we store changed),
+        'link' (local order not yet linked),
+        'collision' (same number, different ShipStation ID), 'import' (new manual order),
+        'skip_not_manual', 'skip_local_origin', 'skip_no_key_skus'
+    """
+    order_id = order.get('orderId') or order.get('orderKey')
+    order_number = order.get('orderNumber', '').strip()
+    
+    local = local_by_number.get(order_number)
+    if local:
+        local_order_id, local_shipstation_id, local_state = local
+        if local_shipstation_id and str(local_shipstation_id) == str(order_id):
+            # Skip only if the stored hash matches and the local status still agrees with ShipStation
+            if local_state and local_state == f"{map_order_status(order)}:{compute_order_content_hash(order)}":
+                return 'skip_unchanged', local_order_id, local_shipstation_id
+            return 'update', local_order_id, local_shipstation_id
+        if local_shipstation_id is None:
+            return 'link', local_order_id, local_shipstation_id
+        return 'collision', local_order_id, local_shipstation_id
+    
+    # POTENTIALLY NEW MANUAL ORDER → Apply filters
+    # Filter 1: Must start with "10" (manual orders only)
+    if not order_number.startswith('10'):
+        return 'skip_not_manual', None, None
+    # Filter 2: Must NOT be from local system
+    if str(order_id) in local_origin_ids:
+        return 'skip_local_origin', None, None
+    # Filter 3: Must contain key product SKUs
+    if not has_key_product_skus(order):
+        return 'skip_no_key_skus', None, None
+    return 'import', None, None
+
+
+def record_order_collision(order: Dict[Any, Any], local_order_id: int, conn):
+    """
+    Handle a TRUE conflict: the order number exists locally under a different ShipStation ID.
+    Manual orders (10xxxx) get a manual_order_conflicts alert for the dashboard;
+    anything else is only logged.
+    
+    Args:
+        order: ShipStation order dict
+        local_order_id: orders_inbox.id of the existing local order
+        conn: Database connection (transaction context)
+    """
+    import json
+    
+    order_number = order.get('orderNumber', '').strip()
+    current_shipstation_id = str(order.get('orderId') or order.get('orderKey'))
+    
+    # FIX: Only create manual_order_conflicts alerts for MANUAL orders (10xxxx pattern)
+    # Manual orders MUST start with '10' and be in range 100000-109999
+    if not (order_number.startswith('10') and order_number.isdigit() and 100000 <= int(order_number) <= 109999):
+        # Non-manual order collision - log but don't create manual_order_conflicts alert
+        logger.warning(f"⚠️ NON-MANUAL order collision detected for {order_number}")
+        logger.warning(f"   This order number has multiple ShipStation IDs but is NOT a manual order (doesn't match 10xxxx pattern)")
+        logger.warning(f"   RECOMMENDATION: Investigate this order - possible data corruption or external system issue")
+        return
+    
+    # This is a MANUAL order conflict - create alert for dashboard
+    cursor = conn.cursor()
+    
+    # Get original order details from local database
+    cursor.execute("""
+        SELECT ship_name, created_at 
+        FROM orders_inbox 
+        WHERE id = %s
+    """, (local_order_id,))
+    original_data = cursor.fetchone()
+    original_created_at = original_data[1] if original_data else None
+    
+    # Original order items (from local DB)
+    cursor.execute("""
+        SELECT sku, quantity 
+        FROM order_items_inbox 
+        WHERE order_inbox_id = %s
+    """, (local_order_id,))
+    original_items = [{'sku': row[0], 'quantity': row[1]} for row in cursor.fetchall()]
+    
+    # New/duplicate order items (from ShipStation)
+    ship_to = order.get('shipTo') or {}
+    duplicate_ship_name = (ship_to.get('name') or '').strip() or None
+    duplicate_company = (ship_to.get('company') or '').strip() or None
+    duplicate_items = [{'sku': item.get('sku', ''), 'quantity': item.get('quantity', 0)}
+                       for item in order.get('items', [])]
+    
+    # Check if conflict already exists
+    cursor.execute("""
+        SELECT id FROM manual_order_conflicts 
+        WHERE shipstation_order_id = %s AND resolution_status = 'pending'
+    """, (current_shipstation_id,))
+    
+    if not cursor.fetchone():
+        # Create new conflict alert
+        cursor.execute("""
+            INSERT INTO manual_order_conflicts (
+                conflicting_order_number, shipstation_order_id, customer_name, original_ship_date,
+                original_company, original_items, duplicate_company, duplicate_items
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+        """, (order_number, current_shipstation_id, duplicate_ship_name, original_created_at,
+              None, json.dumps(original_items), duplicate_company, json.dumps(duplicate_items)))
+        logger.info(f"🚨 Created manual order conflict alert for order {order_number}")
+    else:
+        logger.debug(f"  Conflict alert already exists for order {order_number}")
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    """Split a stream into lists of up to size items"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
 def extract_carrier_service_info(order: Dict[Any, Any]) -> Dict[str, Any]:
     """
     Extract carrier and service information from ShipStation order.
@@ -378,6 +549,28 @@ def extract_carrier_service_info(order: Dict[Any, Any]) -> Dict[str, Any]:
     }
 
 
+def compute_order_content_hash(order: Dict[Any, Any]) -> str:
+    """
+    Compact hash of the ShipStation fields the sync persists for an order:
+    status, items, carrier/service, tracking number and ship-to.
+    
+    Fields ShipStation changes without touching these (notes, tags, label
+    views - which still bump modifyDate) do not change the hash.
+    """
+    ship_to = order.get('shipTo') or {}
+    carrier_info = extract_carrier_service_info(order)
+    persisted = {
+        'status': (order.get('orderStatus') or '').lower(),
+        'items': [[str(item.get('sku') or '').strip(), item.get('quantity'), item.get('unitPrice')]
+                  for item in order.get('items') or []],
+        'carrier': [carrier_info[key] for key in ('carrier_code', 'carrier_id', 'service_code', 'service_name', 'tracking_number')],
+        'ship_to': [ship_to.get(key) for key in ('name', 'company', 'street1', 'street2', 'city',
+                                                 'state', 'postalCode', 'country', 'phone')],
+    }
+    encoded = json.dumps(persisted, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.blake2b(encoded.encode('utf-8'), digest_size=16).hexdigest()
+
+
 def check_order_conflict_in_shipstation(order_number: str, current_order: Dict[Any, Any], api_key: str, api_secret: str) -> Tuple[bool, Any]:
     """
     Query ShipStation to check if this order number already exists with a different ShipStation ID
@@ -695,6 +888,62 @@ def import_new_manual_order(order: Dict[Any, Any], conn, api_key: str, api_secre
         return False
 
 
+# ShipStation status → orders_inbox status
+STATUS_MAPPING = {
+    'awaiting_payment': 'awaiting_payment',
+    'awaiting_shipment': 'awaiting_shipment',
+    'shipped': 'shipped',
+    'on_hold': 'on_hold',
+    'cancelled': 'cancelled'
+}
+
+
+def map_order_status(order: Dict[Any, Any]) -> str:
+    """orders_inbox status for a ShipStation order"""
+    order_status = order.get('orderStatus', '').lower()
+    return STATUS_MAPPING.get(order_status, order_status)
+
+
+def build_status_update(order: Dict[Any, Any], local_order_id: int) -> Dict[str, Any]:
+    """
+    Compute the orders_inbox changes for an EXISTING order (no database access).
+    
+    Returns:
+        dict with local_order_id, order_number, db_status, carrier_info, total_items,
+        content_hash and item_rows (order_items_inbox rows to add if the local order has no items)
+    """
+    items = order.get('items', [])
+    
+    item_rows = {}
+    for item in items:
+        sku_raw = str(item.get('sku', '')).strip()
+        quantity = item.get('quantity', 0)
+        unit_price = item.get('unitPrice', 0)
+        unit_price_cents = int(float(unit_price) * 100) if unit_price else 0
+        
+        if sku_raw and quantity > 0:
+            # Parse SKU - LOT format (e.g., "17612 - 250237")
+            if ' - ' in sku_raw:
+                base_sku = sku_raw.split(' - ')[0].strip()
+                sku_lot = sku_raw  # Store full "17612 - 250237" format
+            else:
+                base_sku = sku_raw
+                sku_lot = None
+            # Same base SKU twice: the later line wins (as the per-row upsert did)
+            item_rows[base_sku] = (local_order_id, base_sku, sku_lot, quantity, unit_price_cents)
+    
+    return {
+        'local_order_id': local_order_id,
+        'order_number': order.get('orderNumber', '').strip(),
+        'db_status': map_order_status(order),
+        'carrier_info': extract_carrier_service_info(order),
+        'total_items': sum(item.get('quantity', 0) for item in items),
+        'content_hash': compute_order_content_hash(order),
+        'has_items': bool(items),
+        'item_rows': list(item_rows.values()),
+    }
+
+
 def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, conn) -> bool:
     """
     Update status for an EXISTING order in the database.
@@ -703,6 +952,9 @@ def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, con
     Edge Case: Orders created before items are added (e.g., from XML without items).
     This function keeps trying to update items until they appear in ShipStation.
     
+    The sync itself batches these updates (apply_status_updates); this per-order
+    version is its fallback when a batch fails.
+    
     Args:
         order: ShipStation order dict
         local_order_id: Local database order ID
@@ -712,27 +964,12 @@ def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, con
         True if successfully updated, False otherwise
     """
     try:
-        order_number = order.get('orderNumber', '').strip()
-        order_status = order.get('orderStatus', '').lower()
+        update = build_status_update(order, local_order_id)
+        order_number = update['order_number']
+        db_status = update['db_status']
+        carrier_info = update['carrier_info']
         
-        # Extract carrier/service info
-        carrier_info = extract_carrier_service_info(order)
-        
-        # Map ShipStation status to database status
-        status_mapping = {
-            'awaiting_payment': 'awaiting_payment',
-            'awaiting_shipment': 'awaiting_shipment',
-            'shipped': 'shipped',
-            'on_hold': 'on_hold',
-            'cancelled': 'cancelled'
-        }
-        db_status = status_mapping.get(order_status, order_status)
-        
-        # Get order items from ShipStation
-        items = order.get('items', [])
-        total_items = sum(item.get('quantity', 0) for item in items)
-        
-        logger.info(f"🔄 Updating EXISTING order: {order_number} → status: {db_status}, items: {total_items}, carrier: {carrier_info['carrier_code']}, service: {carrier_info['service_code']}")
+        logger.info(f"🔄 Updating EXISTING order: {order_number} → status: {db_status}, items: {update['total_items']}, carrier: {carrier_info['carrier_code']}, service: {carrier_info['service_code']}")
         
         # Update order in orders_inbox
         cursor = conn.cursor()
@@ -745,6 +982,7 @@ def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, con
                 shipping_service_name = %s,
                 tracking_number = %s,
                 total_items = %s,
+                shipstation_content_hash = %s,
                 updated_at = CURRENT_TIMESTAMP
             WHERE id = %s
         """, (
@@ -754,13 +992,14 @@ def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, con
             carrier_info['service_code'],
             carrier_info['service_name'],
             carrier_info['tracking_number'],
-            total_items,
+            update['total_items'],
+            update['content_hash'],
             local_order_id
         ))
         
         # EDGE CASE FIX: Update/add order items if they exist in ShipStation
         # This handles the case where orders are created before items are added
-        if items:
+        if update['has_items']:
             # Check if order already has items
             cursor.execute("""
                 SELECT COUNT(*) FROM order_items_inbox WHERE order_inbox_id = %s
@@ -768,37 +1007,22 @@ def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, con
             existing_items_count = cursor.fetchone()[0]
             
             if existing_items_count == 0:
-                logger.info(f"📦 Adding {len(items)} items to order {order_number} (was empty)")
+                logger.info(f"📦 Adding {len(update['item_rows'])} items to order {order_number} (was empty)")
                 
                 # Insert items into order_items_inbox
-                for item in items:
-                    sku_raw = str(item.get('sku', '')).strip()
-                    quantity = item.get('quantity', 0)
-                    unit_price = item.get('unitPrice', 0)
-                    unit_price_cents = int(float(unit_price) * 100) if unit_price else 0
+                for item_row in update['item_rows']:
+                    cursor.execute("""
+                        INSERT INTO order_items_inbox (
+                            order_inbox_id, sku, sku_lot, quantity, unit_price_cents
+                        )
+                        VALUES (%s, %s, %s, %s, %s)
+                        ON CONFLICT (order_inbox_id, sku) DO UPDATE
+                        SET quantity = EXCLUDED.quantity,
+                            sku_lot = EXCLUDED.sku_lot,
+                            unit_price_cents = EXCLUDED.unit_price_cents
+                    """, item_row)
                     
-                    if sku_raw and quantity > 0:
-                        # Parse SKU - LOT format (e.g., "17612 - 250237")
-                        if ' - ' in sku_raw:
-                            sku_parts = sku_raw.split(' - ')
-                            base_sku = sku_parts[0].strip()
-                            sku_lot = sku_raw  # Store full "17612 - 250237" format
-                        else:
-                            base_sku = sku_raw
-                            sku_lot = None
-                        
-                        cursor.execute("""
-                            INSERT INTO order_items_inbox (
-                                order_inbox_id, sku, sku_lot, quantity, unit_price_cents
-                            )
-                            VALUES (%s, %s, %s, %s, %s)
-                            ON CONFLICT (order_inbox_id, sku) DO UPDATE
-                            SET quantity = EXCLUDED.quantity,
-                                sku_lot = EXCLUDED.sku_lot,
-                                unit_price_cents = EXCLUDED.unit_price_cents
-                        """, (local_order_id, base_sku, sku_lot, quantity, unit_price_cents))
-                        
-                        logger.debug(f"  ➕ Item: {sku_raw} x{quantity}")
+                    logger.debug(f"  ➕ Item: {item_row[1]} x{item_row[3]}")
         
         logger.info(f"✅ Updated order {order_number} status to '{db_status}'")
         return True
@@ -808,11 +1032,117 @@ def update_existing_order_status(order: Dict[Any, Any], local_order_id: int, con
         return False
 
 
+def apply_status_updates(pending: List[Tuple[Dict[Any, Any], int]], conn) -> Tuple[int, int]:
+    """
+    Apply buffered EXISTING-order updates for one sync page as a set.
+    
+    One UPDATE ... FROM (VALUES ...) writes status, carrier/service and tracking
+    for every order, and one INSERT adds items to orders that still have none.
+    If the batch fails (e.g. one row violates a constraint) it is rolled back to
+    a savepoint and every order is retried with update_existing_order_status
+    in its own savepoint, so one bad row only fails itself.
+    
+    Args:
+        pending: (ShipStation order, local order id) pairs; a later entry for the same id wins
+        conn: Database connection (transaction context)
+    
+    Returns:
+        (updated, failed) order counts
+    """
+    if not pending:
+        return 0, 0
+    
+    import psycopg2.extras
+    
+    latest = {}
+    for order, local_order_id in pending:
+        latest[local_order_id] = order
+    updates = [build_status_update(order, local_order_id) for local_order_id, order in latest.items()]
+    
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SAVEPOINT sp_status_batch")
+        psycopg2.extras.execute_values(cursor, """
+            UPDATE orders_inbox AS o
+            SET status = v.status,
+                shipping_carrier_code = v.carrier_code,
+                shipping_carrier_id = v.carrier_id,
+                shipping_service_code = v.service_code,
+                shipping_service_name = v.service_name,
+                tracking_number = v.tracking_number,
+                total_items = v.total_items,
+                shipstation_content_hash = v.content_hash,
+                updated_at = CURRENT_TIMESTAMP
+            FROM (VALUES %s) AS v(id, status, carrier_code, carrier_id, service_code,
+                                  service_name, tracking_number, total_items, content_hash)
+            WHERE o.id = v.id
+        """, [
+            (u['local_order_id'], u['db_status'], u['carrier_info']['carrier_code'],
+             u['carrier_info']['carrier_id'], u['carrier_info']['service_code'],
+             u['carrier_info']['service_name'], u['carrier_info']['tracking_number'], u['total_items'],
+             u['content_hash'])
+            for u in updates
+        ], template="(%s::INTEGER, %s::TEXT, %s::TEXT, %s::TEXT, %s::TEXT, %s::TEXT, %s::TEXT, %s::INTEGER, %s::TEXT)",
+            page_size=len(updates))
+        
+        # EDGE CASE FIX: add items to orders that were created before their items existed
+        with_items = [u['local_order_id'] for u in updates if u['has_items']]
+        item_rows = []
+        if with_items:
+            cursor.execute("""
+                SELECT DISTINCT order_inbox_id FROM order_items_inbox WHERE order_inbox_id = ANY(%s)
+            """, (with_items,))
+            has_local_items = {row[0] for row in cursor.fetchall()}
+            for u in updates:
+                if u['has_items'] and u['local_order_id'] not in has_local_items and u['item_rows']:
+                    logger.info(f"📦 Adding {len(u['item_rows'])} items to order {u['order_number']} (was empty)")
+                    item_rows.extend(u['item_rows'])
+        if item_rows:
+            psycopg2.extras.execute_values(cursor, """
+                INSERT INTO order_items_inbox (
+                    order_inbox_id, sku, sku_lot, quantity, unit_price_cents
+                )
+                VALUES %s
+                ON CONFLICT (order_inbox_id, sku) DO UPDATE
+                SET quantity = EXCLUDED.quantity,
+                    sku_lot = EXCLUDED.sku_lot,
+                    unit_price_cents = EXCLUDED.unit_price_cents
+            """, item_rows, page_size=len(item_rows))
+        
+        cursor.execute("RELEASE SAVEPOINT sp_status_batch")
+        for u in updates:
+            logger.debug(f"🔄 Updated EXISTING order: {u['order_number']} → status: {u['db_status']}, items: {u['total_items']}, carrier: {u['carrier_info']['carrier_code']}, service: {u['carrier_info']['service_code']}")
+        logger.info(f"✅ Updated {len(updates)} existing orders in one batch")
+        return len(updates), 0
+    
+    except Exception as e:
+        cursor.execute("ROLLBACK TO SAVEPOINT sp_status_batch")
+        cursor.execute("RELEASE SAVEPOINT sp_status_batch")
+        logger.warning(f"⚠️ Batch status update failed ({e}) - retrying {len(updates)} orders one by one")
+    
+    updated = failed = 0
+    for index, (local_order_id, order) in enumerate(latest.items()):
+        savepoint_name = f"sp_status_{index}"
+        cursor.execute(f"SAVEPOINT {savepoint_name}")
+        if update_existing_order_status(order, local_order_id, conn):
+            cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
+            updated += 1
+        else:
+            cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint_name}")
+            cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
+            failed += 1
+    return updated, failed
+
+
 def sync_tracking_statuses(conn, api_key: str, api_secret: str) -> int:
     """
     Fetch and update tracking statuses for active (non-delivered) orders.
     Only runs during business hours (6 AM Pacific to 5 PM Eastern).
     
+    All active orders are resolved from one paginated /shipments ship-date window
+    and updated in bulk; only tracking numbers the window misses ("stragglers")
+    are looked up one by one.
+    
     Args:
         conn: Database connection (transaction context)
         api_key: ShipStation API key
@@ -834,7 +1164,8 @@ def sync_tracking_statuses(conn, api_key: str, api_secret: str) -> int:
             tracking_number, 
             shipping_carrier_code, 
             tracking_status,
-            tracking_last_checked
+            tracking_last_checked,
+            order_date
         FROM orders_inbox
         WHERE tracking_number IS NOT NULL
           AND tracking_number != ''
@@ -842,8 +1173,8 @@ def sync_tracking_statuses(conn, api_key: str, api_secret: str) -> int:
           AND (tracking_last_checked IS NULL 
                OR tracking_last_checked < NOW() - INTERVAL '5 minutes')
         ORDER BY tracking_last_checked NULLS FIRST
-        LIMIT 50
-    """)
+        LIMIT %s
+    """, (TRACKING_REFRESH_LIMIT,))
     
     orders_to_check = cursor.fetchall()
     
@@ -853,33 +1184,44 @@ def sync_tracking_statuses(conn, api_key: str, api_secret: str) -> int:
     
     logger.info(f"🔍 Checking tracking status for {len(orders_to_check)} orders...")
     
-    updated = 0
-    for order_number, tracking_number, carrier, current_status, last_checked in orders_to_check:
+    # Handle multiple tracking numbers (comma-separated) - the first one is tracked
+    primary_tracking = {row[0]: row[1].split(',')[0].strip() for row in orders_to_check}
+    current_statuses = {row[0]: row[3] for row in orders_to_check}
+    
+    # Batch: one ship-date window covering every active order
+    window_results = {}
+    if len(orders_to_check) >= TRACKING_BATCH_MIN_ORDERS:
+        window_start = tracking_window_start(row[5] for row in orders_to_check)
+        window_results = fetch_tracking_statuses_for_window(primary_tracking.values(), window_start, api_key, api_secret)
+    
+    batch_updates = {
+        order_number: window_results[tracking]
+        for order_number, tracking in primary_tracking.items()
+        if tracking in window_results
+    }
+    updated = update_order_tracking_statuses_bulk(batch_updates, conn)
+    for order_number, tracking_data in batch_updates.items():
+        _log_tracking_change(order_number, current_statuses[order_number], tracking_data)
+    
+    # Stragglers: not in the window (shipped earlier, not labelled yet) - look up one by one
+    stragglers = [row for row in orders_to_check if row[0] not in batch_updates]
+    if len(stragglers) > TRACKING_STRAGGLER_LIMIT:
+        logger.info(f"⏳ {len(stragglers) - TRACKING_STRAGGLER_LIMIT} tracking lookups deferred to next cycle")
+        stragglers = stragglers[:TRACKING_STRAGGLER_LIMIT]
+    
+    for order_number, tracking_number, carrier, current_status, last_checked, _ in stragglers:
         try:
-            # Handle multiple tracking numbers (comma-separated)
-            tracking_nums = [t.strip() for t in tracking_number.split(',')]
-            primary_tracking = tracking_nums[0]
-            
             # Map carrier to code
             carrier_code = map_carrier_to_code(carrier) if carrier else 'fedex'
             
             # Fetch status from ShipStation
-            tracking_data = fetch_tracking_status(primary_tracking, carrier_code, api_key, api_secret)
+            tracking_data = fetch_tracking_status(primary_tracking[order_number], carrier_code, api_key, api_secret)
             
             if tracking_data.get('success'):
                 # Update database
                 update_order_tracking_status(order_number, tracking_data, conn)
                 updated += 1
-                
-                # Log status changes
-                new_status = tracking_data.get('status_code')
-                if new_status != current_status:
-                    logger.info(f"📊 Order {order_number}: {current_status or 'NEW'} → {new_status}")
-                    
-                    # Alert on exceptions
-                    if new_status == 'EX':
-                        exception_desc = tracking_data.get('exception_description', 'Unknown exception')
-                        logger.warning(f"⚠️ EXCEPTION for order {order_number}: {exception_desc}")
+                _log_tracking_change(order_number, current_status, tracking_data)
             else:
                 error_msg = tracking_data.get('error', 'Unknown error')
                 logger.warning(f"⚠️ Failed to fetch tracking for {order_number}: {error_msg}")
@@ -909,10 +1251,23 @@ def sync_tracking_statuses(conn, api_key: str, api_secret: str) -> int:
                 pass  # If this fails, let it fail silently to avoid cascading errors
             continue
     
-    logger.info(f"✅ Updated tracking status for {updated}/{len(orders_to_check)} orders")
+    logger.info(f"✅ Updated tracking status for {updated}/{len(orders_to_check)} orders "
+                f"({len(batch_updates)} from shipments window, {len(stragglers)} looked up individually)")
     return updated
 
 
+def _log_tracking_change(order_number: str, current_status: str, tracking_data: dict):
+    """Log status changes (and alert on exceptions)"""
+    new_status = tracking_data.get('status_code')
+    if new_status != current_status:
+        logger.info(f"📊 Order {order_number}: {current_status or 'NEW'} → {new_status}")
+        
+        # Alert on exceptions
+        if new_status == 'EX':
+            exception_desc = tracking_data.get('exception_description', 'Unknown exception')
+            logger.warning(f"⚠️ EXCEPTION for order {order_number}: {exception_desc}")
+
+
 def auto_resolve_manual_order_conflicts(api_key: str, api_secret: str) -> int:
     """
     Auto-resolve manual order conflicts that no longer exist in ShipStation.
@@ -947,21 +1302,16 @@ def auto_resolve_manual_order_conflicts(api_key: str, api_secret: str) -> int:
         logger.info(f"🔍 Checking {len(pending_conflicts)} pending manual order conflicts for auto-resolution")
         
         resolved_count = 0
-        headers = get_shipstation_headers(api_key, api_secret)
+        # Query ShipStation for ALL orders with each order number, concurrently
+        lookups = find_orders_by_numbers([c[1] for c in pending_conflicts], api_key, api_secret)
         
         for conflict_id, order_number, conflict_shipstation_id in pending_conflicts:
             try:
-                # Query ShipStation for ALL orders with this order number
-                endpoint = f"{SHIPSTATION_ORDERS_ENDPOINT}?orderNumber={order_number}"
-                response = make_api_request(endpoint, method='GET', headers=headers)
-                
-                if not response or response.status_code != 200:
-                    logger.warning(f"  ⚠️ Failed to query ShipStation for order {order_number}")
+                orders = lookups.get(order_number)
+                if isinstance(orders, Exception):
+                    logger.warning(f"  ⚠️ Failed to query ShipStation for order {order_number}: {orders}")
                     continue
                 
-                data = response.json()
-                orders = data.get('orders', [])
-                
                 # Extract unique ShipStation IDs for this order number
                 shipstation_ids = list({str(o.get('orderId')) for o in orders if o.get('orderId')})
                 
@@ -1008,16 +1358,103 @@ def auto_resolve_manual_order_conflicts(api_key: str, api_secret: str) -> int:
         return 0
 
 
-def run_unified_sync():
+def run_post_sync_steps(conn, api_key: str, api_secret: str, last_sync: str, stats: Dict[str, Any]):
+    """
+    Follow-up work after the order pages: tracking numbers and tracking
+    statuses. Each step is non-fatal and records its counts in stats.
+    Ghost-order backfill runs separately (run_ghost_backfill_step) once this
+    transaction has committed.
+    
+    Args:
+        conn: Database connection (transaction context)
+        api_key: ShipStation API key
+        api_secret: ShipStation API secret
+        last_sync: Watermark the run started from
+        stats: Run counters (updated in place)
+    """
+    # Fetch and update tracking numbers (uses /shipments endpoint)
+    # This runs AFTER order processing, within the caller's transaction
+    try:
+        logger.info("🚢 Fetching shipments to update tracking numbers...")
+    
+        # Use the same date range as order fetch (last_sync to now)
+        shipments = fetch_shipments_batch(
+            api_key=api_key,
+            api_secret=api_secret,
+            start_date=last_sync,
+            end_date=datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+        )
+    
+        if shipments:
+            tracking_updates = update_tracking_numbers(shipments, conn)
+            stats['tracking_updates'] = tracking_updates
+        else:
+            logger.info("📭 No shipments found for tracking number updates")
+            stats['tracking_updates'] = 0
+    
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to fetch/update tracking numbers (non-fatal): {e}")
+        stats['tracking_updates'] = 0
+    
+    # Fetch and update tracking statuses (only during business hours)
+    # This runs AFTER tracking number updates, within the same transaction
+    try:
+        if is_business_hours():
+            logger.info("🔍 Checking tracking statuses (business hours active)...")
+            tracking_status_updates = sync_tracking_statuses(conn, api_key, api_secret)
+            stats['tracking_status_updates'] = tracking_status_updates
+        else:
+            logger.info("⏰ Outside business hours - skipping tracking status updates")
+            stats['tracking_status_updates'] = 0
+    
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to update tracking statuses (non-fatal): {e}")
+        stats['tracking_status_updates'] = 0
+
+
+def run_ghost_backfill_step(api_key: str, api_secret: str, stats: Dict[str, Any]):
+    """
+    Backfill ghost orders (orders with 0 items); non-fatal, counts go to stats.
+    
+    Must run outside any open transaction: the backfill may pause for minutes on
+    a 429 and writes through its own connections, so a caller's transaction
+    would sit idle holding row locks those writes can block on.
+    """
+    try:
+        logger.info("👻 Checking for ghost orders (0 items)...")
+        with api_workflow('ghost-backfill'):
+            ghost_metrics = backfill_ghost_orders(None, api_key, api_secret)
+        stats['ghost_backfilled'] = ghost_metrics.get('backfilled', 0)
+        stats['ghost_work_in_progress'] = ghost_metrics.get('work_in_progress', 0)
+        stats['ghost_errors'] = ghost_metrics.get('errors', 0)
+    
+        if ghost_metrics.get('rate_limited'):
+            logger.warning("⚠️ Backfill hit rate limit - remaining orders will retry next cycle")
+    
+    except Exception as e:
+        logger.warning(f"⚠️ Failed to backfill ghost orders (non-fatal): {e}")
+        stats['ghost_backfilled'] = 0
+        stats['ghost_work_in_progress'] = 0
+        stats['ghost_errors'] = 0
+
+
+def run_unified_sync() -> bool:
     """
     Main unified sync function.
     Processes orders from ShipStation watermark:
     - NEW manual orders → import
     - EXISTING orders → update status
+    
+    Pages arrive oldest modification first and each page commits together with
+    its watermark checkpoint. A run stops after SYNC_RUN_MAX_SECONDS or
+    SYNC_RUN_MAX_ORDERS and the next run resumes from the last checkpoint.
+    
+    Returns:
+        bool: True if the run stopped on its budget with more of the feed pending
     """
     if not is_workflow_enabled(WORKFLOW_NAME):
         logger.info(f"⏸️ Workflow '{WORKFLOW_NAME}' is DISABLED - skipping execution")
-        return
+        return False
     
     update_workflow_last_run(WORKFLOW_NAME)
     logger.info("=" * 80)
@@ -1025,33 +1462,42 @@ def run_unified_sync():
     logger.info("=" * 80)
     
     sync_start = datetime.datetime.now()
+    pages = None
     
     try:
         # Get ShipStation credentials
         api_key, api_secret = get_shipstation_credentials()
         if not api_key or not api_secret:
             logger.critical("❌ Failed to get ShipStation credentials")
-            return
+            return False
         
         # Get last sync watermark
         last_sync = get_last_sync_timestamp()
         
-        # Fetch orders modified since watermark
-        orders = fetch_shipstation_orders_since_watermark(api_key, api_secret, last_sync)
+        # Stream orders modified since watermark, oldest first, up to the feed's current end
+        # (one page in memory at a time). A first-page failure raises here, so the watermark stays put.
+        feed_end = get_feed_high_water_mark(api_key, api_secret, last_sync)
+        order_stream = iter_shipstation_orders_since_watermark(api_key, api_secret, last_sync, feed_end)
+        first_order = next(order_stream, None) if feed_end else None
         
-        if not orders:
+        if first_order is None:
             logger.info("📭 No orders found since last sync")
             
             # Advance watermark to avoid reprocessing same empty window (per architect)
             new_watermark = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+            # Tracking and ghost backfill run every cycle, even without order changes
+            post_stats = {}
             with transaction_with_retry() as conn:
+                run_post_sync_steps(conn, api_key, api_secret, last_sync, post_stats)
                 update_sync_watermark(new_watermark, conn)
+            run_ghost_backfill_step(api_key, api_secret, post_stats)
             
             elapsed = (datetime.datetime.now() - sync_start).total_seconds()
-            logger.info(f"✅ Sync completed in {elapsed:.1f}s (no orders to process)")
-            return
-        
-        logger.info(f"📦 Processing {len(orders)} orders from ShipStation")
+            logger.info(f"✅ Sync completed in {elapsed:.1f}s (no orders to process) - "
+                        f"tracking numbers: {post_stats.get('tracking_updates', 0)}, "
+                        f"tracking statuses: {post_stats.get('tracking_status_updates', 0)}, "
+                        f"ghost orders backfilled: {post_stats.get('ghost_backfilled', 0)}")
+            return False
         
         # Counters for comprehensive logging
         stats = {
@@ -1060,269 +1506,210 @@ def run_unified_sync():
             'skipped_local_origin': 0,
             'skipped_no_key_skus': 0,
             'skipped_not_manual': 0,
+            'skipped_unchanged': 0,
             'errors': 0
         }
         
-        max_modify_date = None
+        fetched = {'orders': 0}
         
-        # Process all orders in a single transaction (per architect)
-        with transaction_with_retry() as conn:
-            cursor = conn.cursor()
+        def fetch_pages():
+            """Page the feed; closing this (on the fetcher thread) releases the paginator's in-flight pages"""
+            try:
+                yield from _batched(itertools.chain([first_order], order_stream), SYNC_PAGE_SIZE)
+            finally:
+                order_stream.close()
+        
+        # Fetch page N+1 on a background thread while page N is written (bounded queue)
+        pages = Prefetcher(fetch_pages(), maxsize=SYNC_PREFETCH_PAGES, name='watermark-orders')
+        
+        def stream_pages():
+            """Yield every page; a later-page failure counts as an error so the watermark is held"""
+            try:
+                for page in pages:
+                    fetched['orders'] += len(page)
+                    yield page
+            except PaginationError as e:
+                logger.error(f"❌ API fetch failed part-way ({e}) after {fetched['orders']} orders")
+                stats['errors'] += 1
+        
+        # Each page commits together with its watermark checkpoint (per architect: same
+        # transaction), so an interrupted run resumes after the last committed page
+        run_deadline = time.monotonic() + SYNC_RUN_MAX_SECONDS
+        checkpoint = None
+        pages_committed = 0
+        budget_reached = False
+        
+        for page in stream_pages():
+            errors_before = stats['errors']
+            page_max_modify_date = None
             
-            for idx, order in enumerate(orders):
-                savepoint_name = f"sp_order_{idx}"
+            with transaction_with_retry() as conn:
+                cursor = conn.cursor()
+                savepoint_index = 0
                 
-                try:
-                    # PostgreSQL SAVEPOINT: Isolate this order's operations
-                    # If this order fails, we can rollback to this point without aborting the whole transaction
-                    cursor.execute(f"SAVEPOINT {savepoint_name}")
-                    
+                # Classify the whole page up front - skipped orders cost no round trips
+                local_by_number, local_origin_ids = classify_sync_page(page, conn)
+                # Order numbers linked/imported earlier in this page: the page lookup is stale for them
+                written_in_page = set()
+                # EXISTING-order updates, applied together at the end of the page
+                pending_updates = []
+                
+                for order in page:
                     order_id = order.get('orderId') or order.get('orderKey')
                     order_number = order.get('orderNumber', '').strip()
                     
                     if not order_number:
                         logger.debug(f"⏭️ Skipping order without number: {order_id}")
-                        cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
                         continue
                     
                     # Track latest modifyDate for watermark update
                     modify_date_str = order.get('modifyDate', '')
                     if modify_date_str:
-                        if max_modify_date is None or modify_date_str > max_modify_date:
-                            max_modify_date = modify_date_str
+                        if page_max_modify_date is None or modify_date_str > page_max_modify_date:
+                            page_max_modify_date = modify_date_str
                     
                     # Decision tree: NEW manual order, EXISTING order update, or CONFLICT?
+                    if order_number in written_in_page:
+                        exists, local_order_id, local_shipstation_id = order_exists_locally(order_number, conn)
+                        local_lookup = {order_number: (local_order_id, local_shipstation_id, None)} if exists else {}
+                    else:
+                        local_lookup = local_by_number
+                    route, local_order_id, local_shipstation_id = route_sync_order(order, local_lookup, local_origin_ids)
                     
-                    # Check if order exists locally
-                    exists, local_order_id, local_shipstation_id = order_exists_locally(order_number, conn)
+                    if route == 'skip_not_manual':
+                        logger.debug(f"⏭️ Skipping {order_number} - not manual (doesn't start with '10')")
+                        stats['skipped_not_manual'] += 1
+                        continue
+                    if route == 'skip_local_origin':
+                        logger.debug(f"⏭️ Skipping {order_number} - originated from local system")
+                        stats['skipped_local_origin'] += 1
+                        continue
+                    if route == 'skip_no_key_skus':
+                        logger.debug(f"⏭️ Skipping {order_number} - no key product SKUs")
+                        stats['skipped_no_key_skus'] += 1
+                        continue
+                    if route == 'skip_unchanged':
+                        # modifyDate moved but nothing we store changed (notes, tags, label views)
+                        logger.debug(f"⏭️ Skipping {order_number} - unchanged since last sync")
+                        stats['skipped_unchanged'] += 1
+                        continue
+                    if route == 'update':
+                        # SAME ORDER (same number + same ShipStation ID) → Update status (batched)
+                        logger.debug(f"🔍 Order {order_number} exists locally (id: {local_order_id})")
+                        pending_updates.append((order, local_order_id))
+                        continue
+                    
+                    savepoint_name = f"sp_order_{savepoint_index}"
+                    savepoint_index += 1
                     
-                    if exists:
-                        # Order number exists - but is it the SAME ShipStation order?
+                    try:
+                        # PostgreSQL SAVEPOINT: Isolate this order's writes
+                        # If this order fails, we can rollback to this point without aborting the whole transaction
+                        cursor.execute(f"SAVEPOINT {savepoint_name}")
                         current_shipstation_id = str(order_id)
                         
-                        if local_shipstation_id and str(local_shipstation_id) == current_shipstation_id:
-                            # SAME ORDER (same number + same ShipStation ID) → Update status
-                            logger.debug(f"🔍 Order {order_number} exists locally (id: {local_order_id})")
-                            if update_existing_order_status(order, local_order_id, conn):
-                                stats['existing_updated'] += 1
-                            else:
-                                stats['errors'] += 1
-                        else:
-                            # COLLISION DETECTED! Same order number but different/missing ShipStation ID
+                        if route == 'link':
+                            # Local order has NULL shipstation_order_id → LINK IT!
+                            # This happens when orders are imported from XML but not yet uploaded to ShipStation
+                            # OR when upload service created them but didn't capture the ShipStation ID
                             logger.warning(f"⚠️ ORDER COLLISION DETECTED: Order {order_number} exists with different ShipStation ID")
                             logger.warning(f"   Local ShipStation ID: {local_shipstation_id}, New ShipStation ID: {current_shipstation_id}")
+                            logger.info(f"🔗 LINKING order {order_number}: Local order exists but not linked to ShipStation")
+                            logger.info(f"   Setting shipstation_order_id = {current_shipstation_id}")
                             
-                            # CASE 1: Local order has NULL shipstation_order_id → LINK IT!
-                            # This happens when orders are imported from XML but not yet uploaded to ShipStation
-                            # OR when upload service created them but didn't capture the ShipStation ID
-                            if local_shipstation_id is None:
-                                logger.info(f"🔗 LINKING order {order_number}: Local order exists but not linked to ShipStation")
-                                logger.info(f"   Setting shipstation_order_id = {current_shipstation_id}")
-                                
-                                cursor = conn.cursor()
-                                cursor.execute("""
-                                    UPDATE orders_inbox
-                                    SET shipstation_order_id = %s,
-                                        updated_at = CURRENT_TIMESTAMP
-                                    WHERE id = %s
-                                """, (current_shipstation_id, local_order_id))
-                                
-                                logger.info(f"✅ Linked order {order_number} to ShipStation ID {current_shipstation_id}")
-                                
-                                # Now update the order's status
-                                if update_existing_order_status(order, local_order_id, conn):
-                                    stats['existing_updated'] += 1
-                                else:
-                                    stats['errors'] += 1
+                            cursor.execute("""
+                                UPDATE orders_inbox
+                                SET shipstation_order_id = %s,
+                                    updated_at = CURRENT_TIMESTAMP
+                                WHERE id = %s
+                            """, (current_shipstation_id, local_order_id))
                             
-                            # CASE 2: Local order has DIFFERENT non-NULL shipstation_order_id → TRUE CONFLICT
-                            else:
-                                # FIX: Only create manual_order_conflicts alerts for MANUAL orders (10xxxx pattern)
-                                # Manual orders MUST start with '10' and be in range 100000-109999
-                                if order_number.startswith('10') and order_number.isdigit() and 100000 <= int(order_number) <= 109999:
-                                    # This is a MANUAL order conflict - create alert for dashboard
-                                    cursor = conn.cursor()
-                                    
-                                    # Get original order details from local database
-                                    cursor.execute("""
-                                        SELECT ship_name, created_at 
-                                        FROM orders_inbox 
-                                        WHERE id = %s
-                                    """, (local_order_id,))
-                                    original_data = cursor.fetchone()
-                                    original_ship_name = original_data[0] if original_data else None
-                                    original_created_at = original_data[1] if original_data else None
-                                    
-                                    # Get items from both orders
-                                    import json
-                                    
-                                    # Original order items (from local DB)
-                                    cursor.execute("""
-                                        SELECT sku, quantity 
-                                        FROM order_items_inbox 
-                                        WHERE order_inbox_id = %s
-                                    """, (local_order_id,))
-                                    original_items = []
-                                    for item_row in cursor.fetchall():
-                                        original_items.append({'sku': item_row[0], 'quantity': item_row[1]})
-                                    
-                                    # New/duplicate order items (from ShipStation)
-                                    ship_to = order.get('shipTo') or {}
-                                    duplicate_ship_name = (ship_to.get('name') or '').strip() or None
-                                    duplicate_company = (ship_to.get('company') or '').strip() or None
-                                    duplicate_items = []
-                                    for item in order.get('items', []):
-                                        sku = item.get('sku', '')
-                                        qty = item.get('quantity', 0)
-                                        duplicate_items.append({'sku': sku, 'quantity': qty})
-                                    
-                                    # Check if conflict already exists
-                                    cursor.execute("""
-                                        SELECT id FROM manual_order_conflicts 
-                                        WHERE shipstation_order_id = %s AND resolution_status = 'pending'
-                                    """, (current_shipstation_id,))
-                                    
-                                    if not cursor.fetchone():
-                                        # Create new conflict alert
-                                        cursor.execute("""
-                                            INSERT INTO manual_order_conflicts (
-                                                conflicting_order_number, shipstation_order_id, customer_name, original_ship_date,
-                                                original_company, original_items, duplicate_company, duplicate_items
-                                            )
-                                            VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-                                        """, (order_number, current_shipstation_id, duplicate_ship_name, original_created_at,
-                                              None, json.dumps(original_items), duplicate_company, json.dumps(duplicate_items)))
-                                        logger.info(f"🚨 Created manual order conflict alert for order {order_number}")
-                                    else:
-                                        logger.debug(f"  Conflict alert already exists for order {order_number}")
-                                else:
-                                    # Non-manual order collision - log but don't create manual_order_conflicts alert
-                                    logger.warning(f"⚠️ NON-MANUAL order collision detected for {order_number}")
-                                    logger.warning(f"   This order number has multiple ShipStation IDs but is NOT a manual order (doesn't match 10xxxx pattern)")
-                                    logger.warning(f"   RECOMMENDATION: Investigate this order - possible data corruption or external system issue")
-                                
-                                # Don't import or update this TRUE conflicting order
-                                cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-                                continue
-                    else:
-                        # POTENTIALLY NEW MANUAL ORDER → Apply filters
+                            logger.info(f"✅ Linked order {order_number} to ShipStation ID {current_shipstation_id}")
                         
-                        # Filter 1: Must start with "10" (manual orders only)
-                        if not order_number.startswith('10'):
-                            logger.debug(f"⏭️ Skipping {order_number} - not manual (doesn't start with '10')")
-                            stats['skipped_not_manual'] += 1
-                            cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-                            continue
+                        elif route == 'collision':
+                            # Local order has DIFFERENT non-NULL shipstation_order_id → TRUE CONFLICT
+                            # Don't import or update this order - only raise an alert
+                            logger.warning(f"⚠️ ORDER COLLISION DETECTED: Order {order_number} exists with different ShipStation ID")
+                            logger.warning(f"   Local ShipStation ID: {local_shipstation_id}, New ShipStation ID: {current_shipstation_id}")
+                            record_order_collision(order, local_order_id, conn)
                         
-                        # Filter 2: Must NOT be from local system
-                        if is_order_from_local_system(str(order_id)):
-                            logger.debug(f"⏭️ Skipping {order_number} - originated from local system")
-                            stats['skipped_local_origin'] += 1
-                            cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-                            continue
+                        else:
+                            # All filters passed → Import as NEW manual order
+                            if import_new_manual_order(order, conn, api_key, api_secret):
+                                stats['new_manual_imported'] += 1
+                            else:
+                                stats['errors'] += 1
                         
-                        # Filter 3: Must contain key product SKUs
-                        if not has_key_product_skus(order):
-                            logger.debug(f"⏭️ Skipping {order_number} - no key product SKUs")
-                            stats['skipped_no_key_skus'] += 1
+                        # Success - release the savepoint
+                        cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
+                        if route in ('link', 'import'):
+                            written_in_page.add(order_number)
+                        if route == 'link':
+                            # Now update the order's status (batched)
+                            pending_updates.append((order, local_order_id))
+                    
+                    except Exception as e:
+                        # PostgreSQL: Rollback to savepoint to keep transaction alive
+                        try:
+                            cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint_name}")
                             cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-                            continue
+                        except:
+                            pass  # If rollback fails, transaction will abort anyway
                         
-                        # All filters passed → Import as NEW manual order
-                        if import_new_manual_order(order, conn, api_key, api_secret):
-                            stats['new_manual_imported'] += 1
-                        else:
-                            stats['errors'] += 1
-                    
-                    # Success - release the savepoint
-                    cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
+                        logger.error(f"❌ Error processing order {order.get('orderNumber', 'UNKNOWN')}: {e}", exc_info=True)
+                        stats['errors'] += 1
                 
-                except Exception as e:
-                    # PostgreSQL: Rollback to savepoint to keep transaction alive
-                    try:
-                        cursor.execute(f"ROLLBACK TO SAVEPOINT {savepoint_name}")
-                        cursor.execute(f"RELEASE SAVEPOINT {savepoint_name}")
-                    except:
-                        pass  # If rollback fails, transaction will abort anyway
-                    
-                    logger.error(f"❌ Error processing order {order.get('orderNumber', 'UNKNOWN')}: {e}", exc_info=True)
-                    stats['errors'] += 1
-            
-            cursor.close()
-            
-            # Fetch and update tracking numbers (uses /shipments endpoint)
-            # This runs AFTER order processing, within the same transaction
-            try:
-                logger.info("🚢 Fetching shipments to update tracking numbers...")
+                updated, failed = apply_status_updates(pending_updates, conn)
+                stats['existing_updated'] += updated
+                stats['errors'] += failed
+                cursor.close()
                 
-                # Use the same date range as order fetch (last_sync to now)
-                shipments = fetch_shipments_batch(
-                    api_key=api_key,
-                    api_secret=api_secret,
-                    start_date=last_sync,
-                    end_date=datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
-                )
+                # Every order in the watermark feed changed - drop stale single-order cache entries
+                # (published right away: invalidating is harmless even if this page rolls back)
+                publish_orders_changed((o.get('orderId'), o.get('modifyDate')) for o in page)
                 
-                if shipments:
-                    tracking_updates = update_tracking_numbers(shipments, conn)
-                    stats['tracking_updates'] = tracking_updates
-                else:
-                    logger.info("📭 No shipments found for tracking number updates")
-                    stats['tracking_updates'] = 0
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to fetch/update tracking numbers (non-fatal): {e}")
-                stats['tracking_updates'] = 0
+                # CRITICAL: Only checkpoint a page with NO errors (per architect)
+                # This prevents data loss - the page rolls back and is reprocessed on next run
+                page_errors = stats['errors'] - errors_before
+                if page_errors:
+                    logger.warning(f"⚠️ Watermark NOT advanced past {checkpoint or last_sync} due to {page_errors} errors - will retry on next run")
+                    raise Exception(f"Processing failed with {page_errors} errors - aborting page transaction")
+                
+                if page_max_modify_date:
+                    update_sync_watermark(page_max_modify_date, conn)
+                    checkpoint = page_max_modify_date
             
-            # Fetch and update tracking statuses (only during business hours)
-            # This runs AFTER tracking number updates, within the same transaction
-            try:
-                if is_business_hours():
-                    logger.info("🔍 Checking tracking statuses (business hours active)...")
-                    tracking_status_updates = sync_tracking_statuses(conn, api_key, api_secret)
-                    stats['tracking_status_updates'] = tracking_status_updates
-                else:
-                    logger.info("⏰ Outside business hours - skipping tracking status updates")
-                    stats['tracking_status_updates'] = 0
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to update tracking statuses (non-fatal): {e}")
-                stats['tracking_status_updates'] = 0
+            pages_committed += 1
+            logger.info(f"📌 Page {pages_committed} committed ({fetched['orders']} orders so far), checkpoint {checkpoint}")
             
-            # Backfill ghost orders (orders with 0 items)
-            # This runs AFTER all sync processing, BEFORE watermark update
-            # Uses per-order transactions for fault tolerance
-            try:
-                logger.info("👻 Checking for ghost orders (0 items)...")
-                ghost_metrics = backfill_ghost_orders(conn, api_key, api_secret)
-                stats['ghost_backfilled'] = ghost_metrics.get('backfilled', 0)
-                stats['ghost_work_in_progress'] = ghost_metrics.get('work_in_progress', 0)
-                stats['ghost_errors'] = ghost_metrics.get('errors', 0)
-                
-                if ghost_metrics.get('rate_limited'):
-                    logger.warning("⚠️ Backfill hit rate limit - remaining orders will retry next cycle")
-                    
-            except Exception as e:
-                logger.warning(f"⚠️ Failed to backfill ghost orders (non-fatal): {e}")
-                stats['ghost_backfilled'] = 0
-                stats['ghost_work_in_progress'] = 0
-                stats['ghost_errors'] = 0
+            if fetched['orders'] >= SYNC_RUN_MAX_ORDERS or time.monotonic() >= run_deadline:
+                budget_reached = True
+                pages.close()
+                logger.info(f"⏩ Run budget reached after {fetched['orders']} orders - next run resumes from {checkpoint}")
+                break
+        
+        pages.close()
+        logger.info(f"📦 Processed {fetched['orders']} orders from ShipStation in {pages_committed} pages")
+        logger.info(pages.format_timings())
+        
+        if stats['errors'] > 0:
+            # A later page failed to fetch - committed pages stay, the rest is retried next run
+            logger.warning(f"⚠️ Watermark held at {checkpoint or last_sync} due to {stats['errors']} errors - will retry on next run")
+            raise Exception(f"Processing failed with {stats['errors']} errors - aborting run")
+        
+        # Tracking and backfill are bounded per run, so they also run while catching up
+        # (the shipments window starts at last_sync and would otherwise skip catch-up windows)
+        with transaction_with_retry() as conn:
+            run_post_sync_steps(conn, api_key, api_secret, last_sync, stats)
             
-            # CRITICAL: Only update watermark if NO errors occurred (per architect)
-            # This prevents data loss - failed orders will be reprocessed on next run
-            if stats['errors'] == 0:
-                if max_modify_date:
-                    update_sync_watermark(max_modify_date, conn)
-                    logger.info(f"✅ Watermark advanced (no errors)")
-                else:
-                    # No valid modifyDate found, advance to now
-                    new_watermark = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
-                    update_sync_watermark(new_watermark, conn)
-                    logger.info(f"✅ Watermark advanced to current time (no errors)")
-            else:
-                logger.warning(f"⚠️ Watermark NOT advanced due to {stats['errors']} errors - will retry on next run")
-                # Rollback transaction to avoid partial commits
-                raise Exception(f"Processing failed with {stats['errors']} errors - aborting transaction")
+            if checkpoint is None:
+                # No valid modifyDate found, advance to now
+                new_watermark = datetime.datetime.now().strftime('%Y-%m-%dT%H:%M:%SZ')
+                update_sync_watermark(new_watermark, conn)
+                logger.info(f"✅ Watermark advanced to current time (no errors)")
+        
+        # Backfill ghost orders AFTER the tracking transaction has committed
+        run_ghost_backfill_step(api_key, api_secret, stats)
         
         # Comprehensive summary logging
         elapsed = (datetime.datetime.now() - sync_start).total_seconds()
@@ -1330,6 +1717,9 @@ def run_unified_sync():
         logger.info("📊 SYNC SUMMARY:")
         logger.info(f"   ✅ New manual orders imported: {stats['new_manual_imported']}")
         logger.info(f"   🔄 Existing orders updated: {stats['existing_updated']}")
+        existing_seen = stats['existing_updated'] + stats['skipped_unchanged']
+        skip_ratio = stats['skipped_unchanged'] / existing_seen if existing_seen else 0.0
+        logger.info(f"   ♻️ Skipped (unchanged): {stats['skipped_unchanged']} of {existing_seen} existing ({skip_ratio:.0%} skip ratio)")
         logger.info(f"   📍 Tracking numbers updated: {stats.get('tracking_updates', 0)}")
         logger.info(f"   🔍 Tracking statuses updated: {stats.get('tracking_status_updates', 0)}")
         logger.info(f"   👻 Ghost orders backfilled: {stats.get('ghost_backfilled', 0)}")
@@ -1338,6 +1728,7 @@ def run_unified_sync():
         logger.info(f"   ⏭️ Skipped (local origin): {stats['skipped_local_origin']}")
         logger.info(f"   ⏭️ Skipped (no key SKUs): {stats['skipped_no_key_skus']}")
         logger.info(f"   ❌ Errors: {stats['errors']}")
+        logger.info(f"   📌 Pages committed: {pages_committed} (checkpoint {checkpoint or last_sync}{', catching up' if budget_reached else ''})")
         logger.info(f"   ⏱️ Duration: {elapsed:.1f}s")
         logger.info("=" * 80)
         
@@ -1349,14 +1740,21 @@ def run_unified_sync():
         except Exception as e:
             logger.warning(f"⚠️ Failed to auto-resolve conflicts (non-fatal): {e}")
         
+        return budget_reached
+        
     except Exception as e:
         logger.error(f"❌ FATAL ERROR in unified sync: {e}", exc_info=True)
         raise
+    finally:
+        if pages is not None:
+            # Stop the fetcher if a page failed mid-run
+            pages.close()
 
 
 def main():
     """Main loop - runs every 5 minutes during business hours (Mon-Fri 6 AM - 6 PM CST)"""
     logger.info(f"🚀 Starting Unified ShipStation Sync (every {SYNC_INTERVAL_SECONDS}s)")
+    set_api_workflow(WORKFLOW_NAME)
     logger.info(f"⏰ Business Hours: Monday-Friday 6 AM - 6 PM CST | Weekends OFF")
     
     while True:
@@ -1373,13 +1771,22 @@ def main():
             # PRIORITY 2: Check if workflow enabled
             if not is_workflow_enabled(WORKFLOW_NAME):
                 logger.info(f"⏸️ Workflow '{WORKFLOW_NAME}' is DISABLED - sleeping 60s")
-                time.sleep(60)
+                # Re-check as soon as a toggle is pushed
+                sleep_until_event(WORKFLOW_CONTROLS_CHANGED, 60)
                 continue
             
-            # Run sync during business hours
-            run_unified_sync()
-            logger.info(f"😴 Next sync in {SYNC_INTERVAL_SECONDS} seconds")
-            time.sleep(SYNC_INTERVAL_SECONDS)
+            # Run sync during business hours (one replica at a time)
+            catching_up = False
+            with run_exclusive(WORKFLOW_NAME, min_interval_seconds=SYNC_MIN_INTERVAL_SECONDS) as lease:
+                if lease is not None:
+                    catching_up = run_unified_sync()
+            if catching_up:
+                # Backlog left over - continue from the checkpoint without the full interval
+                logger.info(f"⏩ Backlog remaining - next sync in {SYNC_MIN_INTERVAL_SECONDS} seconds")
+                time.sleep(SYNC_MIN_INTERVAL_SECONDS)
+                continue
+            logger.info(f"😴 Next sync in {SYNC_INTERVAL_SECONDS} seconds (or sooner on new uploads)")
+            sleep_until_event(ORDERS_UPLOADED, SYNC_INTERVAL_SECONDS, min_sleep=SYNC_MIN_INTERVAL_SECONDS)
             
         except KeyboardInterrupt:
             logger.info("⛔ Unified sync stopped by user")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Validation script for compute_order_content_hash
+The hash must be stable for the same persisted data (key order, notes, tags, modifyDate)
+and change whenever a field the sync stores changes
+"""
+import os
+import sys
+import copy
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from src.unified_shipstation_sync import compute_order_content_hash
+
+BASE_ORDER = {
+    'orderId': 555,
+    'orderNumber': '100123',
+    'orderStatus': 'awaiting_shipment',
+    'modifyDate': '2025-10-13T08:00:00.0000000',
+    'internalNotes': 'call before delivery',
+    'tagIds': [101],
+    'carrierCode': 'fedex',
+    'serviceCode': 'fedex_2day',
+    'trackingNumber': None,
+    'items': [
+        {'sku': '17612', 'quantity': 2, 'unitPrice': 10.0},
+        {'sku': '17904', 'quantity': 1, 'unitPrice': 12.5},
+    ],
+    'shipTo': {'name': 'Jane Doe', 'street1': '1 Main St', 'city': 'Austin',
+               'state': 'TX', 'postalCode': '78701', 'country': 'US'},
+}
+
+
+def variant(**changes):
+    """Copy of BASE_ORDER with top-level fields replaced"""
+    order = copy.deepcopy(BASE_ORDER)
+    order.update(changes)
+    return order
+
+
+def test_hash_stable():
+    """Same persisted data -> same hash"""
+    print("=== Testing Hash Stability ===")
+    base_hash = compute_order_content_hash(BASE_ORDER)
+
+    reordered = {key: copy.deepcopy(BASE_ORDER[key]) for key in reversed(list(BASE_ORDER))}
+    reordered['shipTo'] = {key: BASE_ORDER['shipTo'][key] for key in reversed(list(BASE_ORDER['shipTo']))}
+
+    # Test cases: (description, order)
+    test_cases = [
+        ("same order hashed twice", copy.deepcopy(BASE_ORDER)),
+        ("keys in a different order", reordered),
+        ("modifyDate bumped", variant(modifyDate='2025-10-14T09:30:00.0000000')),
+        ("notes edited", variant(internalNotes='leave at door', customerNotes='thanks')),
+        ("tags changed", variant(tagIds=[101, 202])),
+        ("status case differs", variant(orderStatus='AWAITING_SHIPMENT')),
+    ]
+
+    results = []
+    for description, order in test_cases:
+        same = compute_order_content_hash(order) == base_hash
+        print(f"{'✓' if same else '✗'} {description} -> unchanged hash")
+        results.append(same)
+    print()
+    assert all(results)
+
+
+def test_hash_changes():
+    """A change to any field the sync stores -> different hash"""
+    print("=== Testing Hash Changes ===")
+    base_hash = compute_order_content_hash(BASE_ORDER)
+
+    ship_to = dict(BASE_ORDER['shipTo'], postalCode='78702')
+    items_quantity = copy.deepcopy(BASE_ORDER['items'])
+    items_quantity[0]['quantity'] = 3
+    items_sku = copy.deepcopy(BASE_ORDER['items'])
+    items_sku[1]['sku'] = '18675'
+
+    # Test cases: (description, order)
+    test_cases = [
+        ("status", variant(orderStatus='shipped')),
+        ("tracking number", variant(trackingNumber='794600000000')),
+        ("service", variant(serviceCode='fedex_ground')),
+        ("item quantity", variant(items=items_quantity)),
+        ("item SKU", variant(items=items_sku)),
+        ("item removed", variant(items=BASE_ORDER['items'][:1])),
+        ("ship-to postal code", variant(shipTo=ship_to)),
+    ]
+
+    results = []
+    for description, order in test_cases:
+        changed = compute_order_content_hash(order) != base_hash
+        print(f"{'✓' if changed else '✗'} {description} changed -> new hash")
+        results.append(changed)
+    print()
+    assert all(results)
+
+
+if __name__ == "__main__":
+    print("Order Content Hash Validation")
+    print("=" * 60)
+    print()
+
+    test_hash_stable()
+    test_hash_changes()
+
+    print("=" * 60)
+    print("Validation Complete!")
+    print()
+    print("Summary:")
+    print("- hash ignores key order, modifyDate, notes and tags")
+    print("- hash changes with status, tracking, service, items and ship-to")
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Validation script for the concurrent ShipStation paginator
+Runs iter_pages / fetch_all_pages against scripts/shipstation_simulator.py with
+injected latency and 429s (no database and no live API are touched)
+"""
+import os
+import sys
+import logging
+import socket
+import tempfile
+import threading
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+# Private governor state so a running system's budget is unaffected
+os.environ.setdefault('SHIPSTATION_RATE_STATE_FILE', os.path.join(tempfile.mkdtemp(), 'rate_governor.json'))
+
+from tenacity import wait_none
+
+from scripts.shipstation_simulator import start_simulator
+from src.services.shipstation import paginator
+from src.services.shipstation.paginator import iter_pages, fetch_all_pages, PaginationError
+from src.services.shipstation.api_client import get_shipstation_headers
+from utils.api_utils import make_api_request
+
+ORDERS = 200
+PAGE_SIZE = 10
+
+# Keep every retry attempt but skip the 4-10s backoff sleeps between them
+make_api_request.retry.wait = wait_none()
+# Per-request and per-retry log lines would bury the results
+logging.disable(logging.WARNING)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+PORT = _free_port()
+# Not SHIPSTATION_BASE_URL: the simulator stays ungoverned, so an injected 429
+# does not hold the shared bucket for the rest of the run
+ORDERS_URL = f"http://127.0.0.1:{PORT}/orders"
+HEADERS = get_shipstation_headers('sim', 'sim')
+PARAMS = {'pageSize': PAGE_SIZE}
+
+
+def page_count(state) -> int:
+    return (len(state.dataset.orders) + PAGE_SIZE - 1) // PAGE_SIZE
+
+
+def configure(state, **config):
+    """Change the simulator's latency / 429 injection between cases"""
+    state.config.update(config)
+
+
+def record_completions():
+    """Wrap the paginator's page fetch to record the order pages finish in"""
+    completed = []
+    lock = threading.Lock()
+    fetch_page = paginator._fetch_page
+
+    def recording_fetch_page(url, headers, params, page, *args):
+        result = fetch_page(url, headers, params, page, *args)
+        with lock:
+            completed.append(page)
+        return result
+
+    paginator._fetch_page = recording_fetch_page
+    return completed, fetch_page
+
+
+def test_in_order_yield(state):
+    """Pages finishing out of order are still yielded 1..N with the right contents"""
+    print("=== Testing In-Order Yield Under Out-Of-Order Completion ===")
+    configure(state, latency_ms=40, jitter_ms=35, inject_429=0.0)
+
+    completed, fetch_page = record_completions()
+    try:
+        pages = list(iter_pages(ORDERS_URL, HEADERS, PARAMS, 'orders', max_workers=4, label='test'))
+    finally:
+        paginator._fetch_page = fetch_page
+
+    yielded = [page for page, _, _ in pages]
+    order_ids = [o['orderId'] for _, _, items in pages for o in items]
+    results = [
+        yielded == list(range(1, page_count(state) + 1)),
+        completed != sorted(completed),
+        order_ids == sorted(state.dataset.orders),
+    ]
+    print(f"{'✓' if results[0] else '✗'} yielded pages {yielded[:5]}... ({len(yielded)} pages, expected {page_count(state)})")
+    print(f"{'✓' if results[1] else '✗'} pages completed out of order: {completed[:8]}...")
+    print(f"{'✓' if results[2] else '✗'} {len(order_ids)} orders in orderId order, none missing or repeated")
+    print()
+    assert all(results)
+
+
+def test_recovers_from_sporadic_429(state):
+    """Random 429s are retried per page; the scan still completes in order"""
+    print("=== Testing Sporadic 429s ===")
+    configure(state, latency_ms=10, jitter_ms=5, inject_429=0.2)
+    before = state.stats['injected_429']
+
+    items, complete = fetch_all_pages(ORDERS_URL, HEADERS, PARAMS, 'orders', max_workers=4, label='test')
+
+    injected = state.stats['injected_429'] - before
+    results = [
+        injected > 0,
+        complete and [o['orderId'] for o in items] == sorted(state.dataset.orders),
+    ]
+    print(f"{'✓' if results[0] else '✗'} simulator injected {injected} 429s")
+    print(f"{'✓' if results[1] else '✗'} complete={complete}, {len(items)} orders in order")
+    print()
+    assert all(results)
+
+
+def test_mid_stream_failure(state):
+    """A page that keeps failing raises PaginationError after the contiguous pages before it"""
+    print("=== Testing Mid-Stream Failure ===")
+    configure(state, latency_ms=20, jitter_ms=15, inject_429=0.0)
+
+    yielded = []
+    error = None
+    pages = iter_pages(ORDERS_URL, HEADERS, PARAMS, 'orders', max_workers=2, label='test')
+    try:
+        for page, _, _ in pages:
+            yielded.append(page)
+            if page == 3:
+                # Every request from here on is rejected, retries included
+                configure(state, inject_429=1.0)
+    except PaginationError as e:
+        error = e
+    finally:
+        pages.close()
+
+    results = [
+        error is not None,
+        yielded == list(range(1, len(yielded) + 1)) and len(yielded) >= 3,
+        error is not None and error.page == len(yielded) + 1,
+        len(yielded) < page_count(state),
+    ]
+    print(f"{'✓' if results[0] else '✗'} PaginationError raised: {error}")
+    print(f"{'✓' if results[1] else '✗'} pages before the failure yielded in order: {yielded}")
+    print(f"{'✓' if results[2] else '✗'} error reports the first missing page ({error.page if error else None})")
+    print(f"{'✓' if results[3] else '✗'} scan stopped before the last page")
+    print()
+    assert all(results)
+
+
+if __name__ == "__main__":
+    print("ShipStation Paginator Validation")
+    print("=" * 60)
+    print()
+
+    server, state = start_simulator(['--port', str(PORT), '--orders', str(ORDERS), '--rate-limit', '100000'])
+    try:
+        test_in_order_yield(state)
+        test_recovers_from_sporadic_429(state)
+        test_mid_stream_failure(state)
+    finally:
+        server.shutdown()
+
+    print("=" * 60)
+    print("Validation Complete!")
+    print()
+    print("Summary:")
+    print("- pages are yielded in page order however the requests complete")
+    print("- sporadic 429s are retried without reordering or losing pages")
+    print("- a persistent failure raises PaginationError after the pages before it")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Validation script for utils/pipeline.Prefetcher
+Tests backpressure at maxsize, source exceptions reaching the consumer and
+stopping the fetcher when the consumer leaves early
+"""
+import os
+import sys
+import time
+import threading
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from utils.pipeline import Prefetcher
+
+
+def check(description, passed):
+    print(f"{'✓' if passed else '✗'} {description}")
+    return passed
+
+
+def test_backpressure():
+    """The fetcher stops at maxsize queued items while the consumer is busy"""
+    print("=== Testing Backpressure ===")
+    produced = []
+
+    def source():
+        for i in range(20):
+            produced.append(i)
+            yield i
+
+    with Prefetcher(source(), maxsize=2, name='test') as pages:
+        time.sleep(0.5)  # consumer "busy" before taking anything
+        held = len(produced)
+        items = list(pages)
+
+    # maxsize items queued plus the one the fetcher is waiting to put
+    results = [
+        check(f"fetcher held at {held} items while the consumer was busy (maxsize 2 + 1 pending)", held <= 3),
+        check(f"all {len(items)} items delivered in order once consumed", items == list(range(20))),
+        check(f"blocked time recorded ({pages.timings()['blocked_seconds']}s)", pages.timings()['blocked_seconds'] > 0.3),
+    ]
+    print()
+    assert all(results)
+
+
+def test_exception_propagation():
+    """An exception from the source is raised in the consumer after the items before it"""
+    print("=== Testing Exception Propagation ===")
+
+    def source():
+        yield 1
+        yield 2
+        raise ValueError("page 3 failed")
+
+    delivered = []
+    error = None
+    with Prefetcher(source(), maxsize=2, name='test') as pages:
+        try:
+            for item in pages:
+                delivered.append(item)
+        except ValueError as e:
+            error = e
+
+    results = [
+        check(f"items before the failure delivered: {delivered}", delivered == [1, 2]),
+        check(f"consumer received the source's exception: {error!r}", isinstance(error, ValueError)),
+        check("iteration ends after the exception", next(pages, None) is None),
+    ]
+    print()
+    assert all(results)
+
+
+def test_early_consumer_exit():
+    """Leaving the with-block stops the fetcher and closes the source on its own thread"""
+    print("=== Testing Early Consumer Exit ===")
+    closed_on = []
+    produced = []
+
+    def source():
+        try:
+            i = 0
+            while True:
+                produced.append(i)
+                yield i
+                i += 1
+        finally:
+            closed_on.append(threading.current_thread().name)
+
+    with Prefetcher(source(), maxsize=2, name='early') as pages:
+        for item in pages:
+            if item == 1:
+                break
+
+    count = len(produced)
+    time.sleep(0.2)
+    results = [
+        check(f"source closed on the fetcher thread ({closed_on})", closed_on == ['early-fetch']),
+        check("fetcher thread finished", not pages._thread.is_alive()),
+        check(f"no items fetched after close ({count} total)", len(produced) == count and count <= 5),
+    ]
+    print()
+    assert all(results)
+
+
+if __name__ == "__main__":
+    print("Prefetcher Pipeline Validation")
+    print("=" * 60)
+    print()
+
+    test_backpressure()
+    test_exception_propagation()
+    test_early_consumer_exit()
+
+    print("=" * 60)
+    print("Validation Complete!")
+    print()
+    print("Summary:")
+    print("- the fetcher never runs more than maxsize items ahead of the consumer")
+    print("- source exceptions surface in the consumer at the position they occurred")
+    print("- an early exit closes the source on the fetcher thread and stops it")
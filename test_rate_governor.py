@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Validation script for utils/rate_governor
+Uses a private state file (SHIPSTATION_RATE_STATE_FILE) so a running system's
+ShipStation budget is unaffected
+"""
+import os
+import sys
+import tempfile
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+# Must be set before utils.rate_governor is imported
+STATE_FILE = os.path.join(tempfile.mkdtemp(), 'rate_governor.json')
+os.environ['SHIPSTATION_RATE_STATE_FILE'] = STATE_FILE
+
+from utils import rate_governor
+from utils.rate_governor import (
+    acquire, record_response, get_governor_state,
+    PRIORITY_INTERACTIVE, PRIORITY_NORMAL, PRIORITY_BACKGROUND, PRIORITY_RESERVE
+)
+
+
+def reset_bucket(tokens: int = None):
+    """Start from a full bucket, optionally drained to `tokens` via the server's remaining count"""
+    if os.path.exists(STATE_FILE):
+        os.remove(STATE_FILE)
+    if tokens is not None:
+        record_response({'X-Rate-Limit-Remaining': str(tokens), 'X-Rate-Limit-Reset': '60'}, 200)
+
+
+def tokens() -> float:
+    return get_governor_state()['tokens']
+
+
+def check(description, passed):
+    print(f"{'✓' if passed else '✗'} {description}")
+    return passed
+
+
+def test_priority_reserve():
+    """Lower priorities leave PRIORITY_RESERVE tokens for higher ones"""
+    print("=== Testing Priority Reserve ===")
+    results = [check(f"state file is the private one ({rate_governor.RATE_STATE_FILE})",
+                     rate_governor.RATE_STATE_FILE == STATE_FILE)]
+
+    reset_bucket(tokens=4)
+    before = tokens()
+    acquire(PRIORITY_BACKGROUND, max_wait=0.2)
+    results.append(check(f"background gave up with {before} tokens (reserve {PRIORITY_RESERVE[PRIORITY_BACKGROUND]}), "
+                         f"bucket now {tokens()}", tokens() >= before))
+
+    acquire(PRIORITY_NORMAL, max_wait=0.2)
+    acquire(PRIORITY_NORMAL, max_wait=0.2)
+    results.append(check(f"normal took the tokens above its reserve of {PRIORITY_RESERVE[PRIORITY_NORMAL]} -> {tokens()}",
+                         tokens() < before - 1.5))
+
+    before = tokens()
+    acquire(PRIORITY_NORMAL, max_wait=0.2)
+    after_normal = tokens()
+    acquire(PRIORITY_INTERACTIVE, max_wait=0.2)
+    results.append(check(f"normal refused at {before} tokens, bucket {after_normal}", after_normal >= before))
+    results.append(check(f"interactive used the reserved tokens -> {tokens()}", tokens() < after_normal))
+    print()
+    assert all(results)
+
+
+def test_response_headers():
+    """X-Rate-Limit-Remaining / Reset and 429s update the shared state"""
+    print("=== Testing Response Headers ===")
+    results = []
+
+    reset_bucket()
+    record_response({'X-Rate-Limit-Remaining': '3', 'X-Rate-Limit-Reset': '20'}, 200)
+    state = get_governor_state()
+    results.append(check(f"remaining 3 lowers the bucket to {state['tokens']}", 3 <= state['tokens'] < 3.5))
+    results.append(check(f"not blocked while tokens remain ({state['blocked_for_seconds']}s)", state['blocked_for_seconds'] == 0))
+
+    record_response({'X-Rate-Limit-Remaining': '30', 'X-Rate-Limit-Reset': '20'}, 200)
+    results.append(check(f"a higher remaining count does not refill the bucket ({tokens()})", tokens() < 3.5))
+
+    record_response({'X-Rate-Limit-Remaining': '0', 'X-Rate-Limit-Reset': '20'}, 200)
+    state = get_governor_state()
+    results.append(check(f"remaining 0 holds callers until the reset ({state['blocked_for_seconds']}s)",
+                         state['tokens'] == 0 and 19 <= state['blocked_for_seconds'] <= 20))
+
+    reset_bucket()
+    record_response({'Retry-After': '15'}, 429)
+    state = get_governor_state()
+    results.append(check(f"429 with Retry-After 15 empties the bucket and blocks for {state['blocked_for_seconds']}s",
+                         state['tokens'] == 0 and 14 <= state['blocked_for_seconds'] <= 15))
+
+    acquire(PRIORITY_INTERACTIVE, max_wait=0.2)
+    results.append(check("even interactive callers wait while blocked", tokens() < 1))
+    print()
+    assert all(results)
+
+
+if __name__ == "__main__":
+    print("Rate Governor Validation")
+    print("=" * 60)
+    print()
+
+    try:
+        test_priority_reserve()
+        test_response_headers()
+    finally:
+        reset_bucket()
+
+    print("=" * 60)
+    print("Validation Complete!")
+    print()
+    print("Summary:")
+    print("- background and normal callers leave their reserve for higher priorities")
+    print("- remaining/reset headers and 429s update the shared bucket")
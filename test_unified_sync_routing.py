@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Validation script for the unified sync's per-order routing
+Covers every route of route_sync_order and the page lookup in classify_sync_page
+(no database or ShipStation access - lookups are passed in or faked)
+"""
+import os
+import sys
+
+project_root = os.path.abspath(os.path.dirname(__file__))
+sys.path.insert(0, project_root)
+
+from src.unified_shipstation_sync import (
+    route_sync_order, classify_sync_page, map_order_status, compute_order_content_hash
+)
+
+
+def make_order(order_id, order_number, skus=('17612',), status='awaiting_shipment'):
+    """Minimal ShipStation order payload"""
+    return {
+        'orderId': order_id,
+        'orderNumber': order_number,
+        'orderStatus': status,
+        'items': [{'sku': sku, 'quantity': 1, 'unitPrice': 10.0} for sku in skus],
+        'shipTo': {'name': 'Jane Doe', 'city': 'Austin', 'state': 'TX', 'postalCode': '78701'}
+    }
+
+
+def stored_state(order):
+    """orders_inbox state as classify_sync_page returns it: '<status>:<content hash>'"""
+    return f"{map_order_status(order)}:{compute_order_content_hash(order)}"
+
+
+def check(description, actual, expected):
+    status = "✓" if actual == expected else "✗"
+    print(f"{status} {description}: {actual} (expected {expected})")
+    return actual == expected
+
+
+def test_local_order_routes():
+    """Orders whose number already exists locally"""
+    print("=== Testing Routes For Known Order Numbers ===")
+
+    order = make_order(555, '100123')
+    changed = make_order(555, '100123', status='shipped')
+
+    # Test cases: (description, order, local_by_number, expected)
+    test_cases = [
+        ("same ShipStation ID, same hash", order,
+         {'100123': (7, 555, stored_state(order))}, ('skip_unchanged', 7, 555)),
+        ("same ShipStation ID, status changed", changed,
+         {'100123': (7, 555, stored_state(order))}, ('update', 7, 555)),
+        ("same ShipStation ID, no stored hash", order,
+         {'100123': (7, '555', None)}, ('update', 7, '555')),
+        ("local order not linked yet", order,
+         {'100123': (7, None, None)}, ('link', 7, None)),
+        ("local order linked to another ShipStation ID", order,
+         {'100123': (7, 999, stored_state(order))}, ('collision', 7, 999)),
+    ]
+
+    results = [check(description, route_sync_order(o, local, set()), expected)
+               for description, o, local, expected in test_cases]
+    print()
+    assert all(results)
+
+
+def test_new_order_routes():
+    """Orders whose number is not in orders_inbox - the manual-order filters"""
+    print("=== Testing Routes For New Order Numbers ===")
+
+    # Test cases: (description, order, local_origin_ids, expected)
+    test_cases = [
+        ("new manual order with key SKU", make_order(600, '100200'), set(), ('import', None, None)),
+        ("key SKU matched by prefix", make_order(601, '100201', skus=('17904-BX',)), set(), ('import', None, None)),
+        ("number not starting with 10", make_order(602, '200300'), set(), ('skip_not_manual', None, None)),
+        ("uploaded by the local system", make_order(603, '100202'), {'603'}, ('skip_local_origin', None, None)),
+        ("no key product SKUs", make_order(604, '100203', skus=('99999',)), set(), ('skip_no_key_skus', None, None)),
+    ]
+
+    results = [check(description, route_sync_order(o, {}, origin_ids), expected)
+               for description, o, origin_ids, expected in test_cases]
+    print()
+    assert all(results)
+
+
+class FakeCursor:
+    """Answers the two page queries from in-memory rows"""
+
+    def __init__(self, orders_rows, origin_rows):
+        self._orders_rows = orders_rows
+        self._origin_rows = origin_rows
+        self._rows = []
+        self.queries = []
+
+    def execute(self, sql, params=()):
+        self.queries.append(params)
+        if 'orders_inbox' in sql and 'order_number = ANY' in sql:
+            wanted = set(params[0])
+            self._rows = [row for row in self._orders_rows if row[0] in wanted]
+        else:
+            wanted = set(params[0])
+            self._rows = [row for row in self._origin_rows if row[0] in wanted]
+
+    def fetchall(self):
+        return self._rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+def test_classify_sync_page():
+    """Page lookup feeds route_sync_order: one query per lookup, origin check only for new '10' orders"""
+    print("=== Testing Page Classification ===")
+
+    known = make_order(700, '100300')
+    orders = [
+        known,
+        make_order(701, '100301'),                 # new manual order
+        make_order(702, '100302'),                 # uploaded by the local system
+        make_order(703, '300400'),                 # not manual - never origin-checked
+    ]
+    cursor = FakeCursor(
+        orders_rows=[('100300', 11, 700, stored_state(known))],
+        origin_rows=[('702',)]
+    )
+    local_by_number, local_origin_ids = classify_sync_page(orders, FakeConnection(cursor))
+
+    results = [
+        check("two lookup queries", len(cursor.queries), 2),
+        check("known order found", local_by_number.get('100300'), (11, 700, stored_state(known))),
+        check("origin-checked ids", sorted(cursor.queries[1][0]), ['701', '702']),
+        check("local origin ids", local_origin_ids, {'702'}),
+    ]
+    routes = [route_sync_order(o, local_by_number, local_origin_ids)[0] for o in orders]
+    results.append(check("routes", routes, ['skip_unchanged', 'import', 'skip_local_origin', 'skip_not_manual']))
+    print()
+    assert all(results)
+
+
+if __name__ == "__main__":
+    print("Unified Sync Routing Validation")
+    print("=" * 60)
+    print()
+
+    test_local_order_routes()
+    test_new_order_routes()
+    test_classify_sync_page()
+
+    print("=" * 60)
+    print("Validation Complete!")
+    print()
+    print("Summary:")
+    print("- known numbers route to skip_unchanged / update / link / collision")
+    print("- new numbers route to import or the skip_not_manual / skip_local_origin / skip_no_key_skus filters")
+    print("- classify_sync_page only origin-checks new '10' orders")
@@ -0,0 +1,310 @@
+#!/usr/bin/env python3
+"""
+API Usage Accounting
+Per-workflow, per-endpoint counters for every make_api_request call, so the
+ShipStation quota can be attributed to the workflow spending it.
+
+HOW IT WORKS:
+- make_api_request calls record() once per attempt with the status, latency
+  and byte counts; the tenacity retry hook calls record_retry().
+- Calls are tagged with rate_governor.get_api_workflow() and a normalised
+  endpoint (numeric path segments become {id}, e.g. /orders/{id}).
+- Counters accumulate in memory per (hour, workflow, endpoint). A daemon thread
+  flushes them every API_USAGE_FLUSH_SECONDS into api_usage_rollup, adding to
+  the stored row (migration 011), so hot paths never touch the database.
+- Latency is kept as a fixed histogram (LATENCY_BUCKETS_MS) which sums across
+  processes and hours; percentiles are read from the summed histogram.
+
+Without DATABASE_URL (cloud entry points) counters stay in memory only.
+"""
+
+import os
+import re
+import atexit
+import logging
+import datetime
+import threading
+from urllib.parse import urlparse
+
+try:
+    from . import rate_governor
+except ImportError:
+    from utils import rate_governor
+
+logger = logging.getLogger(__name__)
+
+API_USAGE_FLUSH_SECONDS = float(os.getenv('API_USAGE_FLUSH_SECONDS', '60'))
+API_USAGE_RETENTION_DAYS = int(os.getenv('API_USAGE_RETENTION_DAYS', '14'))
+# Upper bound (ms) of each latency bucket; the last bucket is open-ended
+LATENCY_BUCKETS_MS = (25, 50, 100, 200, 400, 800, 1600, 3200, 6400, 12800, float('inf'))
+
+_NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+_pending = {}  # (bucket_start, workflow, endpoint) -> counters
+_pending_lock = threading.Lock()
+_flusher_pid = None
+_last_prune = None
+
+
+def _new_counters() -> dict:
+    return {
+        'request_count': 0, 'error_count': 0, 'rate_limited_count': 0, 'retry_count': 0,
+        'bytes_in': 0, 'bytes_out': 0, 'latency_ms_total': 0.0, 'latency_ms_max': 0.0,
+        'latency_hist': [0] * len(LATENCY_BUCKETS_MS),
+    }
+
+
+def normalize_endpoint(url: str) -> str:
+    """'https://ssapi.shipstation.com/orders/123?x=1' -> '/orders/{id}' (other hosts keep the hostname)"""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return 'invalid-url'
+    path = _NUMERIC_SEGMENT.sub('/{id}', parsed.path.rstrip('/')) or '/'
+    return path if rate_governor.is_governed(url) else f"{parsed.hostname}{path}"
+
+
+def _latency_bucket(latency_ms: float) -> int:
+    for index, upper in enumerate(LATENCY_BUCKETS_MS):
+        if latency_ms <= upper:
+            return index
+    return len(LATENCY_BUCKETS_MS) - 1
+
+
+def _counters_for(url: str) -> dict:
+    """Counters for this call's hour/workflow/endpoint (caller holds _pending_lock)"""
+    bucket = datetime.datetime.now().replace(minute=0, second=0, microsecond=0)
+    key = (bucket, rate_governor.get_api_workflow(), normalize_endpoint(url))
+    counters = _pending.get(key)
+    if counters is None:
+        counters = _pending[key] = _new_counters()
+    return counters
+
+
+def record(url: str, status_code: int = None, latency_seconds: float = 0.0,
+           bytes_in: int = 0, bytes_out: int = 0):
+    """
+    Account one request attempt
+
+    Args:
+        url: Requested URL
+        status_code: HTTP status, or None if no response arrived
+        latency_seconds: Time spent waiting for the response
+        bytes_in: Response body size
+        bytes_out: Request body size
+    """
+    latency_ms = latency_seconds * 1000
+    with _pending_lock:
+        counters = _counters_for(url)
+        counters['request_count'] += 1
+        if status_code is None or status_code >= 400:
+            counters['error_count'] += 1
+        if status_code == 429:
+            counters['rate_limited_count'] += 1
+        counters['bytes_in'] += bytes_in or 0
+        counters['bytes_out'] += bytes_out or 0
+        counters['latency_ms_total'] += latency_ms
+        counters['latency_ms_max'] = max(counters['latency_ms_max'], latency_ms)
+        counters['latency_hist'][_latency_bucket(latency_ms)] += 1
+    _ensure_flusher()
+
+
+def record_retry(url: str):
+    """Account a retry scheduled by the tenacity strategy"""
+    with _pending_lock:
+        _counters_for(url)['retry_count'] += 1
+
+
+def _take_pending() -> dict:
+    global _pending
+    with _pending_lock:
+        taken, _pending = _pending, {}
+    return taken
+
+
+def _restore_pending(taken: dict):
+    """Put counters back after a failed flush (merged with anything recorded since)"""
+    with _pending_lock:
+        for key, counters in taken.items():
+            current = _pending.setdefault(key, _new_counters())
+            _merge_counters(current, counters)
+
+
+def _merge_counters(into: dict, other: dict):
+    for name in ('request_count', 'error_count', 'rate_limited_count', 'retry_count',
+                 'bytes_in', 'bytes_out', 'latency_ms_total'):
+        into[name] += other[name]
+    into['latency_ms_max'] = max(into['latency_ms_max'], other['latency_ms_max'])
+    into['latency_hist'] = [a + b for a, b in zip(into['latency_hist'], other['latency_hist'])]
+
+
+def flush() -> int:
+    """
+    Add pending counters to api_usage_rollup
+
+    Returns:
+        int: Number of rollup rows written (0 if nothing pending or no database)
+    """
+    global _last_prune
+    if not os.getenv('DATABASE_URL'):
+        return 0
+    taken = _take_pending()
+    if not taken:
+        return 0
+
+    import psycopg2.extras
+    from src.services.database.pg_utils import transaction
+
+    rows = [
+        (bucket, workflow, endpoint, c['request_count'], c['error_count'], c['rate_limited_count'],
+         c['retry_count'], c['bytes_in'], c['bytes_out'], c['latency_ms_total'], c['latency_ms_max'],
+         c['latency_hist'])
+        for (bucket, workflow, endpoint), c in taken.items()
+    ]
+    try:
+        with transaction() as conn:
+            cursor = conn.cursor()
+            psycopg2.extras.execute_values(cursor, """
+                INSERT INTO api_usage_rollup (
+                    bucket_start, workflow, endpoint, request_count, error_count, rate_limited_count,
+                    retry_count, bytes_in, bytes_out, latency_ms_total, latency_ms_max, latency_hist
+                )
+                VALUES %s
+                ON CONFLICT (bucket_start, workflow, endpoint) DO UPDATE SET
+                    request_count = api_usage_rollup.request_count + EXCLUDED.request_count,
+                    error_count = api_usage_rollup.error_count + EXCLUDED.error_count,
+                    rate_limited_count = api_usage_rollup.rate_limited_count + EXCLUDED.rate_limited_count,
+                    retry_count = api_usage_rollup.retry_count + EXCLUDED.retry_count,
+                    bytes_in = api_usage_rollup.bytes_in + EXCLUDED.bytes_in,
+                    bytes_out = api_usage_rollup.bytes_out + EXCLUDED.bytes_out,
+                    latency_ms_total = api_usage_rollup.latency_ms_total + EXCLUDED.latency_ms_total,
+                    latency_ms_max = GREATEST(api_usage_rollup.latency_ms_max, EXCLUDED.latency_ms_max),
+                    latency_hist = ARRAY(
+                        SELECT COALESCE(h.stored, 0) + COALESCE(h.added, 0)
+                        FROM unnest(api_usage_rollup.latency_hist, EXCLUDED.latency_hist)
+                             WITH ORDINALITY AS h(stored, added, position)
+                        ORDER BY h.position
+                    ),
+                    updated_at = CURRENT_TIMESTAMP
+            """, rows, template="(%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s::INTEGER[])")
+
+            now = datetime.datetime.now()
+            if _last_prune is None or now - _last_prune > datetime.timedelta(hours=1):
+                cursor.execute("DELETE FROM api_usage_rollup WHERE bucket_start < %s",
+                               (now - datetime.timedelta(days=API_USAGE_RETENTION_DAYS),))
+                _last_prune = now
+        return len(rows)
+    except Exception as e:
+        _restore_pending(taken)
+        logger.warning(f"⚠️ Could not flush API usage counters (kept for next flush): {e}")
+        return 0
+
+
+def _flush_loop(pid: int):
+    stop = threading.Event()
+    while not stop.wait(API_USAGE_FLUSH_SECONDS):
+        if os.getpid() != pid:
+            return
+        flush()
+
+
+def _ensure_flusher():
+    """Start the periodic flusher once per process (after fork too)"""
+    global _flusher_pid
+    if _flusher_pid == os.getpid() or not os.getenv('DATABASE_URL'):
+        return
+    with _pending_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+    threading.Thread(target=_flush_loop, args=(_flusher_pid,), name='api-usage-flusher', daemon=True).start()
+
+
+atexit.register(flush)
+
+
+def _percentile(hist: list, fraction: float):
+    """Upper bound (ms) of the bucket holding the given fraction of requests"""
+    total = sum(hist)
+    if not total:
+        return None
+    rank = fraction * total
+    seen = 0
+    for index, count in enumerate(hist):
+        seen += count
+        if seen >= rank:
+            upper = LATENCY_BUCKETS_MS[index]
+            return None if upper == float('inf') else upper
+    return None
+
+
+def _summarize(counters: dict) -> dict:
+    requests_made = counters['request_count']
+    return {
+        'requests': requests_made,
+        'errors': counters['error_count'],
+        'rate_limited': counters['rate_limited_count'],
+        'retries': counters['retry_count'],
+        'bytes_in': counters['bytes_in'],
+        'bytes_out': counters['bytes_out'],
+        'latency_avg_ms': round(counters['latency_ms_total'] / requests_made, 1) if requests_made else None,
+        'latency_max_ms': round(counters['latency_ms_max'], 1),
+        'latency_p50_ms': _percentile(counters['latency_hist'], 0.50),
+        'latency_p95_ms': _percentile(counters['latency_hist'], 0.95),
+        'latency_p99_ms': _percentile(counters['latency_hist'], 0.99),
+    }
+
+
+def get_api_usage_summary(hours: int = 24) -> dict:
+    """
+    API usage per workflow and endpoint over the last N hours
+
+    Combines flushed rollup rows with this process's unflushed counters.
+    Percentiles are bucket upper bounds (None when above the last bound).
+
+    Returns:
+        dict: {'hours', 'since', 'workflows': [{'workflow', totals..., 'endpoints': [...]}]}
+    """
+    since = (datetime.datetime.now() - datetime.timedelta(hours=hours)).replace(minute=0, second=0, microsecond=0)
+    totals = {}  # (workflow, endpoint) -> counters
+
+    def add(workflow, endpoint, counters):
+        _merge_counters(totals.setdefault((workflow, endpoint), _new_counters()), counters)
+
+    if os.getenv('DATABASE_URL'):
+        from src.services.database.pg_utils import execute_query
+        rows = execute_query("""
+            SELECT workflow, endpoint, request_count, error_count, rate_limited_count, retry_count,
+                   bytes_in, bytes_out, latency_ms_total, latency_ms_max, latency_hist
+            FROM api_usage_rollup
+            WHERE bucket_start >= %s
+        """, (since,))
+        for row in rows or []:
+            hist = list(row[10] or [])
+            hist += [0] * (len(LATENCY_BUCKETS_MS) - len(hist))
+            add(row[0], row[1], {
+                'request_count': row[2], 'error_count': row[3], 'rate_limited_count': row[4],
+                'retry_count': row[5], 'bytes_in': row[6], 'bytes_out': row[7],
+                'latency_ms_total': row[8], 'latency_ms_max': row[9],
+                'latency_hist': hist[:len(LATENCY_BUCKETS_MS)],
+            })
+
+    with _pending_lock:
+        pending = [(key, dict(c, latency_hist=list(c['latency_hist']))) for key, c in _pending.items()]
+    for (bucket, workflow, endpoint), counters in pending:
+        if bucket >= since:
+            add(workflow, endpoint, counters)
+
+    workflows = {}
+    for (workflow, endpoint), counters in totals.items():
+        entry = workflows.setdefault(workflow, {'counters': _new_counters(), 'endpoints': []})
+        _merge_counters(entry['counters'], counters)
+        entry['endpoints'].append(dict(_summarize(counters), endpoint=endpoint))
+
+    result = []
+    for workflow, entry in workflows.items():
+        summary = dict(_summarize(entry['counters']), workflow=workflow)
+        summary['endpoints'] = sorted(entry['endpoints'], key=lambda e: e['requests'], reverse=True)
+        result.append(summary)
+    result.sort(key=lambda w: w['requests'], reverse=True)
+    return {'hours': hours, 'since': since.isoformat(), 'workflows': result}
@@ -43,6 +43,109 @@ from tenacity import (
     retry_if_exception
 )
 import time
+import threading
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    from . import rate_governor
+    from . import api_usage
+except ImportError:
+    from utils import rate_governor
+    from utils import api_usage
+
+# --- Shared HTTP Session (keep-alive / connection pooling) ---
+# One requests.Session per process so repeated calls to the same host (ShipStation)
+# reuse TCP/TLS connections instead of handshaking on every request.
+# Retries stay with tenacity (RETRY_STRATEGY); the adapter itself never retries.
+HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))    # distinct hosts kept pooled
+HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '10'))           # connections kept per host
+
+_http_session = None
+_http_session_pid = None
+_http_session_lock = threading.Lock()
+_http_stats_lock = threading.Lock()
+_http_stats = {'requests': 0, 'connections_opened': 0}
+
+
+def _count_http_stat(key: str, amount: int = 1):
+    with _http_stats_lock:
+        _http_stats[key] += amount
+
+
+class _CountingHTTPConnectionPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _count_http_stat('connections_opened')
+        return super()._new_conn()
+
+
+class _CountingHTTPSConnectionPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _count_http_stat('connections_opened')
+        return super()._new_conn()
+
+
+class _CountingHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that counts every request it sends and every new socket its pools open"""
+
+    def send(self, request, *args, **kwargs):
+        # Counted here rather than in make_api_request so direct get_http_session()
+        # calls are covered too - the same traffic connections_opened sees
+        _count_http_stat('requests')
+        return super().send(request, *args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _CountingHTTPConnectionPool,
+            'https': _CountingHTTPSConnectionPool,
+        }
+
+
+def get_http_session() -> requests.Session:
+    """
+    Return this process's shared requests.Session (created lazily, rebuilt after fork).
+
+    Use it for any direct HTTP call that does not go through make_api_request so
+    it shares the same keep-alive connection pool.
+    """
+    global _http_session, _http_session_pid
+    with _http_session_lock:
+        if _http_session is None or _http_session_pid != os.getpid():
+            session = requests.Session()
+            adapter = _CountingHTTPAdapter(
+                pool_connections=HTTP_POOL_CONNECTIONS,
+                pool_maxsize=HTTP_POOL_MAXSIZE,
+                max_retries=0,
+                pool_block=False
+            )
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+            session.headers.update({
+                'Accept-Encoding': 'gzip, deflate',
+                'Connection': 'keep-alive',
+            })
+            _http_session = session
+            _http_session_pid = os.getpid()
+        return _http_session
+
+
+def get_http_session_stats() -> dict:
+    """
+    Connection reuse counters for this process's shared session.
+
+    Returns:
+        dict: requests sent, connections opened, requests served on an already
+              open connection, and the reuse ratio.
+    """
+    with _http_stats_lock:
+        stats = dict(_http_stats)
+    reused = max(0, stats['requests'] - stats['connections_opened'])
+    stats['connections_reused'] = reused
+    stats['reuse_ratio'] = round(reused / stats['requests'], 3) if stats['requests'] else 0.0
+    stats['pid'] = os.getpid()
+    return stats
+
 
 def is_retryable_error(exception):
     """Check if exception is retryable (including 429 rate limit)"""
@@ -55,10 +158,16 @@ def is_retryable_error(exception):
         requests.exceptions.RequestException
     ))
 
+def _record_retry(retry_state):
+    """Count retries per workflow/endpoint (see utils/api_usage.py)"""
+    url = retry_state.kwargs.get('url') or (retry_state.args[0] if retry_state.args else '')
+    api_usage.record_retry(url)
+
 RETRY_STRATEGY = retry(
     stop=stop_after_attempt(5),
     wait=wait_exponential(multiplier=1, min=4, max=10),
     retry=retry_if_exception(is_retryable_error),
+    before_sleep=_record_retry,
     reraise=True
 )
 
@@ -67,6 +176,10 @@ def make_api_request(url: str, method: str = 'GET', data: dict = None, headers:
     """
     Makes an API request with built-in retry logic and logging.
 
+    Requests go through the shared keep-alive session (get_http_session), so
+    consecutive calls to the same host reuse pooled connections. Each attempt
+    is accounted to the current workflow in utils/api_usage.py.
+
     Args:
         url (str): The URL for the API endpoint.
         method (str): The HTTP method ('GET', 'POST', 'PUT', 'DELETE'). Defaults to 'GET'.
@@ -88,17 +201,29 @@ def make_api_request(url: str, method: str = 'GET', data: dict = None, headers:
         # In a real scenario, be careful about logging sensitive data (e.g., passwords, API keys)
         logger.debug(f"Request data: {data}")
 
+    started = None
     try:
-        if method.upper() == 'GET':
-            response = requests.get(url, headers=headers, params=params, timeout=timeout)
-        elif method.upper() == 'POST':
-            response = requests.post(url, json=data, headers=headers, params=params, timeout=timeout)
-        elif method.upper() == 'PUT':
-            response = requests.put(url, json=data, headers=headers, params=params, timeout=timeout)
-        elif method.upper() == 'DELETE':
-            response = requests.delete(url, headers=headers, params=params, timeout=timeout)
+        session = get_http_session()
+        method = method.upper()
+        governed = rate_governor.is_governed(url)
+        if governed:
+            # Shared ShipStation budget across all processes (see utils/rate_governor.py)
+            rate_governor.acquire()
+        started = time.monotonic()
+        if method == 'GET':
+            response = session.get(url, headers=headers, params=params, timeout=timeout)
+        elif method == 'POST':
+            response = session.post(url, json=data, headers=headers, params=params, timeout=timeout)
+        elif method == 'PUT':
+            response = session.put(url, json=data, headers=headers, params=params, timeout=timeout)
+        elif method == 'DELETE':
+            response = session.delete(url, headers=headers, params=params, timeout=timeout)
         else:
             raise ValueError(f"Unsupported HTTP method: {method}")
+        api_usage.record(url, response.status_code, time.monotonic() - started,
+                         len(response.content or b''), len(response.request.body or b'') if response.request else 0)
+        if governed:
+            rate_governor.record_response(response.headers, response.status_code)
 
         # Raise an HTTPError for bad responses (4xx or 5xx)
         # This allows tenacity to retry on certain status codes if configured,
@@ -126,6 +251,8 @@ def make_api_request(url: str, method: str = 'GET', data: dict = None, headers:
 
     except requests.exceptions.RequestException as e:
         # Catch broader requests exceptions (connection errors, timeouts, etc.)
+        if started is not None:
+            api_usage.record(url, None, time.monotonic() - started)
         logger.error(f"Request failed for {url} due to network/request issue: {e}")
         raise # Re-raise for tenacity or the caller to handle
 
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Bounded-queue pipeline stage: overlap fetching with processing.
+
+The sync, uploader and scanners pull a page from ShipStation, then write it to
+the database, then pull the next page - the database idles while a page
+downloads and the network idles while a page commits. Prefetcher runs the
+fetching side (any iterator, e.g. a page generator) on a background thread so
+page N+1 downloads while the caller processes page N.
+
+HOW IT WORKS:
+- The fetcher thread puts items on a queue of at most `maxsize` items; when the
+  writer falls behind, the fetcher blocks (backpressure), so memory stays at
+  maxsize pages however large the feed is.
+- An exception raised by the source is re-raised in the consuming thread at
+  the position it occurred - every item fetched before it is still delivered,
+  so callers handle it exactly as they would without the pipeline.
+- close() (or leaving the with-block) stops the fetcher and closes the source
+  on the fetcher's own thread, e.g. when a run hits its budget.
+- timings() reports how long each stage worked and how long it waited on the
+  other, which shows whether a run is bound by the API or by the database.
+
+The fetcher inherits the caller's API workflow (rate_governor.api_workflow), so
+its requests are governed and accounted exactly like the caller's.
+
+Usage:
+    with Prefetcher(iter_pages(...), maxsize=2, name='orders') as pages:
+        for page in pages:
+            write(page)
+    logger.info(pages.format_timings())
+"""
+
+import time
+import queue
+import logging
+import threading
+from typing import Any, Dict, Iterable
+
+from utils.rate_governor import api_workflow, get_api_workflow
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+PUT_POLL_SECONDS = 0.5
+
+
+class _SourceError:
+    """Queue marker carrying an exception raised by the source"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class Prefetcher:
+    """Iterate `source` on a background thread, at most `maxsize` items ahead"""
+
+    def __init__(self, source: Iterable, maxsize: int = 2, name: str = 'pipeline'):
+        self.name = name
+        self._source = iter(source)
+        self._queue = queue.Queue(maxsize=max(1, maxsize))
+        self._stop = threading.Event()
+        self._finished = False
+        self._last_delivered = None
+        self._timings = {
+            'fetch_seconds': 0.0,     # fetcher producing items
+            'blocked_seconds': 0.0,   # fetcher waiting for queue space (writer is the bottleneck)
+            'process_seconds': 0.0,   # consumer working on delivered items
+            'wait_seconds': 0.0,      # consumer waiting for the next item (fetch is the bottleneck)
+            'items': 0
+        }
+        self._thread = threading.Thread(target=self._run, args=(get_api_workflow(),),
+                                        name=f'{name}-fetch', daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> bool:
+        """Put with backpressure; False if the pipeline was closed while waiting"""
+        started = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                try:
+                    self._queue.put(item, timeout=PUT_POLL_SECONDS)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self._timings['blocked_seconds'] += time.monotonic() - started
+
+    def _run(self, workflow: str):
+        with api_workflow(workflow):
+            try:
+                while not self._stop.is_set():
+                    started = time.monotonic()
+                    try:
+                        item = next(self._source)
+                    except StopIteration:
+                        break
+                    finally:
+                        self._timings['fetch_seconds'] += time.monotonic() - started
+                    if not self._put(item):
+                        break
+            except BaseException as e:
+                self._put(_SourceError(e))
+                return
+            finally:
+                # Generators must be closed on the thread that runs them
+                close = getattr(self._source, 'close', None)
+                if close:
+                    try:
+                        close()
+                    except Exception as e:
+                        logger.debug(f"{self.name}: closing source failed: {e}")
+            self._put(_DONE)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        now = time.monotonic()
+        if self._last_delivered is not None:
+            self._timings['process_seconds'] += now - self._last_delivered
+            self._last_delivered = None
+        if self._finished:
+            raise StopIteration
+        item = self._queue.get()
+        self._timings['wait_seconds'] += time.monotonic() - now
+        if item is _DONE:
+            self._finished = True
+            raise StopIteration
+        if isinstance(item, _SourceError):
+            self._finished = True
+            raise item.error
+        self._timings['items'] += 1
+        self._last_delivered = time.monotonic()
+        return item
+
+    def close(self, timeout: float = 30):
+        """Stop fetching and wait for the fetcher thread to close the source"""
+        if self._last_delivered is not None:
+            self._timings['process_seconds'] += time.monotonic() - self._last_delivered
+            self._last_delivered = None
+        self._finished = True
+        self._stop.set()
+        # Free queue space so a fetcher blocked on put() notices the stop
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning(f"⚠️ {self.name}: fetcher still busy after {timeout}s - leaving it to finish in the background")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def timings(self) -> Dict[str, Any]:
+        """Per-stage seconds and the number of items delivered"""
+        timings = dict(self._timings)
+        for key in ('fetch_seconds', 'blocked_seconds', 'process_seconds', 'wait_seconds'):
+            timings[key] = round(timings[key], 3)
+        return timings
+
+    def format_timings(self) -> str:
+        t = self.timings()
+        return (f"⏱️ {self.name} pipeline: {t['items']} items | fetch {t['fetch_seconds']:.1f}s "
+                f"(blocked {t['blocked_seconds']:.1f}s) | process {t['process_seconds']:.1f}s "
+                f"(waited {t['wait_seconds']:.1f}s)")
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+ShipStation Rate Governor
+Shared token bucket that keeps every process on this host under the ShipStation
+quota (40 requests/minute per API key) instead of discovering it through 429s.
+
+HOW IT WORKS:
+- Bucket state lives in a small JSON file guarded by fcntl.flock, so the sync,
+  uploader, scanners, refreshers and dashboard all draw from one budget.
+  (A file rather than a Postgres row: acquiring a token must not keep the
+  database awake outside business hours.)
+- Every response feeds X-Rate-Limit-Remaining / X-Rate-Limit-Reset back into the
+  bucket, so the server's count always wins over the local estimate.
+- A 429 (or Remaining == 0) closes the bucket until the window resets.
+
+PRIORITY:
+- interactive (dashboard requests) may use every token
+- normal (sync, upload) leaves a small reserve for interactive calls
+- background (scanners, refreshers, backfills) leaves a larger reserve and
+  yields while any higher-priority caller is waiting
+
+Each process declares who it is with set_api_workflow('<workflow-name>');
+api_workflow(name) overrides that for a block on the current thread.
+"""
+
+import os
+import json
+import time
+import logging
+import tempfile
+import threading
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+try:
+    import fcntl
+except ImportError:  # Non-POSIX: fall back to a per-process lock
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_PER_MINUTE = int(os.getenv('SHIPSTATION_RATE_LIMIT_PER_MINUTE', '40'))
+RATE_STATE_FILE = os.getenv(
+    'SHIPSTATION_RATE_STATE_FILE',
+    os.path.join(tempfile.gettempdir(), 'shipstation_rate_governor.json')
+)
+GOVERNED_HOSTS = {'ssapi.shipstation.com'}
+if os.getenv('SHIPSTATION_BASE_URL'):
+    # A simulator stands in for ShipStation - govern it the same way
+    GOVERNED_HOSTS.add(urlparse(os.getenv('SHIPSTATION_BASE_URL')).hostname)
+MAX_ACQUIRE_WAIT_SECONDS = 120
+WAITER_TTL_SECONDS = 5
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_NORMAL = 1
+PRIORITY_BACKGROUND = 2
+
+# Tokens each priority must leave in the bucket for higher priorities
+PRIORITY_RESERVE = {
+    PRIORITY_INTERACTIVE: 0,
+    PRIORITY_NORMAL: 2,
+    PRIORITY_BACKGROUND: 6,
+}
+
+WORKFLOW_PRIORITIES = {
+    'dashboard': PRIORITY_INTERACTIVE,
+    'shipstation-upload': PRIORITY_NORMAL,
+    'unified-shipstation-sync': PRIORITY_NORMAL,
+    'xml-import': PRIORITY_NORMAL,
+    'duplicate-scanner': PRIORITY_BACKGROUND,
+    'lot-mismatch-scanner': PRIORITY_BACKGROUND,
+    'units-refresher': PRIORITY_BACKGROUND,
+    'ghost-backfill': PRIORITY_BACKGROUND,
+}
+
+_process_workflow = os.getenv('API_WORKFLOW_NAME', 'unknown')
+_thread_state = threading.local()
+_local_lock = threading.Lock()
+
+
+def set_api_workflow(name: str):
+    """Declare which workflow this process's API calls belong to"""
+    global _process_workflow
+    _process_workflow = name
+
+
+def get_api_workflow() -> str:
+    """Workflow name for the current thread (thread override, else process default)"""
+    return getattr(_thread_state, 'workflow', None) or _process_workflow
+
+
+@contextmanager
+def api_workflow(name: str):
+    """Attribute API calls made inside the block (on this thread) to another workflow"""
+    previous = getattr(_thread_state, 'workflow', None)
+    _thread_state.workflow = name
+    try:
+        yield
+    finally:
+        _thread_state.workflow = previous
+
+
+def get_priority(workflow: str = None) -> int:
+    return WORKFLOW_PRIORITIES.get(workflow or get_api_workflow(), PRIORITY_NORMAL)
+
+
+def is_governed(url: str) -> bool:
+    """True if requests to this URL count against the ShipStation quota"""
+    try:
+        return urlparse(url).hostname in GOVERNED_HOSTS
+    except ValueError:
+        return False
+
+
+@contextmanager
+def _locked_state():
+    """Open, lock and load the shared bucket; writes back whatever the caller leaves in it"""
+    with _local_lock:
+        fd = os.open(RATE_STATE_FILE, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            raw = b''
+            while True:
+                chunk = os.read(fd, 65536)
+                if not chunk:
+                    break
+                raw += chunk
+            try:
+                state = json.loads(raw) if raw else {}
+            except ValueError:
+                state = {}
+            now = time.time()
+            state.setdefault('tokens', float(RATE_LIMIT_PER_MINUTE))
+            state.setdefault('updated', now)
+            state.setdefault('blocked_until', 0.0)
+            state.setdefault('waiters', {})
+            _refill(state, now)
+            yield state, now
+            payload = json.dumps(state).encode('utf-8')
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, payload)
+        finally:
+            if fcntl:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+
+def _refill(state: dict, now: float):
+    rate = RATE_LIMIT_PER_MINUTE / 60.0
+    elapsed = max(0.0, now - state['updated'])
+    state['tokens'] = min(float(RATE_LIMIT_PER_MINUTE), state['tokens'] + elapsed * rate)
+    state['updated'] = now
+
+
+def _higher_priority_waiting(state: dict, priority: int, now: float) -> bool:
+    for level, expires in state['waiters'].items():
+        if int(level) < priority and expires > now:
+            return True
+    return False
+
+
+def acquire(priority: int = None, max_wait: float = MAX_ACQUIRE_WAIT_SECONDS) -> float:
+    """
+    Take one request token, sleeping until one is available for this priority
+
+    Never raises for bucket problems - if the state file is unusable the call
+    proceeds ungoverned (tenacity still handles any 429).
+
+    Returns:
+        float: Seconds spent waiting
+    """
+    if priority is None:
+        priority = get_priority()
+    reserve = PRIORITY_RESERVE.get(priority, 0)
+    rate = RATE_LIMIT_PER_MINUTE / 60.0
+    start = time.time()
+
+    while True:
+        try:
+            with _locked_state() as (state, now):
+                if now < state['blocked_until']:
+                    wait = state['blocked_until'] - now
+                elif state['tokens'] - reserve >= 1 and not _higher_priority_waiting(state, priority, now):
+                    state['tokens'] -= 1
+                    state['waiters'].pop(str(priority), None)
+                    waited = now - start
+                    if waited > 1:
+                        logger.info(f"⏳ Rate governor: waited {waited:.1f}s for a ShipStation token ({get_api_workflow()})")
+                    return waited
+                else:
+                    wait = max(0.05, (1 + reserve - state['tokens']) / rate)
+                state['waiters'][str(priority)] = now + WAITER_TTL_SECONDS
+        except OSError as e:
+            logger.warning(f"Rate governor unavailable, proceeding ungoverned: {e}")
+            return time.time() - start
+
+        if time.time() - start + wait > max_wait:
+            logger.warning(f"Rate governor: gave up waiting after {time.time() - start:.1f}s ({get_api_workflow()})")
+            return time.time() - start
+        time.sleep(min(wait, 1.0))
+
+
+def record_response(headers, status_code: int = None):
+    """
+    Reconcile the bucket with the server's view after a response
+
+    Args:
+        headers: Response headers (X-Rate-Limit-Remaining / X-Rate-Limit-Reset / Retry-After)
+        status_code: HTTP status; 429 closes the bucket until the window resets
+    """
+    try:
+        remaining = headers.get('X-Rate-Limit-Remaining')
+        reset = headers.get('X-Rate-Limit-Reset') or headers.get('Retry-After')
+        remaining = int(remaining) if remaining is not None else None
+        reset = float(reset) if reset is not None else None
+    except (TypeError, ValueError):
+        return
+
+    if remaining is None and status_code != 429:
+        return
+
+    try:
+        with _locked_state() as (state, now):
+            if remaining is not None:
+                # Server is authoritative (other API clients share the key)
+                state['tokens'] = min(state['tokens'], float(remaining))
+            if status_code == 429 or remaining == 0:
+                state['tokens'] = 0.0
+                state['blocked_until'] = max(state['blocked_until'], now + (reset if reset is not None else 60))
+                logger.warning(f"🚦 ShipStation quota exhausted - holding all callers for {state['blocked_until'] - now:.0f}s")
+    except OSError as e:
+        logger.warning(f"Rate governor could not record response: {e}")
+
+
+def get_governor_state() -> dict:
+    """Snapshot of the shared bucket (for dashboards / debugging)"""
+    try:
+        with _locked_state() as (state, now):
+            return {
+                'tokens': round(state['tokens'], 2),
+                'limit_per_minute': RATE_LIMIT_PER_MINUTE,
+                'blocked_for_seconds': round(max(0.0, state['blocked_until'] - now), 1),
+                'waiting_priorities': sorted(int(p) for p, exp in state['waiters'].items() if exp > now),
+            }
+    except OSError as e:
+        return {'error': str(e)}